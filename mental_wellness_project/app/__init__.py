@@ -1,15 +1,29 @@
+from typing import Optional
+
 from flask import Flask
 from flask_cors import CORS
 
+from app.config import settings
 from app.database import init_db
 from app.routes import main
+from app.utils.keyword_matcher import calm_matcher, harmful_matcher
+from app.warmup import start_warmup
 
 
-def create_app():
+def create_app(warm_up: Optional[bool] = None):
     app = Flask(__name__, static_folder="../frontend", static_url_path="/")
+    # Werkzeug answers 413 from Content-Length before reading an oversized body
+    app.config["MAX_CONTENT_LENGTH"] = settings.max_request_bytes
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     init_db()
+    # Build the keyword automata once up front instead of on the first request
+    harmful_matcher()
+    calm_matcher()
+
+    # Load models in the background; /api/v1/ready reports progress
+    if settings.warmup_on_start if warm_up is None else warm_up:
+        start_warmup()
 
     @app.route("/")
     def index():
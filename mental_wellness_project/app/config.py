@@ -23,6 +23,101 @@ class Settings:
     db_path: Path = field(default=BASE_DIR / "mental_wellness.db")
     storage_dir: Path = field(default=STORAGE_DIR)
 
+    # Background model warm-up when the app starts (see app/warmup.py)
+    warmup_on_start: bool = os.getenv("WARMUP_ON_START", "0").lower() in {"1", "true", "yes"}
+    warmup_models: tuple = ("text_sentiment", "face_dnn", "fer", "tesseract", "easyocr")
+    # Models whose failed warm-up only degrades the instance; any other failure keeps /ready at 503
+    warmup_optional_models: tuple = ("tesseract", "easyocr")
+    # Optional models that back each other up (screen OCR): /ready stays 503 when all of them failed
+    warmup_fallback_groups: tuple = (("tesseract", "easyocr"),)
+
+    # Text sentiment inference backend: "torch", "onnx" or "onnx-int8".
+    # ONNX exports are cached under storage_dir/onnx and built only once.
+    sentiment_backend: str = os.getenv("SENTIMENT_BACKEND", "torch")
+
+    # Screen OCR Tesseract backend: "auto" (in-process tesserocr if installed, else pytesseract),
+    # "tesserocr" or "pytesseract"
+    screen_ocr_engine: str = os.getenv("SCREEN_OCR_ENGINE", "auto")
+
+    # Speech prosody features: "numpy" (single shared STFT) or "librosa" (reference)
+    speech_feature_engine: str = os.getenv("SPEECH_FEATURE_ENGINE", "numpy")
+
+    # Per-session online normalization of speech features
+    speech_norm_max_sessions: int = 1000
+    speech_norm_min_samples: int = 5
+    speech_norm_snapshot_seconds: float = 60.0
+    speech_norm_idle_seconds: float = 30 * 24 * 3600.0  # per-session baselines unused this long are dropped
+    # Prefix of the session id used when a client sends none (its address); such state is never persisted
+    anonymous_session_prefix: str = "anonymous:"
+
+    # Voice-activity gate in front of speech analysis (energy + zero-crossing rate)
+    speech_vad_enabled: bool = os.getenv("SPEECH_VAD", "1").lower() in {"1", "true", "yes"}
+    speech_vad_frame_ms: float = 20.0
+    speech_vad_margin_db: float = 6.0
+    speech_vad_floor_db: float = -55.0
+    speech_vad_max_zcr: float = 0.25
+    speech_vad_min_speech_seconds: float = 0.2
+
+    # Per-session face tracking: the DNN detector runs every N frames or when tracking is lost
+    face_tracking_enabled: bool = os.getenv("FACE_TRACKING", "1").lower() in {"1", "true", "yes"}
+    face_redetect_every: int = int(os.getenv("FACE_REDETECT_EVERY", "5"))
+    face_track_min_confidence: float = float(os.getenv("FACE_TRACK_MIN_CONFIDENCE", "0.6"))
+    face_track_search_margin: float = 0.5
+    face_track_max_sessions: int = 64
+    face_track_idle_seconds: float = 300.0
+    # Faces reported per frame (most confident first); all are classified in one FER batch
+    face_max_faces: int = int(os.getenv("FACE_MAX_FACES", "8"))
+
+    # Per-session face result reuse for near-identical frames (perceptual hash distance in bits of 256)
+    face_cache_enabled: bool = os.getenv("FACE_CACHE", "1").lower() in {"1", "true", "yes"}
+    face_cache_max_distance: int = 10
+    face_cache_max_age_seconds: float = 10.0
+    face_cache_max_sessions: int = 256
+
+    # Incremental screen OCR: per-session tiles, only changed tiles are re-OCR'd
+    screen_tiles_enabled: bool = os.getenv("SCREEN_OCR_TILES", "1").lower() in {"1", "true", "yes"}
+    screen_tile_height: int = int(os.getenv("SCREEN_TILE_HEIGHT", "160"))
+    screen_tile_columns: int = 1
+    screen_tile_overlap: int = 24  # px shared with the next band so cut lines are whole in one of them
+    screen_tile_max_sessions: int = 64
+    screen_tile_idle_seconds: float = 300.0
+    # OCR only detected text lines (gradient + connected components), read in parallel
+    screen_text_regions_enabled: bool = os.getenv("SCREEN_TEXT_REGIONS", "1").lower() in {"1", "true", "yes"}
+    screen_text_max_regions: int = 200
+    screen_ocr_workers: int = int(os.getenv("SCREEN_OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # When every OCR call starts a tesseract process (pytesseract), a tile's lines are merged into
+    # blocks of adjacent lines, and a tile with more blocks than this is read as one region
+    screen_ocr_max_process_calls: int = int(os.getenv("SCREEN_OCR_MAX_PROCESS_CALLS", "4"))
+    # OCR preprocessing tier per crop: "auto" (noise / contrast / stroke width + time budget), "none", "light", "full"
+    screen_ocr_preprocess: str = os.getenv("SCREEN_OCR_PREPROCESS", "auto")
+    screen_ocr_budget_seconds: float = float(os.getenv("SCREEN_OCR_BUDGET_SECONDS", "4"))
+    # /monitor screen OCR runs on background workers; a newer screenshot replaces a session's queued one
+    screen_job_workers: int = int(os.getenv("SCREEN_JOB_WORKERS", "2"))
+    screen_job_queue_size: int = int(os.getenv("SCREEN_JOB_QUEUE_SIZE", "32"))
+
+    # Binary media uploads (multipart parts or raw bodies); JSON requests are capped too
+    max_request_bytes: int = 32 * 1024 * 1024
+    upload_max_frame_bytes: int = 4 * 1024 * 1024
+    upload_max_screen_bytes: int = 8 * 1024 * 1024
+    upload_max_audio_bytes: int = 8 * 1024 * 1024
+
+    # Streaming audio ingestion (/api/v1/audio/stream)
+    audio_stream_window_seconds: float = 10.0
+    audio_stream_max_sessions: int = 64
+    audio_stream_idle_seconds: float = 300.0
+    audio_stream_max_request_bytes: int = 8 * 1024 * 1024
+
+    # Text sentiment micro-batching (concurrent requests share one forward pass)
+    sentiment_max_batch_size: int = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "16"))
+    sentiment_max_wait_ms: float = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "5"))
+    text_batch_max_items: int = 64
+    # Long texts are split into overlapping token windows instead of truncated
+    sentiment_chunk_overlap_tokens: int = 64
+    sentiment_max_chunks: int = 32
+    # Sentiment result cache keyed on a hash of the normalized text
+    text_cache_max_entries: int = 512
+    text_cache_ttl_seconds: float = 300.0
+
     # Application level thresholds / keywords
     harmful_keywords: tuple = (
         "self-harm",
@@ -56,8 +56,8 @@ def synthesize(snapshot: ModuleSnapshot) -> Dict:
     if snapshot.speech and snapshot.speech.get("emotion"):
         emotion = snapshot.speech.get("emotion", "unknown")
         
-        # Process speech if it's not "unknown" or "waiting"
-        if emotion not in {"unknown", "waiting", None}:
+        # Process speech if it's not "unknown", "waiting" or "no_speech"
+        if emotion not in {"unknown", "waiting", "no_speech", None}:
             data_quality += 1
             
             # More nuanced emotion scoring
@@ -0,0 +1,179 @@
+import threading
+import time
+from statistics import median
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+OCR_ENGINES = ("auto", "tesserocr", "pytesseract")
+
+# Characters Tesseract may emit for screen text
+CHAR_WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,!?;:()[]{}'\"-+=@#$%&*"
+
+BENCHMARK_LINES = (
+    "Meeting moved to 3:30pm, see the updated agenda.",
+    "I feel worthless and alone lately.",
+    "Download complete (42 files, 118 MB)",
+)
+
+
+class OcrEngineUnavailable(RuntimeError):
+    """The Tesseract backend is not installed or cannot start."""
+
+
+def _as_gray_array(image) -> np.ndarray:
+    array = np.asarray(image)
+    if array.ndim == 3:
+        import cv2
+
+        array = cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    return np.ascontiguousarray(array, dtype=np.uint8)
+
+
+class PytesseractEngine:
+    """
+    The `tesseract` CLI through pytesseract: every call writes a temporary
+    image and starts a new process that reloads the language model.
+    """
+
+    name = "pytesseract"
+    persistent = False  # every call pays a process start and model load
+
+    def __init__(self):
+        import pytesseract
+
+        self._pytesseract = pytesseract
+        # pytesseract shlex-splits the config, so the whitelist can't contain quotes or spaces
+        # (spaces are never classified anyway)
+        whitelist = CHAR_WHITELIST.translate({ord(char): None for char in " '\""})
+        # --psm 6: Uniform block of text (good for screen content), --psm 7: a single text line
+        # --oem 3: Default OCR Engine Mode (LSTM + Legacy)
+        self._configs = {
+            single_line: f"--psm {7 if single_line else 6} --oem 3 -c tessedit_char_whitelist={whitelist}"
+            for single_line in (False, True)
+        }
+
+    def recognize(self, image, single_line: bool = False) -> str:
+        try:
+            return self._pytesseract.image_to_string(_as_gray_array(image), config=self._configs[single_line])
+        except self._pytesseract.TesseractNotFoundError as e:
+            raise OcrEngineUnavailable(str(e)) from e
+
+
+class TesserocrEngine:
+    """
+    Tesseract's C++ API in-process through tesserocr. Each thread keeps one
+    initialized API (they are not thread-safe), so the language model is
+    loaded once per worker thread and no process is spawned per call.
+    tesserocr releases the GIL while recognizing, so threads run in parallel.
+    """
+
+    name = "tesserocr"
+    persistent = True
+
+    def __init__(self, lang: str = "eng"):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._lang = lang
+        self._local = threading.local()
+        self._api()  # fail here (not on the first request) if tessdata is missing
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            tesserocr = self._tesserocr
+            try:
+                api = tesserocr.PyTessBaseAPI(lang=self._lang, psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+            except RuntimeError as e:
+                raise OcrEngineUnavailable(str(e)) from e
+            api.SetVariable("tessedit_char_whitelist", CHAR_WHITELIST)
+            self._local.api = api
+        return api
+
+    def recognize(self, image, single_line: bool = False) -> str:
+        gray = _as_gray_array(image)
+        height, width = gray.shape
+        api = self._api()
+        api.SetPageSegMode(self._tesserocr.PSM.SINGLE_LINE if single_line else self._tesserocr.PSM.SINGLE_BLOCK)
+        api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        return api.GetUTF8Text()
+
+
+def load_ocr_engine(engine: str = "auto", fallback: bool = True):
+    """
+    Build the Tesseract backend `engine`. "auto" prefers the persistent
+    in-process tesserocr API (`pip install tesserocr`) and falls back to
+    pytesseract; with `fallback` False a missing backend raises instead.
+    Returns None when neither can be loaded.
+    """
+    if engine not in OCR_ENGINES:
+        print(f"Warning: unknown OCR engine '{engine}', using auto")
+        engine = "auto"
+
+    if engine in ("auto", "tesserocr"):
+        try:
+            return TesserocrEngine()
+        except ImportError as e:
+            if not fallback:
+                raise
+            if engine == "tesserocr":
+                print(f"Warning: tesserocr engine needs `pip install tesserocr` ({e}); using pytesseract")
+        except Exception as e:
+            if not fallback:
+                raise
+            print(f"Warning: could not start tesserocr ({e}); using pytesseract")
+
+    try:
+        return PytesseractEngine()
+    except ImportError as e:
+        if not fallback:
+            raise
+        print(f"Warning: pytesseract not installed ({e})")
+        return None
+
+
+def _benchmark_image(text: str):
+    import cv2
+
+    image = np.full((48, 12 * len(text) + 40), 255, dtype=np.uint8)
+    cv2.putText(image, text, (20, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1, cv2.LINE_AA)
+    return image
+
+
+def benchmark_ocr_engines(
+    engines: Sequence[str] = ("pytesseract", "tesserocr"),
+    lines: Optional[Sequence[str]] = None,
+    repeats: int = 10,
+) -> List[Dict]:
+    """Median per-call latency of each Tesseract backend on rendered text lines (load time reported separately)."""
+    images = [_benchmark_image(text) for text in (lines or BENCHMARK_LINES)]
+    report = []
+    for engine_name in engines:
+        try:
+            started = time.perf_counter()
+            engine = load_ocr_engine(engine_name, fallback=False)
+            load_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            sample = engine.recognize(images[0], single_line=True)
+            first_call = time.perf_counter() - started
+        except Exception as e:
+            report.append({"engine": engine_name, "error": str(e)[:200]})
+            continue
+
+        timings = []
+        for _ in range(repeats):
+            for image in images:
+                started = time.perf_counter()
+                engine.recognize(image, single_line=True)
+                timings.append(time.perf_counter() - started)
+        report.append(
+            {
+                "engine": engine_name,
+                "load_seconds": round(load_seconds, 3),
+                "first_call_ms": round(first_call * 1000, 2),
+                "median_ms": round(median(timings) * 1000, 2),
+                "sample": sample.strip(),
+            }
+        )
+    return report
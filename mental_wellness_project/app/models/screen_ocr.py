@@ -1,13 +1,22 @@
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from threading import Lock
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-import pytesseract
-from pytesseract import TesseractNotFoundError
 
 from app.config import settings
+from app.models.ocr_engines import OcrEngineUnavailable, load_ocr_engine
+from app.utils.keyword_matcher import harmful_matcher
+from app.utils.latest_jobs import LatestJobQueue
+from app.utils.ocr_preprocess import PREPROCESS_TIERS, image_stats, preprocess, select_tier
 from app.utils.screen_capture import decode_base64_screen
+from app.utils.screen_tiles import Rect, TileState, TileTextStore, locate_hits, stitch_lines, tile_grid
+from app.utils.text_regions import detect_text_lines, group_lines, union_box
+from app.utils.timing import timed
 
 _easyocr_reader = None
 _easyocr_available = None  # None = not checked, True = available, False = unavailable
@@ -39,44 +48,6 @@ def is_easyocr_initializing():
     return _easyocr_initializing
 
 
-def _preprocess_image_for_ocr(image):
-    """Preprocess image to improve OCR accuracy"""
-    try:
-        import cv2
-        
-        # Convert PIL to numpy array if needed
-        if hasattr(image, 'size'):
-            img_array = np.array(image)
-        else:
-            img_array = image
-        
-        # Convert to grayscale if color
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
-        
-        # Apply denoising
-        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-        
-        # Enhance contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(denoised)
-        
-        # Apply sharpening
-        kernel = np.array([[-1, -1, -1],
-                          [-1,  9, -1],
-                          [-1, -1, -1]])
-        sharpened = cv2.filter2D(enhanced, -1, kernel)
-        
-        # Convert back to PIL Image
-        from PIL import Image
-        return Image.fromarray(sharpened)
-    except Exception as e:
-        print(f"Image preprocessing error: {e}, using original image")
-        return image
-
-
 def _clean_ocr_text(text: str) -> str:
     """Clean and filter OCR text to remove garbled characters and improve readability"""
     if not text:
@@ -187,6 +158,18 @@ def _ensure_easyocr_reader():
             _easyocr_initializing = False
 
 
+def warm_up_easyocr() -> None:
+    """Initialize the EasyOCR reader and run it once on a blank strip."""
+    reader = _ensure_easyocr_reader()
+    while reader is None:
+        # Another thread is already downloading/initializing the models
+        time.sleep(0.5)
+        reader = _ensure_easyocr_reader()
+    if reader is False:
+        raise RuntimeError("EasyOCR unavailable")
+    reader.readtext(np.full((32, 128), 255, dtype=np.uint8), detail=0)
+
+
 def _easyocr_text(image, min_confidence: float = 0.3) -> Optional[str]:
     """
     Returns:
@@ -234,45 +217,310 @@ def _easyocr_text(image, min_confidence: float = 0.3) -> Optional[str]:
         return None  # Return None only on actual error
 
 
-def analyze_screen_content(image_b64: str) -> Dict:
-    global _tesseract_warning_shown, _easyocr_initializing
+def _ocr_width(width: int) -> int:
+    """
+    Width screenshots are processed at: large images go down to 1280px,
+    medium ones (640-1280px) to 640px. Smaller images = faster OCR while
+    maintaining readability.
+    """
+    if width > 1280:
+        return 1280
+    if width > 640:
+        return 640
+    return width
+
+
+@lru_cache(maxsize=1)
+def _tile_store() -> TileTextStore:
+    return TileTextStore(
+        max_sessions=settings.screen_tile_max_sessions,
+        idle_seconds=settings.screen_tile_idle_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def _ocr_engine():
+    # auto (tesserocr if installed, else pytesseract) - see app/models/ocr_engines.py
+    return load_ocr_engine(settings.screen_ocr_engine)
+
+
+def warm_up_tesseract() -> None:
+    """Load the Tesseract backend and read one blank strip."""
+    engine = _ocr_engine()
+    if engine is None:
+        raise RuntimeError("Tesseract backend unavailable")
+    engine.recognize(np.full((32, 128), 255, dtype=np.uint8))
+
+
+def _recognize(image, single_line: bool = False) -> Tuple[Optional[str], str, Optional[Dict]]:
+    """
+    OCR one preprocessed image: Tesseract first, EasyOCR as the fallback.
+    `single_line` reads it as one text line (Tesseract --psm 7).
+    Returns (cleaned text, ocr_method, None), or (None, method, result) when
+    OCR is unavailable / still initializing and `result` should be returned
+    to the caller as is.
+    """
+    global _tesseract_warning_shown
+
+    # Try Tesseract first (faster than EasyOCR)
+    try:
+        engine = _ocr_engine()
+        if engine is None:
+            raise OcrEngineUnavailable("no Tesseract backend installed")
+        # Clean the text to remove garbled characters
+        return _clean_ocr_text(engine.recognize(image, single_line=single_line)), "tesseract", None
+    except OcrEngineUnavailable:
+        if not _tesseract_warning_shown:
+            print("Tesseract not found, using EasyOCR fallback...")
+            _tesseract_warning_shown = True
+        # First check if EasyOCR can be imported
+        if not _check_easyocr_available():
+            return None, "none", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": "OCR not available. Install Tesseract (see README) or run: pip install easyocr",
+            }
+        # Check if EasyOCR reader can be initialized
+        reader = _ensure_easyocr_reader()
+        if reader is None:
+            # Still initializing
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "initializing",
+                "note": "EasyOCR is initializing (first time may take 20-30 seconds). Please wait...",
+            }
+        if reader is False:
+            # EasyOCR failed to initialize
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": "EasyOCR failed to initialize. Check server logs. First run may take time to download models.",
+            }
+        # Try EasyOCR fallback
+        text = _easyocr_text(image)
+        if text is None:
+            # EasyOCR failed to read (error occurred)
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": "EasyOCR failed to process image. Check server logs for details.",
+            }
+        # text is a string (may be empty if no text found - that's OK)
+        return text, "easyocr", None
+    except Exception as ocr_err:
+        if not _tesseract_warning_shown:
+            print(f"Tesseract OCR error: {ocr_err}, using EasyOCR fallback...")
+            _tesseract_warning_shown = True
+        if not _check_easyocr_available():
+            return None, "none", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": f"OCR unavailable. Tesseract error: {str(ocr_err)[:100]}. Install EasyOCR: pip install easyocr",
+            }
+        reader = _ensure_easyocr_reader()
+        if reader is None:
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "initializing",
+                "note": "EasyOCR is initializing (first time may take 20-30 seconds). Please wait...",
+            }
+        if reader is False:
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": f"OCR unavailable. Tesseract error: {str(ocr_err)[:100]}. EasyOCR failed to initialize.",
+            }
+        text = _easyocr_text(image)
+        if text is None:
+            print(f"Both OCR methods failed. Tesseract error: {ocr_err}")
+            return None, "easyocr", {
+                "text": "",
+                "harmful_hits": [],
+                "status": "unavailable",
+                "note": f"OCR unavailable. Error: {str(ocr_err)[:100]}",
+            }
+        # text is a string (may be empty if no text found - that's OK)
+        return text, "easyocr", None
+
+
+@lru_cache(maxsize=1)
+def _ocr_pool() -> ThreadPoolExecutor:
+    # Tesseract runs outside the GIL (subprocess / native code), so crops are read concurrently
+    return ThreadPoolExecutor(max_workers=max(1, settings.screen_ocr_workers), thread_name_prefix="screen-ocr")
+
+
+def _ocr_calls_are_cheap() -> bool:
+    """False when every OCR call starts a tesseract process (pytesseract)."""
+    engine = _ocr_engine()
+    return engine is None or engine.persistent
+
+
+@dataclass
+class _CropJob:
+    image: np.ndarray
+    budget_ms: float
+    line_height: int  # height of the text lines in the crop (the crop itself for a single line)
+    single_line: bool
+
+
+@dataclass
+class _CropRead:
+    text: Optional[str]
+    method: str
+    failure: Optional[Dict]
+    tier: str
+    timings: Dict[str, float]
+
+
+def _read_region(job: _CropJob) -> _CropRead:
+    """
+    Preprocess and OCR one crop within its time budget. The preprocessing
+    tier comes from the crop's noise / contrast / stroke statistics (or
+    SCREEN_OCR_PREPROCESS); small or thin text is upscaled first.
+    """
+    import cv2
+
+    image = job.image
+    timings: Dict[str, float] = {}
+    with timed(timings, "stats"):
+        stats = image_stats(image)
+
+    scale = max(32 / max(job.line_height, 1), 2.0 if stats.stroke_width <= 2.5 else 1.0)
+    scale = min(3.0, scale)
+    pixels = int(image.size * scale * scale)
+    tier = settings.screen_ocr_preprocess
+    if tier not in PREPROCESS_TIERS:
+        tier = select_tier(stats, pixels, job.budget_ms)
+
+    with timed(timings, "preprocess"):
+        if scale > 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        image = preprocess(image, tier)
+    with timed(timings, "ocr"):
+        text, method, failure = _recognize(image, single_line=job.single_line)
+    return _CropRead(text, method, failure, tier, timings)
+
+
+def _ocr_tiles(
+    screenshot: np.ndarray, state: TileState, deadline: float, timings: Dict[str, float]
+) -> Tuple[Optional[Dict], str, Dict]:
+    """
+    Re-OCR the tiles of `state` whose pixels changed. With text-region
+    detection only the text lines inside those tiles are read (a line
+    belongs to the first tile containing its centre), in parallel on the
+    OCR pool; each crop gets an equal share of the time left before
+    `deadline`. An in-process engine reads every line on its own; when each
+    call starts a tesseract process, a tile's adjacent lines are read as
+    blocks, and the tile's lines as one region above
+    `screen_ocr_max_process_calls` blocks. Returns (failure result or None, ocr_method, counts of
+    tiles re-OCR'd, crops read and crops per preprocessing tier). A tile's
+    cache is only replaced once every crop in it was read successfully.
+    """
+    tiers = dict.fromkeys(PREPROCESS_TIERS, 0)
+    with timed(timings, "hash"):
+        dirty = state.dirty_tiles(screenshot)
+    if not dirty:
+        return None, "cached", {"ocr": 0, "regions_read": 0, "tiers": tiers}
+
+    with timed(timings, "detect"):
+        if settings.screen_text_regions_enabled:
+            owners: Dict[int, List[Rect]] = {}
+            for rect in detect_text_lines(screenshot, max_regions=settings.screen_text_max_regions):
+                center_x, center_y = rect[0] + rect[2] / 2, rect[1] + rect[3] / 2
+                for index, (x, y, w, h) in enumerate(state.rects):
+                    if x <= center_x < x + w and y <= center_y < y + h:
+                        owners.setdefault(index, []).append(rect)
+                        break
+            cheap = _ocr_calls_are_cheap()
+            jobs = []  # (tile index, crop box, text-line boxes in it)
+            for index, _ in dirty:
+                lines = owners.get(index, [])
+                if cheap:
+                    jobs.extend((index, rect, [rect]) for rect in lines)
+                    continue
+                blocks = group_lines(lines)
+                if len(blocks) > settings.screen_ocr_max_process_calls:
+                    blocks = [lines]
+                jobs.extend((index, union_box(block), block) for block in blocks)
+        else:
+            jobs = [(index, state.rects[index], []) for index, _ in dirty]
+
+    # Crops run `workers` at a time, so each may use workers/len(jobs) of the remaining time
+    workers = min(max(1, settings.screen_ocr_workers), max(1, len(jobs)))
+    budget_ms = max(0.0, deadline - time.perf_counter()) * 1000 * workers / max(1, len(jobs))
+    crops = [
+        _CropJob(
+            screenshot[y:y + h, x:x + w],
+            budget_ms,
+            line_height=min((line[3] for line in lines), default=h),
+            single_line=len(lines) == 1,
+        )
+        for _, (x, y, w, h), lines in jobs
+    ]
+    results = list(_ocr_pool().map(_read_region, crops)) if len(crops) > 1 else [_read_region(c) for c in crops]
+
+    counts = {"ocr": len(dirty), "regions_read": len(jobs), "tiers": tiers}
+    for result in results:
+        tiers[result.tier] += 1
+        for stage, elapsed in result.timings.items():
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 2)
+    ocr_method = next((result.method for result in results), "none")
+    for result in results:
+        if result.failure is not None:
+            return result.failure, result.method, counts
+
+    new_lines: Dict[int, List[Tuple[Rect, str]]] = {index: [] for index, _ in dirty}
+    for (index, rect, _), result in zip(jobs, results):
+        if result.text:
+            new_lines[index].append((rect, result.text))
+    for index, digest in dirty:
+        state.lines[index] = new_lines[index]
+        state.digests[index] = digest
+    return None, ocr_method, counts
+
+
+def analyze_screen_content(
+    image_b64: Union[str, bytes, memoryview],
+    session_id: Optional[str] = None,
+    budget_seconds: Optional[float] = None,
+) -> Dict:
+    """
+    With a session id, the screenshot is split into tiles and only tiles
+    that changed since the session's previous capture are OCR'd; the text
+    is stitched from the per-tile cache. `tiles` reports how many tiles
+    were re-OCR'd. Without one the whole screenshot is read as one tile.
+    Only detected text lines are OCR'd; `regions` and `harmful_regions`
+    carry their boxes in `image_size` (the OCR-width image) coordinates.
+    Each crop's preprocessing tier is picked to fit `budget_seconds`
+    (default `screen_ocr_budget_seconds`); `preprocess` counts crops per
+    tier and `timings_ms` has the per-stage time (crop stages summed over
+    crops, which run in parallel).
+    """
+    global _easyocr_initializing
+    started = time.perf_counter()
+    deadline = started + (settings.screen_ocr_budget_seconds if budget_seconds is None else budget_seconds)
+    timings: Dict[str, float] = {}
     try:
         if not image_b64:
             return {"text": "", "harmful_hits": [], "status": "no_frame"}
 
-        screenshot = decode_base64_screen(image_b64)
+        # Decoded straight to grayscale at the OCR width (see _ocr_width)
+        with timed(timings, "decode"):
+            screenshot = decode_base64_screen(image_b64, fit_width=_ocr_width, grayscale=True)
         if screenshot is None:
             return {"text": "", "harmful_hits": [], "status": "no_frame"}
         
-        # Validate and resize image dimensions for faster processing
-        try:
-            width, height = screenshot.size
-            if width == 0 or height == 0:
-                return {"text": "", "harmful_hits": [], "status": "error", "error": "Invalid image dimensions"}
-            
-            # Resize large images to speed up OCR (max 1280px width for faster processing)
-            # Smaller images = faster OCR while maintaining readability
-            if width > 1280:
-                scale = 1280 / width
-                new_width = 1280
-                new_height = int(height * scale)
-                from PIL import Image
-                screenshot = screenshot.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"Resized screen image from {width}x{height} to {new_width}x{new_height} for faster OCR")
-            elif width > 640 and width <= 1280:
-                # Medium size - resize to 640 for even faster processing
-                scale = 640 / width
-                new_width = 640
-                new_height = int(height * scale)
-                from PIL import Image
-                screenshot = screenshot.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"Resized screen image from {width}x{height} to {new_width}x{new_height} for faster OCR")
-            
-            # Preprocess image to improve OCR accuracy
-            screenshot = _preprocess_image_for_ocr(screenshot)
-        except Exception as e:
-            print(f"Image validation/resize error: {e}")
-            return {"text": "", "harmful_hits": [], "status": "error", "error": f"Image processing failed: {str(e)[:100]}"}
+        # Validate image dimensions
+        height, width = screenshot.shape[:2]
+        if width == 0 or height == 0:
+            return {"text": "", "harmful_hits": [], "status": "error", "error": "Invalid image dimensions"}
 
         # Quick check: if EasyOCR is initializing, return immediately to avoid blocking
         if _easyocr_initializing:
@@ -283,100 +531,38 @@ def analyze_screen_content(image_b64: str) -> Dict:
                 "note": "EasyOCR is initializing (first time may take 20-30 seconds). Please wait...",
             }
 
-        text = ""
-        ocr_method = "none"
-        
-        # Try Tesseract first (faster than EasyOCR)
-        try:
-            # Use optimized Tesseract config for better accuracy
-            # --psm 6: Uniform block of text (good for screen content)
-            # --oem 3: Default OCR Engine Mode (LSTM + Legacy)
-            text = pytesseract.image_to_string(
-                screenshot, 
-                config='--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,!?;:()[]{}\'"-+=@#$%&*'
+        if session_id and settings.screen_tiles_enabled:
+            rects = tile_grid(
+                width,
+                height,
+                settings.screen_tile_height,
+                settings.screen_tile_columns,
+                settings.screen_tile_overlap,
             )
-            # Clean the text to remove garbled characters
-            text = _clean_ocr_text(text)
-            ocr_method = "tesseract"
-        except TesseractNotFoundError:
-            if not _tesseract_warning_shown:
-                print("Tesseract not found, using EasyOCR fallback...")
-                _tesseract_warning_shown = True
-            # First check if EasyOCR can be imported
-            if not _check_easyocr_available():
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": "OCR not available. Install Tesseract (see README) or run: pip install easyocr",
-                }
-            # Check if EasyOCR reader can be initialized
-            reader = _ensure_easyocr_reader()
-            if reader is None:
-                # Still initializing
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "initializing",
-                    "note": "EasyOCR is initializing (first time may take 20-30 seconds). Please wait...",
-                }
-            if reader is False:
-                # EasyOCR failed to initialize
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": "EasyOCR failed to initialize. Check server logs. First run may take time to download models.",
-                }
-            # Try EasyOCR fallback
-            text = _easyocr_text(screenshot)
-            if text is None:
-                # EasyOCR failed to read (error occurred)
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": "EasyOCR failed to process image. Check server logs for details.",
-                }
-            # text is a string (may be empty if no text found - that's OK)
-            ocr_method = "easyocr"
-        except Exception as ocr_err:
-            if not _tesseract_warning_shown:
-                print(f"Tesseract OCR error: {ocr_err}, using EasyOCR fallback...")
-                _tesseract_warning_shown = True
-            if not _check_easyocr_available():
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": f"OCR unavailable. Tesseract error: {str(ocr_err)[:100]}. Install EasyOCR: pip install easyocr",
-                }
-            reader = _ensure_easyocr_reader()
-            if reader is None:
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "initializing",
-                    "note": "EasyOCR is initializing (first time may take 20-30 seconds). Please wait...",
-                }
-            if reader is False:
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": f"OCR unavailable. Tesseract error: {str(ocr_err)[:100]}. EasyOCR failed to initialize.",
-                }
-            text = _easyocr_text(screenshot)
-            if text is None:
-                print(f"Both OCR methods failed. Tesseract error: {ocr_err}")
-                return {
-                    "text": "",
-                    "harmful_hits": [],
-                    "status": "unavailable",
-                    "note": f"OCR unavailable. Error: {str(ocr_err)[:100]}",
-                }
-            # text is a string (may be empty if no text found - that's OK)
-            ocr_method = "easyocr"
+            state, lock = _tile_store().acquire(session_id)
+        else:
+            rects, state, lock = [(0, 0, width, height)], TileState(), Lock()
+
+        with lock:
+            if state.rects != rects:
+                state.reset(rects)
+            failure, ocr_method, counts = _ocr_tiles(screenshot, state, deadline, timings)
+            text, spans = stitch_lines(state.lines, state.rects)
+            regions = [{"box": list(rect), "text": line} for tile in state.lines for rect, line in tile]
+        tiles = {
+            "total": len(rects),
+            "ocr": counts["ocr"],
+            "reused": len(rects) - counts["ocr"],
+            "regions_read": counts["regions_read"],
+        }
+        selector = settings.screen_ocr_preprocess if settings.screen_ocr_preprocess in PREPROCESS_TIERS else "auto"
+        diagnostics = {
+            "tiles": tiles,
+            "preprocess": {"selector": selector, "tiers": counts["tiers"]},
+            "timings_ms": {**timings, "total": round((time.perf_counter() - started) * 1000, 2)},
+        }
+        if failure is not None:
+            return {**failure, **diagnostics}
 
         # Only return text if it's meaningful (not just garbled characters)
         if text and len(text.strip()) > 0:
@@ -393,18 +579,73 @@ def analyze_screen_content(image_b64: str) -> Dict:
         else:
             status = "no_text"
         
-        harmful_hits: List[str] = [
-            keyword for keyword in settings.harmful_keywords if keyword.lower() in text.lower()
-        ] if text else []
+        hits = harmful_matcher().find_all(text) if text else []
+        harmful_hits: List[str] = harmful_matcher().matches(text) if hits else []
 
         return {
             "text": text if text else "",
             "harmful_hits": harmful_hits,
+            "harmful_regions": locate_hits(hits, spans),
+            "regions": regions,
+            "image_size": [width, height],
             "status": status,
             "ocr_method": ocr_method,
+            **diagnostics,
         }
     except Exception as e:
         print(f"Screen OCR analysis error: {e}")
         import traceback
         traceback.print_exc()
         return {"text": "", "harmful_hits": [], "status": "error", "error": str(e)}
+
+
+def _screen_job(job: Tuple[Union[str, bytes], str]) -> Dict:
+    result = analyze_screen_content(*job)
+    if result.get("status") == "error":
+        # Raised so the queue keeps the session's last good result
+        raise RuntimeError(result.get("error") or "screen OCR failed")
+    return result
+
+
+@lru_cache(maxsize=1)
+def _screen_jobs() -> LatestJobQueue:
+    return LatestJobQueue(
+        _screen_job,
+        workers=settings.screen_job_workers,
+        max_pending=settings.screen_job_queue_size,
+        max_results=settings.screen_tile_max_sessions,
+        idle_seconds=settings.screen_tile_idle_seconds,
+        name="screen-jobs",
+    )
+
+
+def submit_screen_ocr(image_b64: Union[str, bytes, memoryview], session_id: str) -> Dict:
+    """
+    Queue the screenshot for background OCR and return the session's
+    freshest completed result without waiting. A newer screenshot replaces
+    the session's queued one. `job` reports the result's age and whether a
+    newer capture is still being read, and `error` when the session's
+    latest capture failed (the previous result is kept). Before the first
+    result completes the status is "pending", or "error" if it failed.
+    """
+    jobs = _screen_jobs()
+    if isinstance(image_b64, memoryview):
+        image_b64 = bytes(image_b64)  # the request body is released once the response is sent
+    queued = jobs.submit(session_id, (image_b64, session_id))
+    latest = jobs.latest(session_id)
+    job = {"queued": queued, "pending": jobs.is_pending(session_id)}
+    error = jobs.last_error(session_id)
+    if error is not None:
+        job["error"] = error
+    if latest is None:
+        if error is not None:
+            return {"text": "", "harmful_hits": [], "status": "error", "error": error, "job": job}
+        note = "Screen analysis running in background..." if queued else "Screen analysis queue is full, retrying next cycle."
+        return {"text": "", "harmful_hits": [], "status": "pending" if queued else "busy", "note": note, "job": job}
+    job["age_seconds"] = round(time.monotonic() - latest.submitted_at, 2)
+    job["duration_seconds"] = round(latest.duration_seconds, 3)
+    return {**latest.result, "job": job}
+
+
+def screen_job_stats() -> Dict:
+    return _screen_jobs().stats()
@@ -0,0 +1,162 @@
+import time
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional, Sequence
+
+from app.config import settings
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+SENTIMENT_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_ONNX_FILE = "model.onnx"
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+PARITY_SAMPLES = (
+    "I feel great today and I'm excited about the weekend.",
+    "Nothing is going right and I'm exhausted.",
+    "I guess the meeting was fine, nothing special.",
+    "I can't stop worrying about everything that could go wrong.",
+    "Thank you so much, this really helped me calm down.",
+    "I feel worthless and alone lately.",
+    "The weather is cloudy.",
+    "Journaling every night has made me feel more grounded.",
+)
+
+
+def _export_dir() -> Path:
+    return Path(settings.storage_dir) / "onnx" / MODEL_NAME
+
+
+def _ensure_onnx_export(quantized: bool) -> Path:
+    """Export (and optionally int8-quantize) the model once; later loads reuse the files."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    export_dir = _export_dir()
+    if not (export_dir / _ONNX_FILE).exists():
+        print(f"Exporting {MODEL_NAME} to ONNX (one-time) in {export_dir}...")
+        export_dir.mkdir(parents=True, exist_ok=True)
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(MODEL_NAME).save_pretrained(export_dir)
+
+    if quantized and not (export_dir / _QUANTIZED_FILE).exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("Quantizing ONNX sentiment model to int8 (dynamic quantization)...")
+        quantize_dynamic(
+            str(export_dir / _ONNX_FILE),
+            str(export_dir / _QUANTIZED_FILE),
+            weight_type=QuantType.QInt8,
+        )
+    return export_dir
+
+
+def load_sentiment_pipeline(backend: str, fallback: bool = True):
+    """
+    Build the sentiment-analysis pipeline for `backend`. ONNX backends keep the
+    regular transformers pipeline interface (tokenizer, batching, truncation);
+    if optimum/onnxruntime are missing we fall back to PyTorch unless
+    `fallback` is False.
+    """
+    from transformers import pipeline
+
+    if backend not in SENTIMENT_BACKENDS:
+        print(f"Warning: unknown sentiment backend '{backend}', using torch")
+        backend = "torch"
+
+    if backend != "torch":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            from transformers import AutoTokenizer
+
+            quantized = backend == "onnx-int8"
+            export_dir = _ensure_onnx_export(quantized)
+            model = ORTModelForSequenceClassification.from_pretrained(
+                export_dir, file_name=_QUANTIZED_FILE if quantized else _ONNX_FILE
+            )
+            tokenizer = AutoTokenizer.from_pretrained(export_dir)
+            return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+        except ImportError as e:
+            if not fallback:
+                raise
+            print(f"Warning: ONNX backend needs `pip install optimum[onnxruntime]` ({e}); using torch")
+        except Exception as e:
+            if not fallback:
+                raise
+            print(f"Warning: could not load {backend} sentiment backend: {e}; using torch")
+
+    return pipeline("sentiment-analysis", model=MODEL_NAME)
+
+
+def check_backend_parity(
+    backend: str,
+    texts: Optional[Sequence[str]] = None,
+    score_tolerance: float = 0.05,
+) -> Dict:
+    """Compare `backend` against the PyTorch pipeline: labels must agree and scores stay within tolerance."""
+    texts = list(texts or PARITY_SAMPLES)
+    reference = load_sentiment_pipeline("torch")(texts, batch_size=len(texts), truncation=True)
+    candidate = load_sentiment_pipeline(backend, fallback=False)(texts, batch_size=len(texts), truncation=True)
+
+    mismatches: List[Dict] = []
+    label_matches = 0
+    max_score_diff = 0.0
+    for text, expected, actual in zip(texts, reference, candidate):
+        label_matches += expected["label"] == actual["label"]
+        score_diff = abs(float(expected["score"]) - float(actual["score"]))
+        max_score_diff = max(max_score_diff, score_diff)
+        if expected["label"] != actual["label"] or score_diff > score_tolerance:
+            mismatches.append(
+                {
+                    "text": text,
+                    "expected": expected,
+                    "actual": actual,
+                    "score_diff": round(score_diff, 4),
+                }
+            )
+
+    return {
+        "backend": backend,
+        "samples": len(texts),
+        "label_agreement": round(label_matches / len(texts), 4),
+        "max_score_diff": round(max_score_diff, 4),
+        "score_tolerance": score_tolerance,
+        "passed": not mismatches,
+        "mismatches": mismatches,
+    }
+
+
+def benchmark_backends(
+    backends: Sequence[str] = SENTIMENT_BACKENDS,
+    texts: Optional[Sequence[str]] = None,
+    repeats: int = 20,
+) -> List[Dict]:
+    """Median single-text and batched latency for each backend (load time reported separately)."""
+    texts = list(texts or PARITY_SAMPLES)
+    report = []
+    for backend in backends:
+        started = time.perf_counter()
+        model = load_sentiment_pipeline(backend, fallback=False)
+        load_seconds = time.perf_counter() - started
+        model(texts[0])  # warm-up
+
+        single, batched = [], []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model(texts[0])
+            single.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            model(texts, batch_size=len(texts), truncation=True)
+            batched.append(time.perf_counter() - started)
+
+        report.append(
+            {
+                "backend": backend,
+                "load_seconds": round(load_seconds, 3),
+                "single_ms": round(median(single) * 1000, 2),
+                "batch_ms": round(median(batched) * 1000, 2),
+                "batch_size": len(texts),
+            }
+        )
+    return report
@@ -1,14 +1,37 @@
+import atexit
+import time
 from dataclasses import dataclass
-from typing import Dict
+from functools import lru_cache
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Sequence
 
-import librosa
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 
+from app.config import settings
+from app.utils.audio_stream import AudioStreamStore
 from app.utils.microphone import DEFAULT_SR
+from app.utils.online_stats import OnlineNormalizer
+from app.utils.prosody import extract_prosody
+from app.utils.vad import detect_voice
 
+DEFAULT_SESSION = "default"
 
-scaler = StandardScaler()
+
+@lru_cache(maxsize=1)
+def _normalizer() -> OnlineNormalizer:
+    # Running (energy, pitch, tempo) baselines per session/speaker
+    normalizer = OnlineNormalizer(
+        dims=3,
+        max_sessions=settings.speech_norm_max_sessions,
+        min_samples=settings.speech_norm_min_samples,
+        snapshot_path=settings.storage_dir / "speech_baselines.json",
+        snapshot_interval=settings.speech_norm_snapshot_seconds,
+        idle_seconds=settings.speech_norm_idle_seconds,
+        # Sessions keyed by client address (no session id sent) are never written to disk
+        ephemeral_prefix=settings.anonymous_session_prefix,
+    )
+    atexit.register(normalizer.snapshot)
+    return normalizer
 
 
 @dataclass
@@ -17,20 +40,31 @@ class SpeechEmotionResult:
     energy: float
     pitch: float
     tempo: float
+    baseline: str = "none"
+    baseline_samples: int = 0
+    vad: Optional[Dict] = None
 
     def to_dict(self):
-        return {
+        result = {
             "emotion": self.emotion,
             "energy": self.energy,
             "pitch": self.pitch,
             "tempo": self.tempo,
+            "baseline": self.baseline,
+            "baseline_samples": self.baseline_samples,
         }
+        if self.vad is not None:
+            result["vad"] = self.vad
+        return result
 
 
-def _extract_features(signal: np.ndarray, sr: int = DEFAULT_SR):
+def _extract_features_librosa(signal: np.ndarray, sr: int = DEFAULT_SR):
+    """Reference implementation; each librosa call computes its own spectrogram."""
     if not len(signal):
         return 0.0, 0.0, 0.0
 
+    import librosa
+
     energy = float(np.mean(signal**2))
     pitches, magnitudes = librosa.piptrack(y=signal, sr=sr)
     pitch = float(np.max(pitches[magnitudes > np.median(magnitudes)])) if np.any(magnitudes) else 0.0
@@ -45,10 +79,154 @@ def _extract_features(signal: np.ndarray, sr: int = DEFAULT_SR):
     return energy, pitch, tempo
 
 
-def analyze_speech_emotion(signal: np.ndarray, sr: int = DEFAULT_SR) -> Dict:
-    energy, pitch, tempo = _extract_features(signal, sr)
-    features = np.array([[energy, pitch, tempo]])
-    scaled = scaler.fit_transform(features)[0]
+def _extract_features(signal: np.ndarray, sr: int = DEFAULT_SR):
+    if settings.speech_feature_engine == "librosa":
+        return _extract_features_librosa(signal, sr)
+    return extract_prosody(signal, sr)
+
+
+def _synthetic_clips(seconds: float = 3.0, sr: int = DEFAULT_SR, count: int = 4) -> List[np.ndarray]:
+    """Voiced-like test clips: gated tones at different pitches/rates plus noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr), dtype=np.float32) / sr
+    clips = []
+    for index in range(count):
+        gate = np.sin(2 * np.pi * (1.5 + 0.7 * index) * t) > 0
+        tone = 0.3 * np.sin(2 * np.pi * (180 + 60 * index) * t) * gate
+        clips.append((tone + 0.02 * rng.standard_normal(t.size)).astype(np.float32))
+    return clips
+
+
+def check_feature_parity(
+    clips: Optional[Sequence[np.ndarray]] = None,
+    sr: int = DEFAULT_SR,
+    rel_tolerance: float = 0.01,
+) -> Dict:
+    """Compare the NumPy prosody engine against the librosa reference."""
+    clips = list(clips) if clips is not None else _synthetic_clips(sr=sr)
+    mismatches = []
+    for index, clip in enumerate(clips):
+        expected = _extract_features_librosa(clip, sr)
+        actual = extract_prosody(clip, sr)
+        for name, ref, got in zip(("energy", "pitch", "tempo"), expected, actual):
+            if abs(ref - got) > rel_tolerance * max(abs(ref), 1e-9):
+                mismatches.append({"clip": index, "feature": name, "librosa": ref, "numpy": got})
+    return {
+        "clips": len(clips),
+        "rel_tolerance": rel_tolerance,
+        "passed": not mismatches,
+        "mismatches": mismatches,
+    }
+
+
+def benchmark_feature_engines(seconds: float = 5.0, sr: int = DEFAULT_SR, repeats: int = 10) -> List[Dict]:
+    """Median extraction time per engine, normalized per second of audio."""
+    clip = _synthetic_clips(seconds=seconds, sr=sr, count=1)[0]
+    report = []
+    for name, extractor in (("librosa", _extract_features_librosa), ("numpy", extract_prosody)):
+        started = time.perf_counter()
+        extractor(clip, sr)  # first call includes librosa's numba JIT compile
+        first_call = time.perf_counter() - started
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            extractor(clip, sr)
+            timings.append(time.perf_counter() - started)
+        report.append(
+            {
+                "engine": name,
+                "first_call_ms": round(first_call * 1000, 2),
+                "median_ms": round(median(timings) * 1000, 2),
+                "ms_per_audio_second": round(median(timings) * 1000 / seconds, 3),
+            }
+        )
+    return report
+
+
+@lru_cache(maxsize=1)
+def _stream_store() -> AudioStreamStore:
+    return AudioStreamStore(
+        sr=DEFAULT_SR,
+        window_seconds=settings.audio_stream_window_seconds,
+        max_sessions=settings.audio_stream_max_sessions,
+        idle_seconds=settings.audio_stream_idle_seconds,
+    )
+
+
+def analyze_speech_emotion(signal: np.ndarray, sr: int = DEFAULT_SR, session_id: Optional[str] = None) -> Dict:
+    if not settings.speech_vad_enabled:
+        energy, pitch, tempo = _extract_features(signal, sr)
+        return _classify_features(energy, pitch, tempo, session_id)
+
+    # Only voiced regions reach the feature pipeline; silent clips skip it entirely
+    activity = detect_voice(
+        signal,
+        sr,
+        frame_ms=settings.speech_vad_frame_ms,
+        margin_db=settings.speech_vad_margin_db,
+        floor_db=settings.speech_vad_floor_db,
+        max_zcr=settings.speech_vad_max_zcr,
+        min_speech_seconds=settings.speech_vad_min_speech_seconds,
+    )
+    if not activity.has_speech:
+        return SpeechEmotionResult(
+            emotion="no_speech", energy=0.0, pitch=0.0, tempo=0.0, vad=activity.to_dict()
+        ).to_dict()
+
+    energy, pitch, tempo = _extract_features(activity.voiced, sr)
+    result = _classify_features(energy, pitch, tempo, session_id)
+    result["vad"] = activity.to_dict()
+    return result
+
+
+def push_speech_stream(session_id: str, chunks: Iterable[np.ndarray], sr: int = DEFAULT_SR) -> Dict:
+    """
+    Append PCM chunks (mono float32 at `sr`) to the session's ring buffer
+    and return the emotion for the current window. Only the new audio is
+    transformed; older frames are reused from the stream state. Other rates
+    are resampled to DEFAULT_SR by the stream's own resampler.
+    """
+    stream, lock = _stream_store().acquire(session_id)
+    with lock:
+        for chunk in chunks:
+            stream.push(chunk, sr)
+        energy, pitch, tempo = stream.features()
+        status = stream.status()
+        # Fold into the voice baseline once per full window, not on every push
+        update_baseline = stream.total_samples - stream.baseline_mark >= stream.ring.capacity
+        if update_baseline:
+            stream.baseline_mark = stream.total_samples
+    result = _classify_features(energy, pitch, tempo, session_id, update_baseline=update_baseline)
+    result["stream"] = status
+    return result
+
+
+def speech_stream_snapshot(session_id: str) -> Optional[Dict]:
+    """Emotion for the audio currently buffered for `session_id`, or None if no stream exists."""
+    acquired = _stream_store().acquire(session_id, create=False)
+    if acquired is None:
+        return None
+    stream, lock = acquired
+    with lock:
+        energy, pitch, tempo = stream.features()
+        status = stream.status()
+    result = _classify_features(energy, pitch, tempo, session_id, update_baseline=False)
+    result["stream"] = status
+    return result
+
+
+def reset_speech_stream(session_id: str) -> None:
+    _stream_store().reset(session_id)
+
+
+def _classify_features(
+    energy: float, pitch: float, tempo: float, session_id: Optional[str], update_baseline: bool = True
+) -> Dict:
+    # Compare against this speaker's running statistics (global ones until enough clips)
+    normalized = _normalizer().score_and_update(
+        session_id or DEFAULT_SESSION, (energy, pitch, tempo), update=update_baseline
+    )
+    scaled = normalized["zscores"]
 
     emotion = "calm"
     if scaled[0] > 0.5 or scaled[2] > 0.5:
@@ -58,4 +236,11 @@ def analyze_speech_emotion(signal: np.ndarray, sr: int = DEFAULT_SR) -> Dict:
     if scaled[2] > 1.2:
         emotion = "anxious"
 
-    return SpeechEmotionResult(emotion=emotion, energy=energy, pitch=pitch, tempo=tempo).to_dict()
+    return SpeechEmotionResult(
+        emotion=emotion,
+        energy=energy,
+        pitch=pitch,
+        tempo=tempo,
+        baseline=normalized["baseline"],
+        baseline_samples=normalized["baseline_samples"],
+    ).to_dict()
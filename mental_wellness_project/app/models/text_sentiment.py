@@ -1,48 +1,200 @@
+import copy
 from functools import lru_cache
-from typing import Dict
-
-from transformers import pipeline
+from typing import Dict, List, Tuple
 
 from app.config import settings
+from app.models.sentiment_backends import load_sentiment_pipeline
+from app.utils.batching import MicroBatcher
+from app.utils.keyword_matcher import calm_matcher, harmful_matcher
+from app.utils.result_cache import TTLCache, content_key
 
 
 @lru_cache(maxsize=1)
 def _sentiment_model():
-    return pipeline(
-        "sentiment-analysis",
-        model="distilbert-base-uncased-finetuned-sst-2-english",
+    # torch (default), onnx or onnx-int8 - see app/models/sentiment_backends.py
+    return load_sentiment_pipeline(settings.sentiment_backend)
+
+
+def _run_sentiment_batch(texts: List[str]) -> List[Dict]:
+    """Run one padded forward pass over every queued text."""
+    return _sentiment_model()(texts, batch_size=len(texts), truncation=True)
+
+
+@lru_cache(maxsize=1)
+def _sentiment_batcher() -> MicroBatcher:
+    # Concurrent /text, /monitor and screen-OCR calls share DistilBERT batches
+    return MicroBatcher(
+        _run_sentiment_batch,
+        max_batch_size=settings.sentiment_max_batch_size,
+        max_wait_ms=settings.sentiment_max_wait_ms,
+        name="sentiment-batcher",
     )
 
 
-def analyze_text_sentiment(text: str) -> Dict:
-    if not text.strip():
-        return {
-            "label": "NEUTRAL",
-            "score": 0.0,
-            "mood": "neutral",
-            "insights": ["Share a bit more so I can understand how you feel."],
+def _chunk_spans(text: str) -> List[Tuple[int, int, int]]:
+    """
+    Split text into overlapping token windows that fit the model.
+    Returns (start_char, end_char, token_count) for every window.
+    """
+    tokenizer = _sentiment_model().tokenizer
+    window = min(tokenizer.model_max_length, 512) - tokenizer.num_special_tokens_to_add()
+    overlap = min(settings.sentiment_chunk_overlap_tokens, window // 2)
+
+    encoding = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )
+    offsets = encoding["offset_mapping"]
+    if len(offsets) <= window:
+        return [(0, len(text), len(offsets))]
+
+    spans = []
+    step = window - overlap
+    for start in range(0, len(offsets), step):
+        end = min(start + window, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1], end - start))
+        if end == len(offsets) or len(spans) >= settings.sentiment_max_chunks:
+            break
+    return spans
+
+
+def _aggregate_chunks(predictions: List[Dict], spans: List[Tuple[int, int, int]]) -> Dict:
+    """Token-weighted average of the positive probability across windows."""
+    if len(predictions) == 1:
+        return predictions[0]
+
+    total_weight = 0.0
+    positive = 0.0
+    for prediction, (_, _, tokens) in zip(predictions, spans):
+        score = float(prediction["score"])
+        weight = float(max(tokens, 1))
+        positive += weight * (score if prediction["label"].upper() == "POSITIVE" else 1.0 - score)
+        total_weight += weight
+    positive /= total_weight
+
+    if positive >= 0.5:
+        return {"label": "POSITIVE", "score": positive}
+    return {"label": "NEGATIVE", "score": 1.0 - positive}
+
+
+def _chunk_details(predictions: List[Dict], spans: List[Tuple[int, int, int]]) -> List[Dict]:
+    return [
+        {
+            "start": start,
+            "end": end,
+            "tokens": tokens,
+            "label": prediction["label"],
+            "score": float(prediction["score"]),
         }
+        for prediction, (start, end, tokens) in zip(predictions, spans)
+    ]
 
-    result = _sentiment_model()(text[:512])[0]
-    label = result["label"]
-    score = float(result["score"])
+
+def _score_texts(texts: List[str], include_chunks: bool = False) -> List[Dict]:
+    """
+    Chunk every text, score all windows together through the batcher and
+    fold them back into one prediction per text.
+    """
+    spans_per_text = [_chunk_spans(text) for text in texts]
+    windows = [
+        text[start:end] for text, spans in zip(texts, spans_per_text) for start, end, _ in spans
+    ]
+    window_predictions = _sentiment_batcher().submit_many(windows)
+
+    predictions = []
+    offset = 0
+    for spans in spans_per_text:
+        chunk_predictions = window_predictions[offset : offset + len(spans)]
+        offset += len(spans)
+        prediction = dict(_aggregate_chunks(chunk_predictions, spans))
+        if include_chunks:
+            prediction["chunks"] = _chunk_details(chunk_predictions, spans)
+        predictions.append(prediction)
+    return predictions
+
+
+@lru_cache(maxsize=1)
+def _sentiment_cache() -> TTLCache:
+    return TTLCache(
+        max_entries=settings.text_cache_max_entries,
+        ttl_seconds=settings.text_cache_ttl_seconds,
+    )
+
+
+def text_cache_stats() -> Dict:
+    """Hit/miss counters for the sentiment result cache."""
+    return _sentiment_cache().stats()
+
+
+def _empty_text_result() -> Dict:
+    return {
+        "label": "NEUTRAL",
+        "score": 0.0,
+        "mood": "neutral",
+        "insights": ["Share a bit more so I can understand how you feel."],
+    }
+
+
+def _build_text_result(text: str, prediction: Dict) -> Dict:
+    label = prediction["label"]
+    score = float(prediction["score"])
 
     if label.lower() == "positive":
         mood = "calm" if score > 0.8 else "positive"
     else:
         mood = "stressed" if score > 0.8 else "sad"
 
-    harmful_hits = [
-        keyword for keyword in settings.harmful_keywords if keyword.lower() in text.lower()
-    ]
+    harmful_hits = harmful_matcher().matches(text)
 
-    return {
+    result = {
         "label": label,
         "score": score,
         "mood": mood,
         "harmful_hits": harmful_hits,
+        "calm_hits": calm_matcher().matches(text),
         "insights": _text_insights(text, mood, harmful_hits),
     }
+    if "chunks" in prediction:
+        result["chunks"] = prediction["chunks"]
+    return result
+
+
+def analyze_text_sentiment(text: str, include_chunks: bool = False) -> Dict:
+    return analyze_text_sentiment_batch([text], include_chunks)[0]
+
+
+def analyze_text_sentiment_batch(texts: List[str], include_chunks: bool = False) -> List[Dict]:
+    """Analyze several texts at once; results match `analyze_text_sentiment` per item."""
+    results: List[Dict] = [_empty_text_result() for _ in texts]
+    cache = _sentiment_cache()
+
+    # Screen OCR text barely changes between monitor cycles, so most calls hit here
+    pending: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        if not text.strip():
+            continue
+        key = content_key(text, include_chunks)
+        cached = cache.get(key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.setdefault(key, []).append(index)
+    if not pending:
+        return results
+
+    keys = list(pending)
+    first_indices = [pending[key][0] for key in keys]
+    predictions = _score_texts([texts[index] for index in first_indices], include_chunks)
+    for key, index, prediction in zip(keys, first_indices, predictions):
+        result = _build_text_result(texts[index], prediction)
+        cache.put(key, result)
+        for duplicate in pending[key]:
+            results[duplicate] = copy.deepcopy(result) if duplicate != index else result
+    return results
+
+
+def warm_up() -> None:
+    """Load the sentiment pipeline and push one dummy text through it."""
+    _run_sentiment_batch(["Warming up the sentiment model."])
 
 
 def _text_insights(text: str, mood: str, harmful_hits):
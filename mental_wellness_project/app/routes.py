@@ -1,27 +1,84 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from flask import Blueprint, jsonify, request
-from openai import OpenAI, OpenAIError
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from app.config import settings
 from app.database import log_alert, log_interaction
 from app.models.behavior_synthesis import ModuleSnapshot, synthesize
-from app.models.facial_expression import analyze_facial_expression
-from app.models.screen_ocr import analyze_screen_content
-from app.models.speech_emotion import analyze_speech_emotion
-from app.models.text_sentiment import analyze_text_sentiment
-from app.utils.microphone import decode_base64_audio
-import time
+from app.models.facial_expression import analyze_facial_expression, face_cache_stats
+from app.models.screen_ocr import analyze_screen_content, screen_job_stats, submit_screen_ocr
+from app.models.speech_emotion import (
+    analyze_speech_emotion,
+    push_speech_stream,
+    reset_speech_stream,
+    speech_stream_snapshot,
+)
+from app.models.text_sentiment import (
+    analyze_text_sentiment,
+    analyze_text_sentiment_batch,
+    text_cache_stats,
+)
+from app.utils.microphone import DEFAULT_SR, PCM_FORMATS, decode_base64_audio, decode_pcm_chunk
+from app.utils.uploads import UploadTooLarge, is_multipart, is_raw_media, read_multipart, read_raw_body
+from app.warmup import readiness
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 main = Blueprint("main", __name__, url_prefix="/api/v1")
 
-# Screen OCR throttling - only process every 20 seconds to prevent system overload (reduced from 30 for better responsiveness)
-_last_screen_ocr_time = 0
-_SCREEN_OCR_INTERVAL = 10  # seconds between screen OCR processing (optimized for faster updates)
 
+def _session_id(payload: dict) -> str:
+    """
+    Identify the monitoring session so per-user state (baselines, caches) stays
+    separate. Without a client-supplied id the client address is used, under
+    `settings.anonymous_session_prefix` so that state is kept in memory only.
+    """
+    explicit = payload.get("session_id") or request.headers.get("X-Session-Id")
+    if explicit:
+        return str(explicit)
+    return f"{settings.anonymous_session_prefix}{request.remote_addr or 'unknown'}"
+
+
+def _media_limits():
+    return {
+        "frame": settings.upload_max_frame_bytes,
+        "screen": settings.upload_max_screen_bytes,
+        "audio": settings.upload_max_audio_bytes,
+    }
+
+
+def _media_payload(raw_field: Optional[str] = None, limit: Optional[str] = None) -> dict:
+    """
+    Request payload as a dict for JSON (base64 data URLs), multipart/form-data
+    or, when `raw_field` is given, a raw image/audio body. Binary media fields
+    hold memoryviews that the decoders consume without a base64 round trip;
+    other parameters come from form fields or the query string.
+    `limit` names the size cap for `raw_field` when it differs from the field
+    name (a /screen "frame" is a screenshot).
+    Raises UploadTooLarge when a part or body exceeds its cap.
+    """
+    limits = _media_limits()
+    if raw_field and limit:
+        limits[raw_field] = limits[limit]
+    if is_multipart(request):
+        payload = read_multipart(request, limits)
+    elif raw_field and is_raw_media(request):
+        payload = request.args.to_dict()
+        payload[raw_field] = read_raw_body(request, limits[raw_field], raw_field)
+        return payload
+    else:
+        return request.get_json(force=True) or {}
+    for key, value in request.args.items():
+        payload.setdefault(key, value)
+    return payload
 
-def _openai_client() -> Optional[OpenAI]:
+
+def _openai_client() -> Optional["OpenAI"]:
     """Initialize OpenAI client if API key is available."""
+    from openai import OpenAI
+
     api_key = settings.openai_api_key
     if not api_key or api_key == "replace_with_openai_api_key" or api_key.strip() == "":
         print("⚠️ OpenAI API key not configured. Wellness Companion will not work.")
@@ -37,43 +94,129 @@ def _openai_client() -> Optional[OpenAI]:
 def text_analysis():
     payload = request.get_json(force=True)
     text = payload.get("text", "")
-    result = analyze_text_sentiment(text)
+    result = analyze_text_sentiment(text, include_chunks=bool(payload.get("chunks")))
     log_interaction("text", {"text": text, "result": result})
     return jsonify(result)
 
 
+@main.route("/text/batch", methods=["POST"])
+def text_batch_analysis():
+    payload = request.get_json(force=True) or {}
+    texts = payload.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "texts field must be a list of strings"}), 400
+    if len(texts) > settings.text_batch_max_items:
+        return jsonify({"error": f"at most {settings.text_batch_max_items} texts per request"}), 400
+    results = analyze_text_sentiment_batch(texts, include_chunks=bool(payload.get("chunks")))
+    log_interaction("text_batch", {"texts": texts, "results": results})
+    return jsonify({"results": results})
+
+
+@main.route("/ready", methods=["GET"])
+def ready():
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@main.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"text_sentiment": text_cache_stats(), "face": face_cache_stats(), "screen_jobs": screen_job_stats()})
+
+
+@main.errorhandler(UploadTooLarge)
+def upload_too_large(error):
+    return jsonify({"error": str(error)}), 413
+
+
 @main.route("/audio", methods=["POST"])
 def audio_analysis():
-    payload = request.get_json(force=True)
+    payload = _media_payload(raw_field="audio")
     audio_b64 = payload.get("audio")
     if not audio_b64:
         return jsonify({"error": "audio field required"}), 400
     signal, sr = decode_base64_audio(audio_b64)
     if signal.size == 0:
         return jsonify({"warning": "Unable to decode audio blob; try using a different browser."}), 400
-    result = analyze_speech_emotion(signal, sr)
+    result = analyze_speech_emotion(signal, sr, session_id=_session_id(payload))
     log_interaction("audio", {"result": result})
     return jsonify(result)
 
 
+@main.route("/audio/stream", methods=["POST"])
+def audio_stream_push():
+    """
+    Streaming speech ingestion: the body is raw mono PCM (`format=s16le` or
+    `f32le`, sample rate `sr`), optionally sent with chunked transfer encoding.
+    Chunks are fed into the session's ring buffer as they are read.
+    """
+    session_id = _session_id(request.args)
+    sample_format = request.args.get("format", "s16le")
+    sr = request.args.get("sr", DEFAULT_SR, type=int)
+    if sample_format not in PCM_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(PCM_FORMATS)}"}), 400
+    if not sr or sr <= 0:
+        return jsonify({"error": "sr must be a positive sample rate"}), 400
+    if (request.content_length or 0) > settings.audio_stream_max_request_bytes:
+        return jsonify({"error": "audio stream request too large"}), 413
+
+    sample_width = PCM_FORMATS[sample_format][0].itemsize
+    too_large = False
+
+    def chunks():
+        nonlocal too_large
+        received = 0
+        remainder = b""
+        while True:
+            block = request.stream.read(64 * 1024)
+            if not block:
+                break
+            received += len(block)
+            if received > settings.audio_stream_max_request_bytes:
+                too_large = True
+                break
+            block = remainder + block
+            usable = len(block) - len(block) % sample_width
+            remainder = block[usable:]
+            if usable:
+                # Resampled by the session's stream so block boundaries leave no filter seams
+                yield decode_pcm_chunk(block[:usable], sample_format, sr, sr)
+
+    result = push_speech_stream(session_id, chunks(), sr)
+    if too_large:
+        result["warning"] = "request exceeded the stream size limit; remaining audio was ignored"
+    return jsonify(result)
+
+
+@main.route("/audio/stream", methods=["GET", "DELETE"])
+def audio_stream_state():
+    session_id = _session_id(request.args)
+    if request.method == "DELETE":
+        reset_speech_stream(session_id)
+        return jsonify({"status": "reset"})
+    result = speech_stream_snapshot(session_id)
+    if result is None:
+        return jsonify({"error": "no audio stream for this session"}), 404
+    return jsonify(result)
+
+
 @main.route("/vision", methods=["POST"])
 def vision_analysis():
-    payload = request.get_json(force=True)
+    payload = _media_payload(raw_field="frame")
     frame = payload.get("frame")
     if not frame:
         return jsonify({"error": "frame field required"}), 400
-    result = analyze_facial_expression(frame)
+    result = analyze_facial_expression(frame, session_id=_session_id(payload))
     log_interaction("vision", {"result": result})
     return jsonify(result)
 
 
 @main.route("/screen", methods=["POST"])
 def screen_analysis():
-    payload = request.get_json(force=True)
+    payload = _media_payload(raw_field="frame", limit="screen")
     frame = payload.get("frame")
     if not frame:
         return jsonify({"error": "frame field required"}), 400
-    result = analyze_screen_content(frame)
+    result = analyze_screen_content(frame, session_id=_session_id(payload))
     log_interaction("screen", {"result": result})
     if result.get("harmful_hits"):
         log_alert("high", "Harmful screen content", {"hits": result["harmful_hits"]})
@@ -83,7 +226,8 @@ def screen_analysis():
 @main.route("/monitor", methods=["POST"])
 def monitor():
     try:
-        payload = request.get_json(force=True) or {}
+        payload = _media_payload()
+        session_id = _session_id(payload)
 
         text_result = None
         if payload.get("text"):
@@ -108,7 +252,7 @@ def monitor():
                 if payload.get("audio"):
                     signal, sr = decode_base64_audio(payload["audio"])
                     if signal.size > 0:
-                        result = analyze_speech_emotion(signal, sr)
+                        result = analyze_speech_emotion(signal, sr, session_id=session_id)
                         print(f"Speech analysis successful: {result.get('emotion', 'unknown')}")
                         speech_container["result"] = result
                     else:
@@ -127,7 +271,7 @@ def monitor():
         def process_face():
             try:
                 if payload.get("frame"):
-                    result = analyze_facial_expression(payload["frame"])
+                    result = analyze_facial_expression(payload["frame"], session_id=session_id)
                     face_container["result"] = result
                 else:
                     face_container["result"] = None
@@ -161,82 +305,8 @@ def monitor():
         screen_result = None
         if payload.get("screen"):
             try:
-                # Throttle screen OCR to prevent system overload - only process every 15 seconds (optimized)
-                global _last_screen_ocr_time, _SCREEN_OCR_INTERVAL
-                current_time = time.time()
-                time_since_last_ocr = current_time - _last_screen_ocr_time
-                
-                # Reduced interval to 10 seconds for better responsiveness
-                if time_since_last_ocr < _SCREEN_OCR_INTERVAL:
-                    # Don't return cached - process anyway but with shorter timeout for faster response
-                    # This ensures screen updates more frequently
-                    remaining = int(_SCREEN_OCR_INTERVAL - time_since_last_ocr)
-                    # Process with shorter timeout if within throttled period
-                    import threading
-                    screen_result_container = {"result": None, "done": False, "error": None}
-                    
-                    def run_screen_ocr_quick():
-                        try:
-                            result = analyze_screen_content(payload["screen"])
-                            screen_result_container["result"] = result
-                        except Exception as e:
-                            print(f"Screen analysis error: {e}")
-                            screen_result_container["error"] = str(e)
-                            screen_result_container["result"] = {"text": "", "harmful_hits": [], "status": "error", "error": str(e)[:200]}
-                        finally:
-                            screen_result_container["done"] = True
-                    
-                    ocr_thread = threading.Thread(target=run_screen_ocr_quick, daemon=True)
-                    ocr_thread.start()
-                    ocr_thread.join(timeout=5.0)  # Shorter timeout if throttled
-                    
-                    if not screen_result_container["done"]:
-                        screen_result = {
-                            "text": "",
-                            "harmful_hits": [],
-                            "status": "throttled",
-                            "note": f"Screen analysis updating every {_SCREEN_OCR_INTERVAL}s. Next update in {remaining}s."
-                        }
-                    else:
-                        screen_result = screen_result_container["result"] or {"text": "", "harmful_hits": [], "status": "ok", "note": "No text detected on screen"}
-                else:
-                    # Check if EasyOCR is initializing first - if so, return immediately without processing
-                    from app.models.screen_ocr import is_easyocr_initializing
-                    
-                    if is_easyocr_initializing():
-                        # EasyOCR is still initializing (downloading models), return immediately
-                        screen_result = {"text": "", "harmful_hits": [], "status": "initializing", "note": "EasyOCR is initializing (first time may take 20-30 seconds). Screen analysis will be available shortly."}
-                    else:
-                        # Update last OCR time before processing
-                        _last_screen_ocr_time = current_time
-                        # Process screen OCR with timeout to prevent blocking
-                        import threading
-                        screen_result_container = {"result": None, "done": False, "error": None}
-                        
-                        def run_screen_ocr():
-                            try:
-                                result = analyze_screen_content(payload["screen"])
-                                screen_result_container["result"] = result
-                            except Exception as e:
-                                print(f"Screen analysis error: {e}")
-                                screen_result_container["error"] = str(e)
-                                screen_result_container["result"] = {"text": "", "harmful_hits": [], "status": "error", "error": str(e)[:200]}
-                            finally:
-                                screen_result_container["done"] = True
-                        
-                        ocr_thread = threading.Thread(target=run_screen_ocr, daemon=True)
-                        ocr_thread.start()
-                        ocr_thread.join(timeout=8.0)  # Reduced to 8 seconds for faster response
-                        
-                        if not screen_result_container["done"]:
-                            # Screen OCR is taking too long - return timeout status but don't fail completely
-                            print("Screen OCR timeout - processing took longer than 8 seconds")
-                            screen_result = {"text": "", "harmful_hits": [], "status": "timeout", "note": "Screen analysis taking longer than expected. Processing in background..."}
-                        elif screen_result_container["error"]:
-                            # There was an error during processing
-                            screen_result = screen_result_container["result"] or {"text": "", "harmful_hits": [], "status": "error", "error": screen_result_container["error"][:200]}
-                        else:
-                            screen_result = screen_result_container["result"] or {"text": "", "harmful_hits": [], "status": "ok", "note": "No text detected on screen"}
+                # Queued for the background OCR workers; returns the freshest completed result right away
+                screen_result = submit_screen_ocr(payload["screen"], session_id)
             except Exception as e:
                 print(f"Screen analysis error: {e}")
                 screen_result = {"text": "", "harmful_hits": [], "status": "error", "error": str(e)[:200]}
@@ -246,7 +316,7 @@ def monitor():
         if screen_result and not text_result:
             fallback_text = (screen_result.get("text") or "").strip()
             if fallback_text and len(fallback_text) > 10:  # Only analyze if meaningful text
-                condensed = " ".join(fallback_text.split())[:512]  # Limit length
+                condensed = " ".join(fallback_text.split())  # Long screens are chunked by the analyzer
                 try:
                     text_result = analyze_text_sentiment(condensed)
                     text_result["source"] = "screen_ocr"
@@ -352,6 +422,8 @@ def monitor():
             print(f"  Synthesis details: score={synthesis.get('score')}, risk={synthesis.get('risk_level')}, state={synthesis.get('overall_state')}")
         
         return jsonify(response_data)
+    except (UploadTooLarge, RequestEntityTooLarge):
+        raise  # answered with 413 by the error handlers, not the fallback payload below
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -385,6 +457,13 @@ def companion():
         if not message:
             return jsonify({"error": "message is required"}), 400
 
+        try:
+            from openai import OpenAIError
+        except ImportError:
+            return jsonify({
+                "error": "The openai package is not installed. Run: pip install openai"
+            }), 500
+
         client = _openai_client()
         if client is None:
             return jsonify({
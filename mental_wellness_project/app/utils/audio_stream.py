@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils import prosody
+from app.utils.microphone import StreamResampler
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 ring buffer holding the most recent samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._write = 0
+        self.filled = 0
+
+    def append(self, samples: np.ndarray) -> None:
+        samples = np.asarray(samples, dtype=np.float32)[-self.capacity:]
+        n = samples.size
+        if not n:
+            return
+        end = self._write + n
+        if end <= self.capacity:
+            self._data[self._write:end] = samples
+        else:
+            split = self.capacity - self._write
+            self._data[self._write:] = samples[:split]
+            self._data[: n - split] = samples[split:]
+        self._write = end % self.capacity
+        self.filled = min(self.capacity, self.filled + n)
+
+    def sum_of_squares(self) -> float:
+        valid = self._data if self.filled == self.capacity else self._data[: self.filled]
+        return float(np.dot(valid, valid))
+
+
+class StreamingProsody:
+    """
+    Incremental version of `prosody.extract_prosody` for one audio stream.
+
+    New samples are framed as they arrive and only the new STFT frames are
+    computed; per-frame pitch peaks and mel power are kept for the last
+    `window_seconds`, so features can be read at any moment without
+    re-processing older audio. Memory is bounded by the window length.
+    Audio at another sample rate goes through one `StreamResampler` per
+    stream, so request and chunk boundaries leave no resampling seams.
+    """
+
+    def __init__(self, sr: int, window_seconds: float):
+        self.sr = sr
+        self.ring = AudioRingBuffer(int(window_seconds * sr))
+        max_frames = max(2, int(window_seconds * sr) // prosody.HOP_LENGTH)
+        # Start with half a window of silence, like the centered offline STFT
+        self._pending = np.zeros(prosody.N_FFT // 2, dtype=np.float32)
+        self._peaks: deque = deque(maxlen=max_frames)
+        self._mel: deque = deque(maxlen=max_frames)
+        self.total_samples = 0
+        self.baseline_mark = 0  # total_samples when the voice baseline was last updated
+        self.updated_at = time.monotonic()
+        self._resampler: Optional[StreamResampler] = None
+
+    def push(self, samples: np.ndarray, sr: Optional[int] = None) -> int:
+        """Add samples (at `sr`, default the stream rate); returns how many new STFT frames were computed."""
+        samples = np.asarray(samples, dtype=np.float32)
+        if sr and sr != self.sr:
+            if self._resampler is None or self._resampler.sr != sr:
+                # A client switching rates restarts the filter, as a new stream would
+                self._resampler = StreamResampler(sr, self.sr)
+            samples = self._resampler.process(samples)
+        if not samples.size:
+            return 0
+        self.ring.append(samples)
+        self.total_samples += samples.size
+        self.updated_at = time.monotonic()
+
+        pending = np.concatenate([self._pending, samples])
+        n_frames = 0
+        if pending.size >= prosody.N_FFT:
+            n_frames = 1 + (pending.size - prosody.N_FFT) // prosody.HOP_LENGTH
+        if n_frames:
+            frames = np.lib.stride_tricks.as_strided(
+                pending,
+                shape=(n_frames, prosody.N_FFT),
+                strides=(pending.strides[0] * prosody.HOP_LENGTH, pending.strides[0]),
+                writeable=False,
+            )
+            magnitude = prosody.frames_magnitude(frames)
+            pitches, magnitudes = prosody.pitch_candidates(magnitude, self.sr)
+            mel = prosody.mel_power(magnitude, self.sr)
+            for column in range(n_frames):
+                peak_rows = np.nonzero(magnitudes[:, column])[0]
+                self._peaks.append((pitches[peak_rows, column], magnitudes[peak_rows, column]))
+                self._mel.append(mel[:, column])
+        self._pending = pending[n_frames * prosody.HOP_LENGTH:].copy()
+        return n_frames
+
+    def _pitch(self) -> float:
+        if not self._peaks:
+            return 0.0
+        pitches = np.concatenate([frame[0] for frame in self._peaks])
+        magnitudes = np.concatenate([frame[1] for frame in self._peaks])
+        if not np.any(magnitudes):
+            return 0.0
+        # Median of the full (bins x frames) magnitude matrix, which is mostly zeros
+        total = len(self._peaks) * (prosody.N_FFT // 2 + 1)
+        zeros = total - magnitudes.size
+        ordered = np.sort(magnitudes)
+
+        def element(index: int) -> float:
+            return 0.0 if index < zeros else float(ordered[index - zeros])
+
+        median = 0.5 * (element((total - 1) // 2) + element(total // 2))
+        selected = pitches[magnitudes > median]
+        return float(selected.max()) if selected.size else 0.0
+
+    def features(self) -> Tuple[float, float, float]:
+        """Current (energy, pitch, tempo) over the buffered window."""
+        if not self.ring.filled:
+            return 0.0, 0.0, 0.0
+        energy = self.ring.sum_of_squares() / self.ring.filled
+        tempo = 0.0
+        if len(self._mel) >= 2:
+            envelope = prosody.onset_envelope_from_mel(np.stack(self._mel, axis=1))
+            tempo = prosody.tempo_from_onset_envelope(envelope, self.sr)
+        return energy, self._pitch(), tempo
+
+    def status(self) -> Dict:
+        return {
+            "buffered_seconds": round(self.ring.filled / self.sr, 3),
+            "received_seconds": round(self.total_samples / self.sr, 3),
+            "frames": len(self._mel),
+        }
+
+
+class AudioStreamStore:
+    """Bounded LRU of per-session streams; idle streams expire after `idle_seconds`."""
+
+    def __init__(self, sr: int, window_seconds: float, max_sessions: int = 64, idle_seconds: float = 300.0):
+        self.sr = sr
+        self.window_seconds = window_seconds
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_seconds = idle_seconds
+        self._streams: "OrderedDict[str, StreamingProsody]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _expire_idle(self) -> None:
+        now = time.monotonic()
+        idle = [key for key, stream in self._streams.items() if now - stream.updated_at > self.idle_seconds]
+        for session_id in idle:
+            del self._streams[session_id]
+            self._locks.pop(session_id, None)
+
+    def acquire(self, session_id: str, create: bool = True) -> Optional[Tuple[StreamingProsody, threading.Lock]]:
+        """Return the session's stream and its lock (hold the lock while pushing/reading)."""
+        with self._lock:
+            self._expire_idle()
+            stream = self._streams.get(session_id)
+            if stream is None:
+                if not create:
+                    return None
+                stream = StreamingProsody(self.sr, self.window_seconds)
+                self._streams[session_id] = stream
+                self._locks[session_id] = threading.Lock()
+                while len(self._streams) > self.max_sessions:
+                    evicted, _ = self._streams.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            self._streams.move_to_end(session_id)
+            return stream, self._locks[session_id]
+
+    def reset(self, session_id: str) -> None:
+        with self._lock:
+            self._streams.pop(session_id, None)
+            self._locks.pop(session_id, None)
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+
+class _PendingItem:
+    __slots__ = ("item", "event", "result", "error")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent calls for a few milliseconds and runs them through
+    `process_batch` as a single batch. Each caller blocks until its own item
+    has been processed and receives exactly the result for that item.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        self._process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._name = name
+        self._queue: "queue.Queue[_PendingItem]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self) -> List[_PendingItem]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Deadline passed - still drain whatever is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            try:
+                results = self._process_batch([pending.item for pending in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self._name}: batch returned {len(results)} results for {len(batch)} items"
+                    )
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as exc:
+                for pending in batch:
+                    pending.error = exc
+            finally:
+                for pending in batch:
+                    pending.event.set()
+
+    def submit(self, item: Any) -> Any:
+        """Queue one item and block until its result is available."""
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Queue several items (they may share batches with other callers)."""
+        if not items:
+            return []
+        self._ensure_worker()
+        pending_items = [_PendingItem(item) for item in items]
+        for pending in pending_items:
+            self._queue.put(pending)
+
+        results = []
+        for pending in pending_items:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            results.append(pending.result)
+        return results
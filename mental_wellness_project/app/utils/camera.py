@@ -1,26 +1,126 @@
 import base64
 import io
-from typing import Optional
+import struct
+from typing import Optional, Tuple, Union
 
 import cv2
 import numpy as np
 from PIL import Image
 
+# JPEGs are decoded at 1/2, 1/4 or 1/8 scale inside libjpeg (DCT scaling), so
+# the full-resolution pixels are never produced when a smaller frame is wanted.
+# EXIF orientation is ignored, as with the previous PIL decoder.
+_IMREAD_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+# Start-of-frame markers carry the image size (DHT/JPG/DAC share the range)
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
 
-def decode_base64_image(image_b64: str) -> Optional[np.ndarray]:
+
+def image_dimensions(image_bytes: Union[bytes, memoryview]) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG or PNG header without decoding pixels, else None."""
+    data = memoryview(image_bytes)
+    if len(data) >= 24 and data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if len(data) < 4 or data[:2] != b"\xff\xd8":
+        return None
+
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return width, height
+        segment_length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        offset += 2 + segment_length
+    return None
+
+
+def reduction_factor(size: Tuple[int, int], max_size: Tuple[int, int]) -> int:
+    """
+    Largest JPEG decode scale (1, 2, 4 or 8) that still leaves the image at
+    least as large as it will be after fitting it into `max_size`.
+    """
+    width, height = size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    for factor in (8, 4, 2):
+        if factor * scale <= 1.0:
+            return factor
+    return 1
+
+
+def _decode_with_pil(image_bytes: Union[bytes, memoryview], grayscale: bool) -> Optional[np.ndarray]:
+    # Formats OpenCV can't read (e.g. GIF)
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        if grayscale:
+            return np.array(image.convert("L"))
+        return cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    except Exception:
+        return None
+
+
+def decode_image_bytes(
+    image_bytes: Union[bytes, memoryview],
+    max_size: Optional[Tuple[int, int]] = None,
+    grayscale: bool = False,
+) -> Optional[np.ndarray]:
+    """
+    Decode encoded image bytes (JPEG/PNG/...) straight to an OpenCV BGR (or
+    grayscale) matrix, or None. With `max_size` (width, height) the caller's
+    target box, JPEGs are decoded at the smallest scale that still covers it;
+    the caller does the final resize.
+    """
+    if not image_bytes:
+        return None
+
+    factor = 1
+    if max_size:
+        dimensions = image_dimensions(image_bytes)
+        if dimensions and dimensions[0] and dimensions[1]:
+            factor = reduction_factor(dimensions, max_size)
+
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)  # no copy
+    flags = _IMREAD_FLAGS[(factor, grayscale)] | cv2.IMREAD_IGNORE_ORIENTATION
+    try:
+        image = cv2.imdecode(buffer, flags)
+    except cv2.error:
+        image = None
+    if image is None:
+        return _decode_with_pil(image_bytes, grayscale)
+    return image
+
+
+def decode_base64_image(
+    image_b64: Union[str, bytes, memoryview], max_size: Optional[Tuple[int, int]] = None
+) -> Optional[np.ndarray]:
     """
     Accepts a browser `canvas.toDataURL` string (data:image/png;base64,....)
     and returns an OpenCV BGR matrix. Returns None if decoding fails.
+    Raw image bytes (multipart / binary uploads) are decoded directly.
     """
 
     if not image_b64:
         return None
+    if not isinstance(image_b64, str):
+        return decode_image_bytes(image_b64, max_size)
 
     try:
         if "," in image_b64:
             image_b64 = image_b64.split(",")[1]
         image_bytes = base64.b64decode(image_b64)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
     except Exception:
         return None
+    return decode_image_bytes(image_bytes, max_size)
@@ -0,0 +1,145 @@
+"""
+Per-session face tracking between DNN detections.
+
+The detector runs every `redetect_every` frames (or when tracking loses
+confidence on any face); in between each face box is predicted by matching
+its last detected patch inside a window around its previous position.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+# Template matching runs on patches scaled so the face is about this wide
+_MATCH_WIDTH = 64
+
+
+@dataclass
+class FaceTrack:
+    boxes: List[Box] = field(default_factory=list)  # most confident face first
+    templates: List[np.ndarray] = field(default_factory=list)  # grayscale face patches from the last detection
+    frame_shape: Optional[Tuple[int, int]] = None
+    frames_since_detection: int = 0
+    confidence: float = 0.0  # weakest match among the tracked faces
+    detections: int = 0
+    tracked: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict:
+        return {
+            "boxes": [list(box) for box in self.boxes],
+            "frames_since_detection": self.frames_since_detection,
+            "confidence": round(self.confidence, 3),
+            "detections": self.detections,
+            "tracked": self.tracked,
+        }
+
+
+class FaceTracker:
+    """Re-detection policy plus the template-matching predictor."""
+
+    def __init__(self, redetect_every: int = 5, min_confidence: float = 0.6, search_margin: float = 0.5):
+        self.redetect_every = max(1, int(redetect_every))
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+
+    def needs_detection(self, track: FaceTrack, frame_shape: Tuple[int, int]) -> bool:
+        return (
+            not track.boxes
+            or track.frame_shape != frame_shape
+            or track.frames_since_detection + 1 >= self.redetect_every
+        )
+
+    def start(self, track: FaceTrack, gray: np.ndarray, boxes: Sequence[Box]) -> None:
+        """Reset the track to a fresh detection (or clear it if nothing was found)."""
+        track.frame_shape = gray.shape[:2]
+        track.frames_since_detection = 0
+        track.updated_at = time.monotonic()
+        track.detections += 1
+        track.boxes = list(boxes)
+        track.templates = [gray[y:y + h, x:x + w].copy() for x, y, w, h in track.boxes]
+        track.confidence = 1.0 if track.boxes else 0.0
+
+    def predict(self, track: FaceTrack, gray: np.ndarray) -> Optional[List[Box]]:
+        """
+        Find every face patch near its last position. Returns the new boxes,
+        or None when any match is weaker than `min_confidence` (re-detect then).
+        """
+        track.frames_since_detection += 1
+        track.updated_at = time.monotonic()
+        boxes, confidence = [], 1.0
+        for box, template in zip(track.boxes, track.templates):
+            match = self._match(gray, box, template)
+            if match is None:
+                track.confidence = 0.0
+                return None
+            new_box, score = match
+            confidence = min(confidence, score)
+            boxes.append(new_box)
+        track.confidence = confidence
+        if confidence < self.min_confidence:
+            return None
+        track.boxes = boxes
+        track.tracked += 1
+        return boxes
+
+    def _match(self, gray: np.ndarray, box: Box, template: np.ndarray) -> Optional[Tuple[Box, float]]:
+        """Best (box, score) for one face inside its search window, or None if the window is too small."""
+        x, y, w, h = box
+        frame_h, frame_w = gray.shape[:2]
+        margin_x, margin_y = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+        x1, y1 = min(frame_w, x + w + margin_x), min(frame_h, y + h + margin_y)
+        window = gray[y0:y1, x0:x1]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None
+
+        scale = min(1.0, _MATCH_WIDTH / w)
+        if scale < 1.0:
+            window = cv2.resize(window, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            template = cv2.resize(
+                template, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA
+            )
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            return None
+
+        scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+        new_x = min(max(0, x0 + round(dx / scale)), frame_w - w)
+        new_y = min(max(0, y0 + round(dy / scale)), frame_h - h)
+        return (int(new_x), int(new_y), w, h), float(confidence)
+
+
+class FaceTrackStore:
+    """Bounded LRU of per-session face tracks; idle tracks expire after `idle_seconds`."""
+
+    def __init__(self, max_sessions: int = 64, idle_seconds: float = 300.0):
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_seconds = idle_seconds
+        self._tracks: "OrderedDict[str, FaceTrack]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id: str) -> Tuple[FaceTrack, threading.Lock]:
+        """Return the session's track and its lock (hold the lock while using the track)."""
+        with self._lock:
+            now = time.monotonic()
+            for key in [key for key, track in self._tracks.items() if now - track.updated_at > self.idle_seconds]:
+                del self._tracks[key]
+                self._locks.pop(key, None)
+            track = self._tracks.get(session_id)
+            if track is None:
+                track = FaceTrack()
+                self._tracks[session_id] = track
+                self._locks[session_id] = threading.Lock()
+                while len(self._tracks) > self.max_sessions:
+                    evicted, _ = self._tracks.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            self._tracks.move_to_end(session_id)
+            return track, self._locks[session_id]
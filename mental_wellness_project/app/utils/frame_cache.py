@@ -0,0 +1,104 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    Difference hash of a downscaled grayscale image: one bit per horizontally
+    adjacent pixel pair of a (hash_size + 1) x hash_size thumbnail.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = thumbnail[:, 1:] > thumbnail[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class FrameResultCache:
+    """
+    Per-session cache of analysis results keyed on perceptual frame hashes.
+
+    A lookup hits when one of the session's last `entries_per_session`
+    frames is within `max_distance` bits of the new frame and is no older
+    than `max_age_seconds`. Sessions are kept in a bounded LRU.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 10,
+        max_age_seconds: float = 10.0,
+        max_sessions: int = 256,
+        entries_per_session: int = 4,
+    ):
+        self.max_distance = int(max_distance)
+        self.max_age_seconds = float(max_age_seconds)
+        self.max_sessions = max(1, int(max_sessions))
+        self.entries_per_session = max(1, int(entries_per_session))
+        self._sessions: "OrderedDict[str, List[Tuple[int, float, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, frame_hash: int) -> Optional[Tuple[Any, float, int]]:
+        """Return (result copy, age in seconds, hash distance) of the closest fresh match, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._sessions.get(session_id, [])
+            fresh = [entry for entry in entries if now - entry[1] <= self.max_age_seconds]
+            if len(fresh) != len(entries):
+                self.stale += len(entries) - len(fresh)
+                self._sessions[session_id] = fresh
+            best = None
+            for stored_hash, stored_at, value in fresh:
+                distance = hamming_distance(stored_hash, frame_hash)
+                if distance <= self.max_distance and (best is None or distance < best[2]):
+                    best = (value, now - stored_at, distance)
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._sessions.move_to_end(session_id)
+        value, age, distance = best
+        return copy.deepcopy(value), age, distance
+
+    def put(self, session_id: str, frame_hash: int, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            entries = self._sessions.setdefault(session_id, [])
+            entries.append((frame_hash, time.monotonic(), value))
+            del entries[: -self.entries_per_session]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "max_distance": self.max_distance,
+                "max_age_seconds": self.max_age_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stale": self.stale,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,91 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+# Import the app and build it the same way `flask --app run run` does
+_STARTUP_SNIPPET = (
+    "import time; _t = time.perf_counter(); "
+    "from app import create_app; create_app(warm_up=False); "
+    "print('create_app_seconds=%.4f' % (time.perf_counter() - _t))"
+)
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+
+def _parse_importtime(stderr: str) -> List[Dict]:
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append(
+            {
+                "module": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_ms": int(self_us) / 1000.0,
+                "cumulative_ms": int(cumulative_us) / 1000.0,
+            }
+        )
+    return modules
+
+
+def import_time_report(top: int = 25) -> Dict:
+    """
+    Start a fresh interpreter with `-X importtime`, build the app, and return
+    the per-module import cost (slowest first) plus the total create_app time.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STARTUP_SNIPPET],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"app import failed:\n{completed.stderr[-2000:]}")
+
+    create_app_seconds = None
+    for line in completed.stdout.splitlines():
+        if line.startswith("create_app_seconds="):
+            create_app_seconds = float(line.split("=", 1)[1])
+
+    modules = _parse_importtime(completed.stderr)
+    top_level = [module for module in modules if module["depth"] == 0]
+    app_modules = [module for module in modules if module["module"].split(".")[0] == "app"]
+
+    # Cost of each dependency package = its outermost (first) import
+    packages: Dict[str, Dict] = {}
+    for module in modules:
+        root = module["module"].split(".")[0]
+        if root == "app":
+            continue
+        known = packages.get(root)
+        if known is None or module["depth"] < known["depth"]:
+            packages[root] = dict(module, module=root)
+
+    return {
+        "create_app_seconds": create_app_seconds,
+        "total_import_ms": round(sum(module["cumulative_ms"] for module in top_level), 1),
+        "slowest_packages": sorted(packages.values(), key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "app_modules": sorted(app_modules, key=lambda m: m["cumulative_ms"], reverse=True),
+    }
+
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"create_app(): {report['create_app_seconds']:.3f}s "
+        f"(imports: {report['total_import_ms']:.1f} ms)",
+        "",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    for section, title in (("slowest_packages", "Dependency packages"), ("app_modules", "app.* modules")):
+        lines.append(f"-- {title} --")
+        for module in report[section]:
+            indent = "  " * module["depth"] if section == "app_modules" else ""
+            lines.append(
+                f"{module['cumulative_ms']:>14.1f} {module['self_ms']:>9.1f}  {indent}{module['module']}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,99 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from app.config import settings
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword list. The text is lowercased
+    once and scanned in a single pass regardless of how many keywords there
+    are; hits only count when they start on a word boundary, so "panic"
+    matches "panic attack" and "panicking" but not "mechanic". Like the
+    substring check this replaced, inflected forms ("abused",
+    "worthlessness") still match their keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(k for k in keywords if k.strip()))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._lengths = [len(keyword.lower()) for keyword in self.keywords]
+        for index, keyword in enumerate(self.keywords):
+            self._add(keyword.lower(), index)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self) -> None:
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the fallback state (e.g. "abuse" inside "child abuse")
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        """Return every (keyword, start, end) hit in scan order."""
+        if not text or not self.keywords:
+            return []
+
+        lowered = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        hits = []
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = position + 1
+            for index in output[state]:
+                start = end - self._lengths[index]
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                hits.append((self.keywords[index], start, end))
+        return hits
+
+    def matches(self, text: str) -> List[str]:
+        """Distinct keywords found in `text`, in keyword-list order."""
+        found = {keyword for keyword, _, _ in self.find_all(text)}
+        return [keyword for keyword in self.keywords if keyword in found]
+
+
+@lru_cache(maxsize=None)
+def _matcher_for(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def harmful_matcher() -> KeywordMatcher:
+    """Shared matcher for `settings.harmful_keywords` (built once)."""
+    return _matcher_for(tuple(settings.harmful_keywords))
+
+
+def calm_matcher() -> KeywordMatcher:
+    """Shared matcher for `settings.calm_keywords` (built once)."""
+    return _matcher_for(tuple(settings.calm_keywords))
@@ -0,0 +1,166 @@
+"""
+Background job queue that keeps only the newest job per key.
+
+Callers never wait: `submit` queues the job and `latest` returns the last
+completed result for the key. A job submitted for a key that already has
+one queued replaces it (latest-frame-wins), so a slow worker skips stale
+screenshots instead of working through a backlog. A fixed set of worker
+threads drains the queue and never runs two jobs of the same key at once.
+A job that raises keeps the key's previous result; its message is
+available from `last_error` until the key's next job succeeds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class JobResult:
+    result: Any
+    submitted_at: float  # time.monotonic() when the job that produced it was submitted
+    completed_at: float
+    duration_seconds: float
+
+
+class LatestJobQueue:
+    """
+    Bounded queue of at most `max_pending` keys (one job each), drained by
+    `workers` daemon threads that call `process(item)`. Results are kept
+    per key in an LRU of `max_results` entries that expire after
+    `idle_seconds`.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Any],
+        workers: int = 1,
+        max_pending: int = 32,
+        max_results: int = 64,
+        idle_seconds: float = 300.0,
+        name: str = "latest-jobs",
+    ):
+        self._process = process
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.max_results = max(1, int(max_results))
+        self.idle_seconds = idle_seconds
+        self._name = name
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (item, submitted_at)
+        self._running: set = set()
+        self._results: "OrderedDict[str, JobResult]" = OrderedDict()
+        self._errors: "OrderedDict[str, str]" = OrderedDict()  # key -> message of its last job, if it failed
+        self._threads: List[threading.Thread] = []
+        self._cond = threading.Condition()
+        self.submitted = 0
+        self.replaced = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_workers(self) -> None:
+        # Called with the condition held
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"{self._name}-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key: str, item: Any) -> bool:
+        """
+        Queue `item` for `key`, replacing the key's queued job if there is
+        one. Returns False when the queue is full of other keys' jobs.
+        """
+        with self._cond:
+            self._ensure_workers()
+            if key in self._pending:
+                # Keeps its place in line; only the newest item is processed
+                self._pending[key] = (item, time.monotonic())
+                self.replaced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return False
+            else:
+                self._pending[key] = (item, time.monotonic())
+            self.submitted += 1
+            self._cond.notify()
+            return True
+
+    def latest(self, key: str) -> Optional[JobResult]:
+        """The most recent completed result for `key` (None before the first one)."""
+        with self._cond:
+            self._expire()
+            entry = self._results.get(key)
+            if entry is not None:
+                self._results.move_to_end(key)
+            return entry
+
+    def last_error(self, key: str) -> Optional[str]:
+        """Why the latest job for `key` failed (None once a later job succeeds)."""
+        with self._cond:
+            return self._errors.get(key)
+
+    def is_pending(self, key: str) -> bool:
+        """True while a job for `key` is queued or running."""
+        with self._cond:
+            return key in self._pending or key in self._running
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, entry in self._results.items() if now - entry.completed_at > self.idle_seconds]:
+            del self._results[key]
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                for key in self._pending:
+                    if key not in self._running:
+                        item, submitted_at = self._pending.pop(key)
+                        self._running.add(key)
+                        return key, item, submitted_at
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            key, item, submitted_at = self._next_job()
+            started = time.monotonic()
+            try:
+                result = self._process(item)
+                failed = False
+            except Exception as exc:
+                print(f"{self._name}: job for {key} failed: {exc}")
+                result, failed = str(exc)[:200], True
+            finished = time.monotonic()
+            with self._cond:
+                self._running.discard(key)
+                if failed:
+                    self.failed += 1
+                    self._errors[key] = result
+                    self._errors.move_to_end(key)
+                    while len(self._errors) > self.max_results:
+                        self._errors.popitem(last=False)
+                else:
+                    self.completed += 1
+                    self._errors.pop(key, None)
+                    self._results[key] = JobResult(result, submitted_at, finished, finished - started)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+                # A newer job for this key may have been waiting for this one to finish
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "running": len(self._running),
+                "max_pending": self.max_pending,
+                "results": len(self._results),
+                "submitted": self.submitted,
+                "replaced": self.replaced,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
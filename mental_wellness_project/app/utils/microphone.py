@@ -1,36 +1,189 @@
 import base64
 import io
 import logging
+import struct
+import time
 import wave
-from typing import Tuple
+from functools import lru_cache
+from math import gcd
+from statistics import median
+from typing import Dict, List, Tuple, Union
 
 import numpy as np
-import soundfile as sf
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_SR = 16000
 
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
 
 def _to_mono(data: np.ndarray) -> np.ndarray:
     if data.ndim > 1:
-        return np.mean(data, axis=1)
+        return np.mean(data, axis=1, dtype=np.float32)
     return data
 
 
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Kaiser-windowed sinc low-pass for an up/down ratio (the same design as
+    `scipy.signal.resample_poly`), split into `up` polyphase branches and
+    built once per rate pair. Returns (branches, half_len); each row holds
+    one branch's taps reversed, ready for a dot product with the input.
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    n = np.arange(2 * half_len + 1) - half_len
+    taps = np.sinc(n / max_rate) * np.kaiser(n.size, 5.0)
+    taps *= up / taps.sum()  # unity DC gain after zero-stuffing
+
+    n_branch_taps = -(-taps.size // up)
+    padded = np.zeros(n_branch_taps * up)
+    padded[: taps.size] = taps
+    branches = padded.reshape(n_branch_taps, up).T[:, ::-1]
+    return np.ascontiguousarray(branches, dtype=np.float32), half_len
+
+
+def _resample_polyphase(signal: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """
+    Rational-ratio resampling without materializing the zero-stuffed signal:
+    output sample n only touches one filter branch, and every `up`-th output
+    shares it, so each branch is one strided matrix-vector product.
+    """
+    divisor = gcd(int(sr), int(target_sr))
+    up, down = int(target_sr) // divisor, int(sr) // divisor
+    branches, half_len = _polyphase_filter(up, down)
+    n_taps = branches.shape[1]
+
+    signal = np.asarray(signal, dtype=np.float32)
+    n_out = -(-signal.size * up // down)
+    pad = n_taps + down
+    padded = np.zeros(signal.size + 2 * pad, dtype=np.float32)
+    padded[pad: pad + signal.size] = signal
+    item = padded.strides[0]
+
+    output = np.empty(n_out, dtype=np.float32)
+    for first in range(min(up, n_out)):
+        # Output `first + q * up` ends at input index `last + q * down`
+        position = first * down + half_len
+        branch, last = position % up, position // up
+        count = len(range(first, n_out, up))
+        frames = np.lib.stride_tricks.as_strided(
+            padded[pad + last - n_taps + 1:],
+            shape=(count, n_taps),
+            strides=(item * down, item),
+            writeable=False,
+        )
+        output[first::up] = np.einsum("ij,j->i", frames, branches[branch])
+    return output
+
+
+class StreamResampler:
+    """
+    `_resample_polyphase` for audio that arrives in pieces. The input tail
+    the filter still needs and the output position carry over between
+    `process` calls, so the concatenated output equals resampling the whole
+    stream at once (minus the last few samples, which wait for more input)
+    instead of restarting the filter, and its edge zero padding, per piece.
+    """
+
+    def __init__(self, sr: int, target_sr: int):
+        divisor = gcd(int(sr), int(target_sr))
+        self.sr, self.target_sr = int(sr), int(target_sr)
+        self.up, self.down = self.target_sr // divisor, self.sr // divisor
+        self._branches, self._half_len = _polyphase_filter(self.up, self.down)
+        n_taps = self._branches.shape[1]
+        # Input before the first sample is zero, as in the one-shot version
+        self._history = np.zeros(n_taps, dtype=np.float32)
+        self._offset = -n_taps  # input index of _history[0]
+        self._next_out = 0  # index of the next output sample
+
+    def _last_input(self, n: np.ndarray) -> np.ndarray:
+        return (n * self.down + self._half_len) // self.up
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next piece of the stream; returns every output sample its input completes."""
+        samples = np.asarray(samples, dtype=np.float32)
+        self._history = np.concatenate([self._history, samples])
+        received = self._offset + self._history.size
+        # Output n is ready once input sample (n * down + half_len) // up has arrived
+        n_end = max(self._next_out, -(-(received * self.up - self._half_len) // self.down))
+        n = np.arange(self._next_out, n_end)
+        n_taps = self._branches.shape[1]
+        output = np.empty(n.size, dtype=np.float32)
+        if n.size:
+            positions = n * self.down + self._half_len
+            starts = positions // self.up - n_taps + 1 - self._offset
+            frames = self._history[starts[:, None] + np.arange(n_taps)]
+            output[:] = np.einsum("ij,ij->i", frames, self._branches[positions % self.up])
+            self._next_out = n_end
+
+        keep_from = int(self._last_input(np.int64(self._next_out))) - n_taps + 1 - self._offset
+        if keep_from > 0:
+            self._history = self._history[keep_from:].copy()
+            self._offset += keep_from
+        return output
+
+
+def _resample_librosa(signal: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """Previous resampling path, kept as the benchmark reference."""
+    import librosa
+
+    return librosa.resample(signal, orig_sr=sr, target_sr=target_sr)
+
+
 def _resample_if_needed(signal: np.ndarray, sr: int, target_sr: int) -> Tuple[np.ndarray, int]:
     if sr == target_sr or not signal.size:
         return signal, sr
 
-    import librosa
+    return _resample_polyphase(signal, sr, target_sr), target_sr
 
-    resampled = librosa.resample(signal, orig_sr=sr, target_sr=target_sr)
-    return resampled, target_sr
 
+def _decode_pcm16_wav(audio_bytes: Union[bytes, memoryview]) -> Tuple[np.ndarray, int]:
+    """
+    Fast path for the browser's 16-bit PCM WAV: walk the RIFF chunks directly
+    and view the sample data as int16 without copying it. The only copy is
+    the float32 conversion (mono downmix happens in float32 too).
+    """
+    view = memoryview(audio_bytes)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+
+    channels = sample_rate = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", view, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", view, body)
+            bits = struct.unpack_from("<H", view, body + 14)[0]
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                audio_format = struct.unpack_from("<H", view, body + 24)[0]
+            if audio_format != _WAVE_FORMAT_PCM or bits != 16:
+                raise ValueError(f"fast path only handles 16-bit PCM (format={audio_format}, bits={bits})")
+        elif chunk_id == b"data":
+            if channels is None:
+                raise ValueError("data chunk before fmt chunk")
+            # Browsers that stream WAV may leave the size unset; clamp to what we have
+            size = min(chunk_size, len(view) - body)
+            frame_bytes = 2 * channels
+            samples = np.frombuffer(view, dtype="<i2", count=(size // frame_bytes) * channels, offset=body)
+            # Downmix by summing the interleaved channel columns (contiguous adds beat a strided mean)
+            data = samples[0::channels].astype(np.float32)
+            for channel in range(1, channels):
+                data += samples[channel::channels]
+            data *= np.float32(1.0 / (32768.0 * channels))
+            return data, int(sample_rate)
+        offset = body + chunk_size + (chunk_size & 1)  # chunks are word aligned
+    raise ValueError("no data chunk found")
 
-def _decode_with_wave(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+
+def _decode_with_wave(audio_bytes: Union[bytes, memoryview]) -> Tuple[np.ndarray, int]:
     """Decode WAV using Python's built-in wave module (no external dependencies)."""
-    wav_file = wave.open(io.BytesIO(audio_bytes), 'rb')
+    wav_file = wave.open(io.BytesIO(audio_bytes), 'rb')  # BytesIO copies memoryviews
     num_channels = wav_file.getnchannels()
     sample_width = wav_file.getsampwidth()
     sample_rate = wav_file.getframerate()
@@ -59,21 +212,40 @@ def _decode_with_wave(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
     return sound_info, sample_rate
 
 
-def _decode_with_soundfile(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+def _decode_with_soundfile(audio_bytes: Union[bytes, memoryview]) -> Tuple[np.ndarray, int]:
     """Decode audio using soundfile (handles WAV and other formats, no FFmpeg needed for WAV)."""
+    import soundfile as sf
+
     data, sr = sf.read(io.BytesIO(audio_bytes))
     return _to_mono(data), sr
 
 
-def decode_base64_audio(audio_b64: str, target_sr: int = DEFAULT_SR) -> Tuple[np.ndarray, int]:
+PCM_FORMATS = {"s16le": (np.dtype("<i2"), 32768.0), "f32le": (np.dtype("<f4"), 1.0)}
+
+
+def decode_pcm_chunk(data: bytes, sample_format: str = "s16le", sr: int = DEFAULT_SR,
+                     target_sr: int = DEFAULT_SR) -> np.ndarray:
+    """Convert raw little-endian mono PCM bytes to float32 samples at `target_sr`."""
+    dtype, scale = PCM_FORMATS[sample_format]
+    samples = np.frombuffer(data, dtype=dtype).astype(np.float32)
+    if scale != 1.0:
+        samples /= scale
+    samples, _ = _resample_if_needed(samples, sr, target_sr)
+    return samples.astype(np.float32, copy=False)
+
+
+def decode_base64_audio(audio_b64: Union[str, bytes, memoryview], target_sr: int = DEFAULT_SR) -> Tuple[np.ndarray, int]:
     """
     Decode base64-encoded WAV audio (converted from WebM/OGG in browser).
     Uses cloud-friendly libraries that don't require FFmpeg.
     Returns a mono numpy array. If decoding fails, returns empty signal.
+    Raw WAV bytes (multipart / binary uploads) skip the base64 step.
     """
 
     if not audio_b64:
         return np.array([]), target_sr
+    if not isinstance(audio_b64, str):
+        return decode_audio_bytes(audio_b64, target_sr)
 
     if "," in audio_b64:
         audio_b64 = audio_b64.split(",")[1]
@@ -83,11 +255,19 @@ def decode_base64_audio(audio_b64: str, target_sr: int = DEFAULT_SR) -> Tuple[np
     except Exception as e:
         logger.error(f"Failed to decode base64 audio: {e}")
         return np.array([]), target_sr
+    return decode_audio_bytes(audio_bytes, target_sr)
+
 
-    # Try decoders in order: soundfile (most reliable), then wave (built-in)
-    # Both work with WAV files and don't need FFmpeg
+def decode_audio_bytes(audio_bytes: Union[bytes, memoryview], target_sr: int = DEFAULT_SR) -> Tuple[np.ndarray, int]:
+    """Decode WAV bytes to a mono float signal at `target_sr` (empty signal on failure)."""
+    if not audio_bytes:
+        return np.array([]), target_sr
+
+    # Try decoders in order: direct 16-bit PCM parse, soundfile, then wave (built-in)
+    # All work with WAV files and don't need FFmpeg
     decoders = [
-        _decode_with_soundfile,  # Best for WAV files, handles various formats
+        _decode_pcm16_wav,  # Zero-copy fast path for the browser's 16-bit PCM WAV
+        _decode_with_soundfile,  # Handles other sample formats / containers
         _decode_with_wave,  # Built-in Python module, no dependencies
     ]
     
@@ -104,3 +284,63 @@ def decode_base64_audio(audio_b64: str, target_sr: int = DEFAULT_SR) -> Tuple[np
 
     logger.error("All audio decoders failed. Make sure frontend converts audio to WAV format before sending.")
     return np.array([]), target_sr
+
+
+def _legacy_decode(audio_bytes: bytes, target_sr: int) -> Tuple[np.ndarray, int]:
+    """The previous soundfile + librosa.resample chain (benchmark reference)."""
+    data, sr = _decode_with_soundfile(audio_bytes)
+    if sr != target_sr:
+        data = _resample_librosa(data, sr, target_sr)
+    return data, target_sr
+
+
+def _synthetic_wav(seconds: float, sr: int, channels: int) -> bytes:
+    t = np.arange(int(seconds * sr)) / sr
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.default_rng(0).standard_normal(t.size)
+    pcm = (np.clip(tone, -1, 1) * 32767).astype("<i2")
+    frames = np.repeat(pcm[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sr)
+        wav_file.writeframes(frames.tobytes())
+    return buffer.getvalue()
+
+
+def benchmark_audio_decode(
+    seconds: float = 5.0,
+    rates: Tuple[int, ...] = (48000, 44100),
+    channels: int = 1,
+    repeats: int = 10,
+) -> List[Dict]:
+    """Median decode+resample time of the fast path vs the previous chain, per source rate."""
+    report = []
+    for sr in rates:
+        wav_bytes = _synthetic_wav(seconds, sr, channels)
+        fast_signal, _ = _resample_if_needed(*_decode_pcm16_wav(wav_bytes), DEFAULT_SR)
+        entry = {"source_sr": sr, "channels": channels, "audio_seconds": seconds}
+        for name, decode in (
+            ("legacy", lambda: _legacy_decode(wav_bytes, DEFAULT_SR)),
+            ("fast", lambda: _resample_if_needed(*_decode_pcm16_wav(wav_bytes), DEFAULT_SR)),
+        ):
+            started = time.perf_counter()
+            signal, _ = decode()  # first call includes imports / filter design
+            first_call = time.perf_counter() - started
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                decode()
+                timings.append(time.perf_counter() - started)
+            entry[name] = {
+                "first_call_ms": round(first_call * 1000, 2),
+                "median_ms": round(median(timings) * 1000, 2),
+                "audio_seconds_per_second": round(seconds / median(timings), 1),
+            }
+            if name == "legacy":
+                reference = signal
+        n = min(reference.size, fast_signal.size)
+        entry["max_abs_diff"] = round(float(np.max(np.abs(reference[:n] - fast_signal[:n]))), 5)
+        entry["speedup"] = round(entry["legacy"]["median_ms"] / max(entry["fast"]["median_ms"], 1e-6), 1)
+        report.append(entry)
+    return report
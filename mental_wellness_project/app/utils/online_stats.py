@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+GLOBAL_KEY = "__global__"
+
+
+@dataclass
+class RunningStats:
+    """Welford running mean/variance over a fixed-length feature vector (O(1) per update)."""
+
+    dims: int
+    count: int = 0
+    mean: List[float] = field(default_factory=list)
+    m2: List[float] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)  # wall clock, so it survives restarts
+
+    def __post_init__(self):
+        if not self.mean:
+            self.mean = [0.0] * self.dims
+        if not self.m2:
+            self.m2 = [0.0] * self.dims
+
+    def update(self, values: Sequence[float]) -> None:
+        self.updated_at = time.time()
+        self.count += 1
+        for i, value in enumerate(values):
+            delta = value - self.mean[i]
+            self.mean[i] += delta / self.count
+            self.m2[i] += delta * (value - self.mean[i])
+
+    def std(self) -> List[float]:
+        if self.count < 2:
+            return [0.0] * self.dims
+        return [(m2 / (self.count - 1)) ** 0.5 for m2 in self.m2]
+
+    def zscores(self, values: Sequence[float]) -> List[float]:
+        """Standardize `values` against the statistics seen so far (0 where undefined)."""
+        return [
+            (value - mean) / std if std > 1e-12 else 0.0
+            for value, mean, std in zip(values, self.mean, self.std())
+        ]
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean": list(self.mean), "m2": list(self.m2), "updated_at": self.updated_at}
+
+    @classmethod
+    def from_dict(cls, dims: int, data: Dict) -> "RunningStats":
+        return cls(
+            dims=dims,
+            count=int(data["count"]),
+            mean=list(data["mean"]),
+            m2=list(data["m2"]),
+            updated_at=float(data.get("updated_at", 0.0)),
+        )
+
+
+class OnlineNormalizer:
+    """
+    Per-session running feature statistics kept in a bounded LRU store.
+
+    Each clip is scored against its session's baseline (or the global
+    baseline until the session has `min_samples` clips) before being folded
+    into both. Snapshots are written to `snapshot_path` so baselines survive
+    restarts. Sessions not updated for `idle_seconds` are dropped, and
+    sessions whose id starts with `ephemeral_prefix` stay in memory only.
+    """
+
+    def __init__(
+        self,
+        dims: int,
+        max_sessions: int = 1000,
+        min_samples: int = 5,
+        snapshot_path: Optional[Path] = None,
+        snapshot_interval: float = 60.0,
+        idle_seconds: Optional[float] = None,
+        ephemeral_prefix: Optional[str] = None,
+    ):
+        self.dims = dims
+        self.max_sessions = max(1, int(max_sessions))
+        self.min_samples = max(2, int(min_samples))
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self.idle_seconds = idle_seconds
+        self.ephemeral_prefix = ephemeral_prefix
+        self._sessions: "OrderedDict[str, RunningStats]" = OrderedDict()
+        self._global = RunningStats(dims)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+        self._dirty = False
+        self._load_snapshot()
+
+    def _expired(self, stats: RunningStats, now: float) -> bool:
+        return self.idle_seconds is not None and now - stats.updated_at > self.idle_seconds
+
+    def _persisted(self, session_id: str) -> bool:
+        return not (self.ephemeral_prefix and session_id.startswith(self.ephemeral_prefix))
+
+    def _session(self, session_id: str) -> RunningStats:
+        stats = self._sessions.get(session_id)
+        if stats is None or self._expired(stats, time.time()):
+            stats = RunningStats(self.dims)
+            self._sessions[session_id] = stats
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return stats
+
+    def score_and_update(self, session_id: str, values: Sequence[float], update: bool = True) -> Dict:
+        """Return z-scores of `values` against the current baseline, then (optionally) update it."""
+        with self._lock:
+            session = self._session(session_id)
+            if session.count >= self.min_samples:
+                baseline, source = session, "session"
+            elif self._global.count >= self.min_samples:
+                baseline, source = self._global, "global"
+            else:
+                baseline, source = None, "none"
+
+            result = {
+                "zscores": baseline.zscores(values) if baseline else [0.0] * self.dims,
+                "baseline": source,
+                "baseline_samples": baseline.count if baseline else 0,
+            }
+            if update:
+                session.update(values)
+                self._global.update(values)
+                self._dirty = True
+
+        self._maybe_snapshot()
+        return result
+
+    def _load_snapshot(self) -> None:
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return
+        try:
+            data = json.loads(self.snapshot_path.read_text())
+            if data.get("dims") != self.dims:
+                return
+            self._global = RunningStats.from_dict(self.dims, data[GLOBAL_KEY])
+            now = time.time()
+            for session_id, stats in list(data.get("sessions", {}).items())[-self.max_sessions:]:
+                stats = RunningStats.from_dict(self.dims, stats)
+                # Snapshots written before expiry existed have no timestamp and are dropped
+                if self._persisted(session_id) and not self._expired(stats, now):
+                    self._sessions[session_id] = stats
+        except Exception as e:
+            print(f"Warning: could not load normalizer snapshot {self.snapshot_path}: {e}")
+
+    def _maybe_snapshot(self) -> None:
+        if self.snapshot_path and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Atomically write all baselines to `snapshot_path`."""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            for key in [key for key, stats in self._sessions.items() if self._expired(stats, now)]:
+                del self._sessions[key]
+            data = {
+                "dims": self.dims,
+                GLOBAL_KEY: self._global.to_dict(),
+                "sessions": {
+                    key: stats.to_dict() for key, stats in self._sessions.items() if self._persisted(key)
+                },
+            }
+            self._dirty = False
+            self._last_snapshot = time.monotonic()
+        try:
+            with self._write_lock:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.snapshot_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(data))
+                os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Warning: could not write normalizer snapshot {self.snapshot_path}: {e}")
@@ -0,0 +1,197 @@
+"""
+NumPy prosody features computed from a single STFT per clip.
+
+Mirrors the librosa calls the speech module used to make (`piptrack`,
+`onset.onset_strength`, `feature.rhythm.tempo`) with their default
+parameters, but shares one magnitude spectrogram between them, runs in
+float32 and needs no numba JIT warm-up.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+PITCH_FMIN = 150.0
+PITCH_FMAX = 4000.0
+PITCH_THRESHOLD = 0.1
+TEMPO_AC_SECONDS = 8.0
+TEMPO_START_BPM = 120.0
+TEMPO_STD_BPM = 1.0
+TEMPO_MAX_BPM = 320.0
+
+
+@lru_cache(maxsize=4)
+def _hann_window(n_fft: int) -> np.ndarray:
+    # Periodic Hann, as used by scipy.signal.get_window(..., fftbins=True)
+    n = np.arange(n_fft, dtype=np.float32)
+    return (0.5 - 0.5 * np.cos(2.0 * np.pi * n / n_fft)).astype(np.float32)
+
+
+def stft_magnitude(signal: np.ndarray, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """Centered, zero-padded magnitude STFT with shape (1 + n_fft // 2, frames)."""
+    signal = np.asarray(signal, dtype=np.float32)
+    padded = np.pad(signal, n_fft // 2, mode="constant")
+    if padded.size < n_fft:
+        padded = np.pad(padded, (0, n_fft - padded.size))
+    n_frames = 1 + (padded.size - n_fft) // hop_length
+    frames = np.lib.stride_tricks.as_strided(
+        padded,
+        shape=(n_frames, n_fft),
+        strides=(padded.strides[0] * hop_length, padded.strides[0]),
+        writeable=False,
+    )
+    return frames_magnitude(frames, n_fft)
+
+
+def frames_magnitude(frames: np.ndarray, n_fft: int = N_FFT) -> np.ndarray:
+    """Hann-windowed magnitude spectrum of (frames, n_fft) samples -> (bins, frames)."""
+    spectrum = np.fft.rfft(frames * _hann_window(n_fft), axis=1)
+    return np.abs(spectrum).astype(np.float32).T
+
+
+def _hz_to_mel(frequencies: np.ndarray) -> np.ndarray:
+    # Slaney mel scale: linear below 1 kHz, logarithmic above
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    mels = frequencies / f_sp
+    log_region = frequencies >= min_log_hz
+    mels[log_region] = min_log_mel + np.log(frequencies[log_region] / min_log_hz) / logstep
+    return mels
+
+
+def _mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    mels = np.asarray(mels, dtype=np.float64)
+    frequencies = f_sp * mels
+    log_region = mels >= min_log_mel
+    frequencies[log_region] = min_log_hz * np.exp(logstep * (mels[log_region] - min_log_mel))
+    return frequencies
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(sr: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    """Slaney-normalized triangular mel filters, cached per sample rate."""
+    fft_freqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    mel_edges = _hz_to_mel(np.array([0.0, sr / 2.0]))
+    mel_points = _mel_to_hz(np.linspace(mel_edges[0], mel_edges[1], n_mels + 2))
+    fdiff = np.diff(mel_points)
+    ramps = mel_points[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    weights = np.maximum(0.0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_points[2:] - mel_points[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+def pitch_candidates(magnitude: np.ndarray, sr: int, n_fft: int = N_FFT) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolated spectral peaks (150 Hz - 4 kHz) per frame, as in
+    `librosa.piptrack`. Returns sparse (pitches, magnitudes) arrays with the
+    same shape as `magnitude`. Frames are independent of each other.
+    """
+    pitches = np.zeros_like(magnitude)
+    magnitudes = np.zeros_like(magnitude)
+    if magnitude.shape[0] < 3 or not magnitude.size:
+        return pitches, magnitudes
+
+    avg = 0.5 * (magnitude[2:] - magnitude[:-2])
+    shift = 2 * magnitude[1:-1] - magnitude[2:] - magnitude[:-2]
+    shift = avg / (shift + (np.abs(shift) < np.finfo(np.float32).tiny))
+    avg = np.pad(avg, ((1, 1), (0, 0)))
+    shift = np.pad(shift, ((1, 1), (0, 0)))
+    dskew = 0.5 * avg * shift
+
+    fft_freqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    freq_mask = ((PITCH_FMIN <= fft_freqs) & (fft_freqs < PITCH_FMAX))[:, None]
+    reference = PITCH_THRESHOLD * magnitude.max(axis=0, keepdims=True)
+    gated = magnitude * (magnitude > reference)
+    padded = np.pad(gated, ((1, 1), (0, 0)), mode="edge")
+    local_max = (gated > padded[:-2]) & (gated >= padded[2:])
+
+    rows, cols = np.nonzero(freq_mask & local_max)
+    pitches[rows, cols] = (rows + shift[rows, cols]) * sr / n_fft
+    magnitudes[rows, cols] = magnitude[rows, cols] + dskew[rows, cols]
+    return pitches, magnitudes
+
+
+def pitch_from_stft(magnitude: np.ndarray, sr: int, n_fft: int = N_FFT) -> float:
+    """Highest peak whose magnitude is above the median (the speech module's selection rule)."""
+    pitches, magnitudes = pitch_candidates(magnitude, sr, n_fft)
+    if not np.any(magnitudes):
+        return 0.0
+    return float(np.max(pitches[magnitudes > np.median(magnitudes)]))
+
+
+def mel_power(magnitude: np.ndarray, sr: int, n_fft: int = N_FFT) -> np.ndarray:
+    """Mel-band power per frame, shape (N_MELS, frames)."""
+    return _mel_filterbank(sr, n_fft) @ (magnitude * magnitude)
+
+
+def onset_envelope_from_mel(mel: np.ndarray, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """Mean positive log-mel flux per frame (librosa `onset_strength` defaults)."""
+    log_mel = 10.0 * np.log10(np.maximum(1e-10, mel))
+    log_mel = np.maximum(log_mel, log_mel.max() - 80.0)
+
+    flux = np.maximum(0.0, log_mel[:, 1:] - log_mel[:, :-1]).mean(axis=0)
+    pad_width = 1 + n_fft // (2 * hop_length)
+    envelope = np.pad(flux, (pad_width, 0))
+    return envelope[: mel.shape[1]].astype(np.float32)
+
+
+def onset_envelope_from_stft(
+    magnitude: np.ndarray, sr: int, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH
+) -> np.ndarray:
+    return onset_envelope_from_mel(mel_power(magnitude, sr, n_fft), n_fft, hop_length)
+
+
+def tempo_from_onset_envelope(envelope: np.ndarray, sr: int, hop_length: int = HOP_LENGTH) -> float:
+    """Autocorrelation tempogram + log-normal prior around 120 BPM (librosa `tempo` defaults)."""
+    if not envelope.any():
+        return 0.0
+
+    win_length = int(np.floor(TEMPO_AC_SECONDS * sr / hop_length))
+    padded = np.pad(envelope, win_length // 2, mode="linear_ramp", end_values=(0, 0))
+    n_frames = 1 + padded.size - win_length
+    frames = np.lib.stride_tricks.as_strided(
+        padded,
+        shape=(n_frames, win_length),
+        strides=(padded.strides[0], padded.strides[0]),
+        writeable=False,
+    ) * _hann_window(win_length)
+
+    # Autocorrelation of every window via one batched FFT
+    n_pad = 1 << int(np.ceil(np.log2(2 * win_length - 1)))
+    power = np.abs(np.fft.rfft(frames, n=n_pad, axis=1)) ** 2
+    autocorr = np.fft.irfft(power, n=n_pad, axis=1)[:, :win_length]
+    peak = np.max(np.abs(autocorr), axis=1, keepdims=True)
+    peak[peak < np.finfo(autocorr.dtype).tiny] = 1.0
+    tempogram = (autocorr / peak).mean(axis=0)
+
+    with np.errstate(divide="ignore"):
+        bpms = 60.0 * sr / (hop_length * np.arange(win_length, dtype=np.float64))
+        logprior = -0.5 * ((np.log2(bpms) - np.log2(TEMPO_START_BPM)) / TEMPO_STD_BPM) ** 2
+    logprior[: int(np.argmax(bpms < TEMPO_MAX_BPM))] = -np.inf
+    best_period = int(np.argmax(np.log1p(1e6 * tempogram) + logprior))
+    return float(bpms[best_period])
+
+
+def extract_prosody(signal: np.ndarray, sr: int) -> Tuple[float, float, float]:
+    """(energy, pitch, tempo) for one clip from a single shared STFT."""
+    signal = np.asarray(signal, dtype=np.float32)
+    if not signal.size:
+        return 0.0, 0.0, 0.0
+
+    energy = float(np.mean(signal * signal))
+    magnitude = stft_magnitude(signal)
+    pitch = pitch_from_stft(magnitude, sr)
+    tempo = tempo_from_onset_envelope(onset_envelope_from_stft(magnitude, sr), sr)
+    return energy, pitch, tempo
@@ -1,18 +1,63 @@
 import base64
-import io
-from typing import Optional
+from typing import Callable, Optional, Union
 
-from PIL import Image
+import cv2
+import numpy as np
 
+from app.utils.camera import decode_image_bytes, image_dimensions
 
-def decode_base64_screen(image_b64: str) -> Optional[Image.Image]:
+
+def decode_screen_bytes(
+    image_bytes: Union[bytes, memoryview],
+    fit_width: Optional[Callable[[int], int]] = None,
+    grayscale: bool = False,
+) -> Optional[np.ndarray]:
+    """
+    Decode a screenshot to a BGR (or grayscale) array. `fit_width` maps the
+    source width to the width the caller wants; the JPEG is then decoded at a
+    reduced scale and only the remaining step is resized here.
+    """
+    if not image_bytes:
+        return None
+
+    target_width = None
+    dimensions = image_dimensions(image_bytes)
+    if fit_width and dimensions:
+        width, height = dimensions
+        target_width = fit_width(width)
+        if target_width < width:
+            image = decode_image_bytes(image_bytes, max_size=(target_width, height), grayscale=grayscale)
+        else:
+            image = decode_image_bytes(image_bytes, grayscale=grayscale)
+    else:
+        image = decode_image_bytes(image_bytes, grayscale=grayscale)
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    if fit_width and target_width is None:
+        target_width = fit_width(width)
+    if target_width and target_width < width:
+        target_height = max(1, round(height * target_width / width))
+        image = cv2.resize(image, (target_width, target_height), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def decode_base64_screen(
+    image_b64: Union[str, bytes, memoryview],
+    fit_width: Optional[Callable[[int], int]] = None,
+    grayscale: bool = False,
+) -> Optional[np.ndarray]:
     if not image_b64:
         return None
+    if not isinstance(image_b64, str):
+        return decode_screen_bytes(image_b64, fit_width, grayscale)
 
     if "," in image_b64:
         image_b64 = image_b64.split(",")[1]
 
     try:
-        return Image.open(io.BytesIO(base64.b64decode(image_b64))).convert("RGB")
+        image_bytes = base64.b64decode(image_b64)
     except Exception:
         return None
+    return decode_screen_bytes(image_bytes, fit_width, grayscale)
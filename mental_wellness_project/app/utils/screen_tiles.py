@@ -0,0 +1,156 @@
+"""
+Dirty-tile bookkeeping for incremental screen OCR.
+
+A screenshot is cut into horizontal bands (optionally split into columns)
+that overlap slightly, so a text line cut by one band boundary is still
+whole in the neighbouring band. Each tile's pixels are hashed; only tiles
+whose hash changed since the session's previous capture are re-OCR'd, the
+rest reuse their cached (box, text) lines.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+def tile_grid(width: int, height: int, tile_height: int, columns: int = 1, overlap: int = 0) -> List[Rect]:
+    """Tile rectangles in reading order (top to bottom, then left to right)."""
+    tile_height = max(1, int(tile_height))
+    columns = max(1, int(columns))
+    column_edges = [round(width * index / columns) for index in range(columns + 1)]
+    rects = []
+    for y in range(0, height, tile_height):
+        band_height = min(tile_height + overlap, height - y)
+        for x0, x1 in zip(column_edges, column_edges[1:]):
+            rects.append((x0, y, x1 - x0, band_height))
+    return rects
+
+
+def tile_digest(image: np.ndarray, rect: Rect) -> bytes:
+    x, y, w, h = rect
+    tile = np.ascontiguousarray(image[y:y + h, x:x + w])  # no copy for full-width bands
+    return hashlib.blake2b(tile, digest_size=16).digest()
+
+
+def _seam_repeat(above: Sequence[str], below: Sequence[str], max_lines: int) -> int:
+    """How many leading lines of `below` repeat the trailing lines of `above` (at most `max_lines`)."""
+    for count in range(min(max_lines, len(above), len(below)), 0, -1):
+        if list(above[-count:]) == list(below[:count]):
+            return count
+    return 0
+
+
+def stitch_lines(
+    tile_lines: Sequence[Sequence[Tuple[Rect, str]]],
+    tile_rects: Sequence[Rect],
+    max_seam_lines: int = 2,
+) -> Tuple[str, List[Tuple[int, int, Rect]]]:
+    """
+    Join the (box, text) entries of every tile in order. Returns the text
+    and a (start, end, box) span per line, so text offsets map back to boxes.
+
+    Lines are only dropped where two bands overlap, never just because they
+    repeat the line before (repeated chat messages, tables of equal values).
+    Detected line boxes (and blocks of them) belong to exactly one tile, so
+    they never repeat.
+    A tile read whole (its entry's box is the tile) has no per-line
+    positions; there, only leading lines that repeat the trailing lines of
+    the band above it are dropped, and at most `max_seam_lines`, the
+    number of lines that fit in the overlap.
+    """
+    lines: List[str] = []
+    spans: List[Tuple[int, int, Rect]] = []
+    offset = 0
+    tails: Dict[int, List[str]] = {}  # lines of tiles read whole, by tile index
+    for index, (entries, tile) in enumerate(zip(tile_lines, tile_rects)):
+        for rect, text in entries:
+            entry_lines = [line for line in text.split("\n") if line]
+            if tuple(rect) == tuple(tile):
+                tails[index] = entry_lines
+                above = _tile_above(tile_rects, index)
+                if above in tails:
+                    entry_lines = entry_lines[_seam_repeat(tails[above], entry_lines, max_seam_lines):]
+            for line in entry_lines:
+                lines.append(line)
+                spans.append((offset, offset + len(line), rect))
+                offset += len(line) + 1
+    return "\n".join(lines), spans
+
+
+def _tile_above(tile_rects: Sequence[Rect], index: int) -> Optional[int]:
+    """The earlier tile in the same column whose band overlaps the top of tile `index`."""
+    x, y, w, _ = tile_rects[index]
+    for other in range(index - 1, -1, -1):
+        other_x, other_y, other_w, other_h = tile_rects[other]
+        if other_x == x and other_w == w and other_y < y < other_y + other_h:
+            return other
+    return None
+
+
+def locate_hits(hits: Sequence[Tuple[str, int, int]], spans: Sequence[Tuple[int, int, Rect]]) -> List[Dict]:
+    """Attach the box of the line each (keyword, start, end) hit falls on."""
+    located = []
+    for keyword, start, _ in hits:
+        for span_start, span_end, rect in spans:
+            if span_start <= start < span_end:
+                located.append({"keyword": keyword, "box": list(rect)})
+                break
+    return located
+
+
+@dataclass
+class TileState:
+    rects: List[Rect] = field(default_factory=list)
+    digests: List[Optional[bytes]] = field(default_factory=list)
+    lines: List[List[Tuple[Rect, str]]] = field(default_factory=list)  # (box, text) read in each tile
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def reset(self, rects: List[Rect]) -> None:
+        self.rects = rects
+        self.digests = [None] * len(rects)
+        self.lines = [[] for _ in rects]
+
+    def dirty_tiles(self, image: np.ndarray) -> List[Tuple[int, bytes]]:
+        """(index, new digest) of every tile whose pixels changed since the last capture."""
+        self.updated_at = time.monotonic()
+        dirty = []
+        for index, rect in enumerate(self.rects):
+            digest = tile_digest(image, rect)
+            if digest != self.digests[index]:
+                dirty.append((index, digest))
+        return dirty
+
+
+class TileTextStore:
+    """Bounded LRU of per-session tile states; idle sessions expire after `idle_seconds`."""
+
+    def __init__(self, max_sessions: int = 64, idle_seconds: float = 300.0):
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_seconds = idle_seconds
+        self._states: "OrderedDict[str, TileState]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id: str) -> Tuple[TileState, threading.Lock]:
+        """Return the session's tile state and its lock (hold the lock while using the state)."""
+        with self._lock:
+            now = time.monotonic()
+            for key in [key for key, state in self._states.items() if now - state.updated_at > self.idle_seconds]:
+                del self._states[key]
+                self._locks.pop(key, None)
+            state = self._states.get(session_id)
+            if state is None:
+                state = TileState()
+                self._states[session_id] = state
+                self._locks[session_id] = threading.Lock()
+                while len(self._states) > self.max_sessions:
+                    evicted, _ = self._states.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            self._states.move_to_end(session_id)
+            return state, self._locks[session_id]
@@ -0,0 +1,92 @@
+"""
+Cheap text-line localization for screen OCR.
+
+Characters have strong, dense edges: a morphological gradient picks them
+out, a horizontal closing joins the characters of a line into one blob,
+and connected components whose size and fill look like a line of text
+become OCR crops. Photos, video and empty background are mostly rejected
+before any OCR runs.
+"""
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+@lru_cache(maxsize=8)
+def _kernel(shape: int, size: Tuple[int, int]) -> np.ndarray:
+    return cv2.getStructuringElement(shape, size)
+
+
+def detect_text_lines(
+    gray: np.ndarray,
+    min_height: int = 6,
+    max_height: int = 64,
+    min_width: int = 10,
+    min_fill: float = 0.35,
+    join_gap: int = 9,
+    padding: int = 3,
+    max_regions: int = 200,
+) -> List[Rect]:
+    """
+    Boxes of likely text lines in a grayscale image, in reading order
+    (top to bottom, then left to right). `join_gap` is the widest gap in
+    pixels that still joins two characters/words into the same line.
+    """
+    if gray.ndim != 2 or gray.size == 0:
+        return []
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, _kernel(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    joined = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, _kernel(cv2.MORPH_RECT, (join_gap, 1)))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+
+    x, y, w, h, area = stats[1:].T  # row 0 is the background
+    fill = area / np.maximum(w * h, 1)
+    keep = (h >= min_height) & (h <= max_height) & (w >= min_width) & (w >= h) & (fill >= min_fill)
+    boxes = stats[1:][keep, :4]
+    if len(boxes) > max_regions:
+        # Textured images can produce many small blobs; keep the largest candidates
+        boxes = boxes[np.argsort(-(boxes[:, 2] * boxes[:, 3]))[:max_regions]]
+
+    frame_h, frame_w = gray.shape
+    x0 = np.maximum(boxes[:, 0] - padding, 0)
+    y0 = np.maximum(boxes[:, 1] - padding, 0)
+    x1 = np.minimum(boxes[:, 0] + boxes[:, 2] + padding, frame_w)
+    y1 = np.minimum(boxes[:, 1] + boxes[:, 3] + padding, frame_h)
+    order = np.lexsort((x0, y0))
+    return [(int(x0[i]), int(y0[i]), int(x1[i] - x0[i]), int(y1[i] - y0[i])) for i in order]
+
+
+def group_lines(boxes: Sequence[Rect], max_gap: float = 1.0) -> List[List[Rect]]:
+    """
+    Merge text-line boxes (in reading order) into blocks of vertically
+    adjacent lines: a line joins a block when it overlaps the block
+    horizontally and starts at most `max_gap` line heights below the block's
+    last line. Side-by-side columns stay separate blocks.
+    """
+    blocks: List[List[Rect]] = []
+    for box in boxes:
+        x, y, w, h = box
+        for block in blocks:
+            _, last_y, _, last_h = block[-1]
+            left = min(line[0] for line in block)
+            right = max(line[0] + line[2] for line in block)
+            gap = y - (last_y + last_h)
+            if x < right and left < x + w and -last_h / 2 < gap <= max_gap * max(h, last_h):
+                block.append(box)
+                break
+        else:
+            blocks.append([box])
+    return blocks
+
+
+def union_box(boxes: Sequence[Rect]) -> Rect:
+    """Smallest box containing every box in `boxes`."""
+    x0 = min(box[0] for box in boxes)
+    y0 = min(box[1] for box in boxes)
+    x1 = max(box[0] + box[2] for box in boxes)
+    y1 = max(box[1] + box[3] for box in boxes)
+    return x0, y0, x1 - x0, y1 - y0
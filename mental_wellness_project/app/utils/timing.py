@@ -0,0 +1,15 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], stage: str):
+    """Add the block's wall time in ms to `timings[stage]`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            elapsed = (time.perf_counter() - started) * 1000
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 2)
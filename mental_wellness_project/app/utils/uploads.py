@@ -0,0 +1,70 @@
+"""
+Read media uploads without base64: multipart parts or a raw request body.
+
+Media fields come back as memoryviews over the received bytes, so the
+decoders can work on them directly. Every read is capped and oversized
+uploads are rejected from Content-Length before any body is read.
+"""
+from typing import Dict, Optional
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+RAW_MEDIA_MIMETYPES = ("image/", "audio/", "application/octet-stream")
+_READ_BLOCK = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """An uploaded body or part exceeded its size cap."""
+
+
+def is_multipart(request) -> bool:
+    return request.mimetype == "multipart/form-data"
+
+
+def is_raw_media(request) -> bool:
+    return request.mimetype.startswith(RAW_MEDIA_MIMETYPES)
+
+
+def _read_capped(stream, max_bytes: int, field: str, expected: Optional[int] = None) -> memoryview:
+    if expected is not None and expected > max_bytes:
+        raise UploadTooLarge(f"{field} exceeds {max_bytes} bytes")
+    buffer = bytearray()
+    while True:
+        block = stream.read(_READ_BLOCK)
+        if not block:
+            break
+        if len(buffer) + len(block) > max_bytes:
+            raise UploadTooLarge(f"{field} exceeds {max_bytes} bytes")
+        buffer += block
+    return memoryview(buffer)
+
+
+def read_raw_body(request, max_bytes: int, field: str = "body") -> memoryview:
+    """The whole request body, read in blocks straight from the WSGI stream."""
+    return _read_capped(request.stream, max_bytes, field, request.content_length)
+
+
+def read_multipart(request, limits: Dict[str, int]) -> Dict:
+    """
+    Form fields plus the file parts named in `limits` (field -> max bytes).
+    The body is capped at the sum of the limits before Werkzeug parses (and
+    spools) it, so an oversized upload is rejected while it is being read;
+    each part is then checked against its own limit.
+    """
+    # Room for the form fields and part headers on top of the media
+    max_bytes = sum(limits.values()) + _READ_BLOCK
+    if request.max_content_length is None or request.max_content_length > max_bytes:
+        request.max_content_length = max_bytes
+    try:
+        payload: Dict = request.form.to_dict()
+        files = request.files
+    except RequestEntityTooLarge as e:
+        raise UploadTooLarge("multipart body exceeds the combined media limits") from e
+    for field, max_bytes in limits.items():
+        part = files.get(field)
+        if part is None:
+            continue
+        data = _read_capped(part.stream, max_bytes, field)
+        if data.nbytes:
+            payload[field] = data
+    return payload
@@ -0,0 +1,102 @@
+"""
+Cheap voice-activity detection from frame energy and zero-crossing rate.
+
+Runs on the decoded clip before any spectral work so silent or hum-only
+clips never reach the prosody pipeline, and voiced clips are trimmed to
+the span from their first to their last voiced frame.
+
+Pauses inside that span are kept rather than cut out: splicing voiced
+frames back to back would put artificial onsets and pitch jumps at every
+join (skewing tempo and pitch), and would make the energy contour depend
+on the per-clip noise floor. A soft stretch of speech between louder ones
+therefore always reaches the prosody pipeline, even when it falls under
+the gate's threshold; only the clip's leading and trailing non-speech is
+dropped.
+"""
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+
+@dataclass
+class VoiceActivity:
+    voiced: np.ndarray  # the clip from its first to its last voiced frame (float32)
+    total_seconds: float
+    voiced_seconds: float  # frames that passed the gate
+    kept_seconds: float = 0.0  # length of `voiced`, pauses inside it included
+
+    @property
+    def has_speech(self) -> bool:
+        return self.voiced.size > 0
+
+    def to_dict(self) -> Dict:
+        discarded = max(0.0, self.total_seconds - self.kept_seconds)
+        return {
+            "voiced_seconds": round(self.voiced_seconds, 3),
+            "analyzed_seconds": round(self.kept_seconds, 3),
+            "discarded_seconds": round(discarded, 3),
+            "discarded_fraction": round(discarded / self.total_seconds, 3) if self.total_seconds else 0.0,
+        }
+
+
+def frame_activity(
+    signal: np.ndarray,
+    frame_length: int,
+    margin_db: float = 6.0,
+    floor_db: float = -55.0,
+    max_zcr: float = 0.25,
+) -> np.ndarray:
+    """
+    Boolean speech mask per non-overlapping frame. A frame is voiced when its
+    energy clears both an absolute floor and the clip's noise floor (10th
+    percentile frame energy) by `margin_db`, and its zero-crossing rate is
+    below `max_zcr` (broadband hiss crosses zero far more often than voice).
+    Steady hum has no frames above its own noise floor, so it is rejected too.
+    """
+    n_frames = signal.size // frame_length
+    if not n_frames:
+        return np.zeros(0, dtype=bool)
+    frames = signal[: n_frames * frame_length].reshape(n_frames, frame_length)
+
+    energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame_length + 1e-12)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+
+    threshold = max(floor_db, float(np.percentile(energy_db, 10)) + margin_db)
+    return (energy_db > threshold) & (zcr < max_zcr)
+
+
+def detect_voice(
+    signal: np.ndarray,
+    sr: int,
+    frame_ms: float = 20.0,
+    margin_db: float = 6.0,
+    floor_db: float = -55.0,
+    max_zcr: float = 0.25,
+    hangover_frames: int = 3,
+    min_speech_seconds: float = 0.2,
+) -> VoiceActivity:
+    """
+    Trim `signal` to the span between its first and last voiced frames,
+    keeping its timing (empty when there is too little speech).
+    """
+    signal = np.asarray(signal, dtype=np.float32)
+    total_seconds = signal.size / sr if sr else 0.0
+    frame_length = max(2, int(sr * frame_ms / 1000.0))
+    active = frame_activity(signal, frame_length, margin_db, floor_db, max_zcr)
+
+    if hangover_frames > 0 and active.any():
+        # Keep a few frames either side of each voiced run so onsets and decays survive
+        kernel = np.ones(2 * hangover_frames + 1)
+        active = np.convolve(active.astype(np.float32), kernel, mode="same") > 0
+
+    voiced_seconds = float(np.count_nonzero(active)) * frame_length / sr
+    if voiced_seconds < min_speech_seconds:
+        return VoiceActivity(np.zeros(0, dtype=np.float32), total_seconds, 0.0)
+
+    voiced_frames = np.flatnonzero(active)
+    start, end = voiced_frames[0] * frame_length, (voiced_frames[-1] + 1) * frame_length
+    if voiced_frames[-1] == active.size - 1:
+        end = signal.size  # keep the partial frame at the end of a clip that ends in speech
+    return VoiceActivity(signal[start:end], total_seconds, voiced_seconds, (end - start) / sr)
@@ -0,0 +1,129 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+from app.config import settings
+
+
+def _warm_text_sentiment():
+    from app.models.text_sentiment import warm_up
+
+    warm_up()
+
+
+def _warm_face_dnn():
+    from app.models.facial_expression import warm_up_face_detector
+
+    warm_up_face_detector()
+
+
+def _warm_fer():
+    from app.models.facial_expression import warm_up_fer
+
+    warm_up_fer()
+
+
+def _warm_tesseract():
+    from app.models.screen_ocr import warm_up_tesseract
+
+    warm_up_tesseract()
+
+
+def _warm_easyocr():
+    from app.models.screen_ocr import warm_up_easyocr
+
+    warm_up_easyocr()
+
+
+# Each task loads one model and runs a dummy inference through it
+WARMUP_TASKS: Dict[str, Callable[[], None]] = {
+    "text_sentiment": _warm_text_sentiment,
+    "face_dnn": _warm_face_dnn,
+    "fer": _warm_fer,
+    "tesseract": _warm_tesseract,
+    "easyocr": _warm_easyocr,
+}
+
+
+@dataclass
+class ModelState:
+    name: str
+    state: str = "pending"  # pending | loading | ready | failed
+    load_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+_states: Dict[str, ModelState] = {}
+_states_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def _run_warmup(names) -> None:
+    for name in names:
+        with _states_lock:
+            _states[name].state = "loading"
+        started = time.perf_counter()
+        try:
+            WARMUP_TASKS[name]()
+            state, error = "ready", None
+            print(f"Warm-up: {name} ready in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            state, error = "failed", str(e)[:200]
+            print(f"Warm-up: {name} failed: {e}")
+        with _states_lock:
+            _states[name].state = state
+            _states[name].error = error
+            _states[name].load_seconds = round(time.perf_counter() - started, 3)
+
+
+def start_warmup(names: Optional[Iterable[str]] = None) -> Optional[threading.Thread]:
+    """Load every model in a background thread (once per process)."""
+    global _warmup_thread
+    names = [name for name in (names or settings.warmup_models) if name in WARMUP_TASKS]
+    with _states_lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+        for name in names:
+            _states[name] = ModelState(name)
+        _warmup_thread = threading.Thread(target=_run_warmup, args=(names,), name="model-warmup", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+def readiness() -> Dict:
+    """
+    Per-model warm-up state. The instance is ready once every model has
+    finished loading and none of the required ones failed; a failed
+    optional model (`settings.warmup_optional_models`) is reported under
+    `failed` but does not block readiness, since that modality degrades
+    to its fallback, unless every model of its `warmup_fallback_groups`
+    group failed.
+    """
+    with _states_lock:
+        models = {name: state.to_dict() for name, state in _states.items()}
+        started = _warmup_thread is not None
+    if not started:
+        return {"ready": True, "warmup": "disabled", "models": {}}
+
+    finished = all(model["state"] in {"ready", "failed"} for model in models.values())
+    failed = [name for name, model in models.items() if model["state"] == "failed"]
+    failed_required = [name for name in failed if name not in settings.warmup_optional_models]
+    for group in settings.warmup_fallback_groups:
+        if all(name in failed for name in group):
+            failed_required.extend(name for name in group if name not in failed_required)
+    return {
+        "ready": finished and not failed_required,
+        "warmup": ("failed" if failed_required else "complete") if finished else "running",
+        "degraded": bool(failed),
+        "failed": failed,
+        "failed_required": failed_required,
+        "models": models,
+    }
@@ -21,6 +21,8 @@ let alertCooldownUntil = 0; // Timestamp when alert cooldown expires (millisecon
 const ALERT_COOLDOWN_MS = 30000; // 30 seconds cooldown between alerts
 let recognition = null; // Web Speech Recognition API for voice input
 let isListening = false; // Track if voice recognition is active
+// Per-tab session id so the backend keeps separate voice baselines / caches
+const SESSION_ID = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : `s-${Date.now()}-${Math.random().toString(16).slice(2)}`;
 
 // Initialize when DOM is ready
 function initializeApp() {
@@ -721,10 +723,10 @@ function setupAudioRecorder(stream) {
     if (event.data && event.data.size > 0) {
       console.log(`Audio data received: ${event.data.size} bytes, type: ${event.data.type}`);
       try {
-        const audio64 = await blobToBase64(event.data);
+        const wavBlob = await blobToWav(event.data);
         // Store latest audio data for next snapshot
-        if (audio64) {
-          pendingAudioData = audio64;
+        if (wavBlob) {
+          pendingAudioData = wavBlob;
           console.log("Audio data stored, will be included in next snapshot");
         } else {
           console.warn("Skipping audio - WAV conversion failed");
@@ -757,9 +759,11 @@ function setupAudioRecorder(stream) {
 }
 
 async function pushMonitorSnapshot(overrides = {}) {
-  // Capture frames efficiently
-  const frame = captureFrame(cameraStreamEl);
-  const screen = captureFrame(screenStreamEl);
+  // Capture frames efficiently (encoded JPEG blobs, uploaded as binary parts)
+  const [frame, screen] = await Promise.all([
+    captureFrame(cameraStreamEl),
+    captureFrame(screenStreamEl),
+  ]);
 
   // Always try to process even if one stream is missing (better for screen detection)
   if (!frame && !screen && !pendingAudioData) {
@@ -776,7 +780,7 @@ async function pushMonitorSnapshot(overrides = {}) {
   const audioData = overrides.audio || pendingAudioData;
   
   // Optimize payload - always send screen if available (important for detection)
-  const payload = {};
+  const payload = { session_id: SESSION_ID };
   if (frame) payload.frame = frame;
   if (screen) payload.screen = screen;  // Always include screen if available
   if (audioData) payload.audio = audioData;
@@ -793,11 +797,17 @@ async function pushMonitorSnapshot(overrides = {}) {
 async function sendMonitorRequest(payload) {
   // Reduced logging for performance
 
+  // multipart/form-data: media go up as raw bytes instead of base64 inside JSON
+  const form = new FormData();
+  form.append("session_id", payload.session_id);
+  if (payload.frame) form.append("frame", payload.frame, "frame.jpg");
+  if (payload.screen) form.append("screen", payload.screen, "screen.jpg");
+  if (payload.audio) form.append("audio", payload.audio, "clip.wav");
+
   try {
     const res = await fetch("/api/v1/monitor", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
+      body: form,
     });
     
     if (!res.ok) {
@@ -966,7 +976,7 @@ function renderMonitorResult(data) {
   updateMiniDisplay(data);
 }
 
-function captureFrame(videoEl) {
+async function captureFrame(videoEl) {
   if (!videoEl || videoEl.readyState < 2 || videoEl.videoWidth === 0 || videoEl.videoHeight === 0) {
     return null;
   }
@@ -998,19 +1008,18 @@ function captureFrame(videoEl) {
     ctx.drawImage(videoEl, 0, 0, canvas.width, canvas.height);
     
     // Use JPEG with quality 0.85 to reduce size further (PNG is much larger)
-    return canvas.toDataURL("image/jpeg", 0.85);
+    return await new Promise((resolve) => canvas.toBlob(resolve, "image/jpeg", 0.85));
   } catch (err) {
     console.warn("Frame capture error:", err);
     return null;
   }
 }
 
-async function blobToBase64(blob) {
+async function blobToWav(blob) {
   if (blob?.type?.startsWith("audio/")) {
     try {
       // Always convert WebM/OGG to WAV for cloud-friendly backend (no FFmpeg needed)
-      const wavBlob = await convertAudioBlobToWav(blob);
-      return await blobToDataURL(wavBlob);
+      return await convertAudioBlobToWav(blob);
     } catch (err) {
       console.error("WAV conversion failed:", err);
       // If conversion fails, return empty to skip audio analysis
@@ -1018,16 +1027,7 @@ async function blobToBase64(blob) {
       return null;
     }
   }
-  return await blobToDataURL(blob);
-}
-
-function blobToDataURL(blob) {
-  return new Promise((resolve, reject) => {
-    const reader = new FileReader();
-    reader.onloadend = () => resolve(reader.result);
-    reader.onerror = reject;
-    reader.readAsDataURL(blob);
-  });
+  return blob;
 }
 
 function requestNotificationPermission() {
@@ -1,6 +1,105 @@
+import argparse
+import json
+
+from werkzeug.serving import is_running_from_reloader
+
+# `flask --app run run` finds this factory and calls it; the app is only built to serve
 from app import create_app
 
-app = create_app()
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Run the AIP-MWA backend or one of its maintenance tools.")
+    parser.add_argument(
+        "--benchmark-sentiment",
+        action="store_true",
+        help="Report load time and latency of every sentiment backend, then exit.",
+    )
+    parser.add_argument(
+        "--check-sentiment-parity",
+        metavar="BACKEND",
+        help="Compare BACKEND (onnx / onnx-int8) against the PyTorch pipeline, then exit.",
+    )
+    parser.add_argument(
+        "--check-speech-parity",
+        action="store_true",
+        help="Compare the NumPy prosody features against the librosa reference, then exit.",
+    )
+    parser.add_argument(
+        "--benchmark-speech",
+        action="store_true",
+        help="Time the librosa and NumPy prosody feature engines, then exit.",
+    )
+    parser.add_argument(
+        "--benchmark-audio-decode",
+        action="store_true",
+        help="Time the fast WAV decode + polyphase resample path against the previous chain, then exit.",
+    )
+    parser.add_argument(
+        "--benchmark-face-preprocess",
+        action="store_true",
+        help="Time the face-crop enhancement against the previous full-frame preprocessing, then exit.",
+    )
+    parser.add_argument(
+        "--benchmark-ocr",
+        action="store_true",
+        help="Time per-call latency of the pytesseract and in-process tesserocr OCR engines, then exit.",
+    )
+    parser.add_argument(
+        "--import-report",
+        action="store_true",
+        help="Print the per-module import cost of starting the app, then exit.",
+    )
+    args = parser.parse_args()
+
+    if args.check_speech_parity:
+        from app.models.speech_emotion import check_feature_parity
+
+        report = check_feature_parity()
+        print(json.dumps(report, indent=2))
+        raise SystemExit(0 if report["passed"] else 1)
+    if args.benchmark_speech:
+        from app.models.speech_emotion import benchmark_feature_engines
+
+        print(json.dumps(benchmark_feature_engines(), indent=2))
+        return
+    if args.benchmark_audio_decode:
+        from app.utils.microphone import benchmark_audio_decode
+
+        print(json.dumps(benchmark_audio_decode(), indent=2))
+        return
+    if args.benchmark_face_preprocess:
+        from app.models.facial_expression import benchmark_face_preprocessing
+
+        print(json.dumps(benchmark_face_preprocessing(), indent=2))
+        return
+    if args.benchmark_ocr:
+        from app.models.ocr_engines import benchmark_ocr_engines
+
+        print(json.dumps(benchmark_ocr_engines(), indent=2))
+        return
+    if args.import_report:
+        from app.utils.import_profiler import format_report, import_time_report
+
+        print(format_report(import_time_report()))
+        return
+
+    if args.benchmark_sentiment:
+        from app.models.sentiment_backends import benchmark_backends
+
+        print(json.dumps(benchmark_backends(), indent=2))
+        return
+    if args.check_sentiment_parity:
+        from app.models.sentiment_backends import check_backend_parity
+
+        report = check_backend_parity(args.check_sentiment_parity)
+        print(json.dumps(report, indent=2))
+        raise SystemExit(0 if report["passed"] else 1)
+
+    # The debug reloader re-runs this script in a child process that serves the requests;
+    # only that one warms the models up
+    app = create_app(warm_up=None if is_running_from_reloader() else False)
     app.run(debug=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the `app` package from the project root (run.py's directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.utils.audio_stream import AudioRingBuffer, StreamingProsody
+from app.utils.microphone import DEFAULT_SR, StreamResampler, _resample_polyphase
+from app.utils.prosody import extract_prosody
+
+
+def _voice_like(seconds, sr):
+    t = np.arange(int(seconds * sr), dtype=np.float32) / sr
+    gate = np.sin(2 * np.pi * 2.0 * t) > 0
+    noise = 0.02 * np.random.default_rng(0).standard_normal(t.size)
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * gate + noise).astype(np.float32)
+
+
+def test_ring_buffer_keeps_the_latest_samples():
+    ring = AudioRingBuffer(5)
+    ring.append(np.arange(3, dtype=np.float32))
+    ring.append(np.arange(3, 7, dtype=np.float32))
+    assert ring.filled == 5
+    assert ring.sum_of_squares() == pytest.approx(sum(value * value for value in range(2, 7)))
+
+
+@pytest.mark.parametrize("sr", [48000, 44100, 8000])
+def test_stream_resampler_matches_one_shot_resampling(sr):
+    clip = _voice_like(3.0, sr)
+    expected = _resample_polyphase(clip, sr, DEFAULT_SR)
+    resampler = StreamResampler(sr, DEFAULT_SR)
+    pieces = np.split(clip, [1, 1000, 32768, 40000, 100001])
+    streamed = np.concatenate([resampler.process(piece) for piece in pieces])
+
+    # Only the last few samples wait for input that has not arrived yet
+    assert expected.size - 64 <= streamed.size <= expected.size
+    np.testing.assert_allclose(streamed, expected[: streamed.size], atol=1e-5)
+
+
+def test_streamed_48k_audio_matches_offline_features():
+    clip = _voice_like(3.0, 48000)
+    stream = StreamingProsody(DEFAULT_SR, window_seconds=10.0)
+    for start in range(0, clip.size, 32768):  # 64 KB of s16le per block, as the route reads it
+        stream.push(clip[start:start + 32768], 48000)
+
+    resampled = _resample_polyphase(clip, 48000, DEFAULT_SR)
+    assert resampled.size - 16 <= stream.total_samples <= resampled.size
+    energy, pitch, _ = stream.features()
+    expected_energy, expected_pitch, _ = extract_prosody(resampled[: stream.total_samples], DEFAULT_SR)
+    assert energy == pytest.approx(expected_energy, rel=1e-4)
+    assert pitch == pytest.approx(expected_pitch, rel=1e-2)
+
+
+def test_stream_route_resamples_across_request_blocks(monkeypatch):
+    from app import create_app
+    from app.models import speech_emotion
+    from app.utils.online_stats import OnlineNormalizer
+
+    # No baseline snapshot file
+    monkeypatch.setattr(speech_emotion, "_normalizer", lambda: OnlineNormalizer(dims=3))
+
+    clip = _voice_like(3.0, 48000)
+    body = (clip * 32767).astype("<i2").tobytes()
+    client = create_app(warm_up=False).test_client()
+    response = client.post(
+        "/api/v1/audio/stream?session_id=test-48k&sr=48000&format=s16le",
+        data=body,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 200
+    assert response.get_json()["stream"]["received_seconds"] == pytest.approx(3.0, abs=0.002)
+    client.delete("/api/v1/audio/stream?session_id=test-48k")
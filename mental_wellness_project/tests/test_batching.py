@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from app.utils.batching import MicroBatcher
+
+
+def test_concurrent_calls_share_a_batch_and_get_their_own_result():
+    batches = []
+    release = threading.Event()
+
+    def process(items):
+        release.wait(1.0)
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+    results = {}
+
+    def call(value):
+        results[value] = batcher.submit(value)
+
+    threads = [threading.Thread(target=call, args=(value,)) for value in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(2.0)
+
+    assert results == {value: value * 10 for value in range(5)}
+    assert sum(len(batch) for batch in batches) == 5
+    assert len(batches) < 5
+
+
+def test_batches_respect_max_batch_size():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or items, max_batch_size=3, max_wait_ms=20)
+
+    assert batcher.submit_many(list(range(7))) == list(range(7))
+    assert all(len(batch) <= 3 for batch in batches)
+    assert [item for batch in batches for item in batch] == list(range(7))
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def process(items):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(process, max_wait_ms=1)
+    with pytest.raises(ValueError, match="model failed"):
+        batcher.submit("text")
+    # The worker survives a failed batch
+    batcher._process_batch = lambda items: [item.upper() for item in items]
+    assert batcher.submit("ok") == "OK"
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="0 results for 1 items"):
+        batcher.submit("text")
+
+
+def test_submit_many_empty():
+    assert MicroBatcher(lambda items: items).submit_many([]) == []
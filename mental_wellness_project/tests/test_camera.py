@@ -0,0 +1,76 @@
+import base64
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.utils.camera import decode_base64_image, decode_image_bytes, image_dimensions, reduction_factor
+from app.utils.screen_capture import decode_base64_screen
+
+
+def _encoded(extension: str, width: int = 320, height: int = 200, **params) -> bytes:
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.rectangle(image, (10, 10), (width // 2, height // 2), (0, 128, 255), -1)
+    flags = [flag for pair in params.items() for flag in (getattr(cv2, pair[0]), pair[1])]
+    return cv2.imencode(extension, image, flags)[1].tobytes()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        _encoded(".png"),
+        _encoded(".jpg"),
+        _encoded(".jpg", IMWRITE_JPEG_PROGRESSIVE=1),
+    ],
+    ids=["png", "baseline-jpeg", "progressive-jpeg"],
+)
+def test_image_dimensions_reads_the_header(data):
+    assert image_dimensions(data) == (320, 200)
+    assert image_dimensions(memoryview(data)) == (320, 200)
+
+
+def test_image_dimensions_of_other_data_is_none():
+    assert image_dimensions(b"GIF89a" + bytes(20)) is None
+    assert image_dimensions(b"\xff\xd8\x00") is None
+    assert image_dimensions(b"") is None
+
+
+@pytest.mark.parametrize(
+    "size, max_size, factor",
+    [
+        ((640, 480), (640, 480), 1),
+        ((1280, 960), (640, 480), 2),
+        ((1300, 960), (640, 480), 2),
+        ((2560, 1920), (640, 480), 4),
+        ((5120, 3840), (640, 480), 8),
+        ((10240, 7680), (640, 480), 8),
+        ((1920, 1080), (640, 480), 2),  # height limits to 0.44, so 1/2 still covers the 853x480 fit
+    ],
+)
+def test_reduction_factor(size, max_size, factor):
+    assert reduction_factor(size, max_size) == factor
+
+
+def test_reduced_decode_still_covers_the_target_box():
+    data = _encoded(".jpg", width=1920, height=1080)
+    image = decode_image_bytes(data, max_size=(640, 480))
+    assert image.shape == (540, 960, 3)
+
+
+def test_data_url_and_pil_fallback():
+    png = _encoded(".png")
+    assert decode_base64_image("data:image/png;base64," + base64.b64encode(png).decode()).shape == (200, 320, 3)
+    # A GIF is not decodable by OpenCV and goes through PIL
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (255, 0, 0)).save(buffer, format="GIF")
+    image = decode_image_bytes(buffer.getvalue())
+    assert image.shape == (30, 40, 3) and tuple(image[0, 0]) == (0, 0, 255)
+    assert decode_base64_image("not base64!") is None
+
+
+def test_screen_decode_fits_width_in_grayscale():
+    data = _encoded(".jpg", width=2560, height=1440)
+    screen = decode_base64_screen(data, fit_width=lambda width: 1280, grayscale=True)
+    assert screen.shape == (720, 1280)
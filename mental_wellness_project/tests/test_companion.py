@@ -0,0 +1,27 @@
+import sys
+
+import pytest
+
+from app import routes
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app import create_app
+
+    monkeypatch.setattr(routes, "log_interaction", lambda *args, **kwargs: None)
+    return create_app(warm_up=False).test_client()
+
+
+def test_missing_openai_package_returns_a_json_error(client, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", None)  # makes `import openai` raise ImportError
+    response = client.post("/api/v1/companion", json={"message": "hello"})
+    assert response.status_code == 500
+    assert "pip install openai" in response.get_json()["error"]
+
+
+def test_empty_message_is_rejected_without_openai(client, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", None)
+    response = client.post("/api/v1/companion", json={"message": "  "})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "message is required"}
@@ -0,0 +1,90 @@
+import time
+
+import cv2
+import numpy as np
+
+from app.utils.face_tracker import FaceTrack, FaceTracker, FaceTrackStore
+
+FACE = (100, 60, 80, 90)
+
+
+def _texture(seed, shape):
+    noise = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 2)
+
+
+def _frame(dx=0, dy=0, patch=None):
+    """Gray 320x240 frame with a textured face patch at FACE shifted by (dx, dy)."""
+    frame = _texture(1, (240, 320))
+    x, y, w, h = FACE
+    frame[y + dy:y + dy + h, x + dx:x + dx + w] = _texture(2, (h, w)) if patch is None else patch
+    return frame
+
+
+def _started(tracker, frame=None):
+    track = FaceTrack()
+    tracker.start(track, _frame() if frame is None else frame, [FACE])
+    return track
+
+
+def test_redetects_every_n_frames():
+    tracker = FaceTracker(redetect_every=3)
+    track = FaceTrack()
+    assert tracker.needs_detection(track, (240, 320))  # nothing tracked yet
+    tracker.start(track, _frame(), [FACE])
+    decisions = []
+    for _ in range(5):
+        decisions.append(tracker.needs_detection(track, (240, 320)))
+        if decisions[-1]:
+            tracker.start(track, _frame(), [FACE])
+        else:
+            assert tracker.predict(track, _frame()) == [FACE]
+    assert decisions == [False, False, True, False, False]
+    assert (track.detections, track.tracked) == (2, 4)
+
+
+def test_frame_size_change_forces_detection():
+    tracker = FaceTracker(redetect_every=10)
+    track = _started(tracker)
+    assert not tracker.needs_detection(track, (240, 320))
+    assert tracker.needs_detection(track, (480, 640))
+
+
+def test_tracks_a_moving_face():
+    tracker = FaceTracker(redetect_every=10, min_confidence=0.6)
+    track = _started(tracker)
+    assert tracker.predict(track, _frame(dx=6, dy=-4)) == [(106, 56, 80, 90)]
+    assert track.confidence > 0.9
+    assert tracker.predict(track, _frame(dx=12, dy=-8)) == [(112, 52, 80, 90)]
+
+
+def test_drops_the_track_when_the_match_degrades():
+    tracker = FaceTracker(redetect_every=10, min_confidence=0.6)
+    track = _started(tracker)
+    x, y, w, h = FACE
+    assert tracker.predict(track, _frame(patch=_texture(3, (h, w)))) is None
+    assert track.confidence < 0.6
+    assert track.boxes == [FACE]  # kept for the next detection to replace
+
+
+def test_faces_too_close_to_the_edge_for_a_window():
+    tracker = FaceTracker()
+    track = FaceTrack()
+    tracker.start(track, _frame(), [FACE])
+    assert tracker.predict(track, _frame()[:100, :150]) is None
+    assert track.confidence == 0.0
+
+
+def test_store_keeps_sessions_apart_and_expires_them():
+    store = FaceTrackStore(max_sessions=2, idle_seconds=0.05)
+    first, first_lock = store.acquire("a")
+    second, second_lock = store.acquire("b")
+    assert first is not second and first_lock is not second_lock
+    assert store.acquire("a")[0] is first
+
+    store.acquire("c")  # over max_sessions: the least recently used ("b") goes
+    assert store.acquire("b")[0] is not second
+
+    FaceTracker().start(first, _frame(), [FACE])
+    time.sleep(0.1)
+    assert store.acquire("a")[0] is not first
@@ -0,0 +1,189 @@
+import numpy as np
+import pytest
+
+from app.models import facial_expression
+from app.models.facial_expression import detect_all_faces_batch, detect_faces_batch
+
+
+class StubNet:
+    """cv2.dnn net stand-in that returns a fixed (1, 1, N, 7) detections tensor."""
+
+    def __init__(self, rows):
+        self.detections = np.array(rows, dtype=np.float32).reshape(1, 1, -1, 7)
+        self.blobs = []
+
+    def setInput(self, blob):
+        self.blobs.append(blob.shape)
+
+    def forward(self):
+        return self.detections
+
+
+def _frame(width, height):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+# (image_id, label, confidence, x1, y1, x2, y2) in normalized coordinates
+ROWS = [
+    [0, 1, 0.90, 0.125, 0.25, 0.5, 0.75],
+    [0, 1, 0.95, 0.625, 0.125, 0.875, 0.5],
+    [1, 1, 0.80, 0.25, 0.25, 0.75, 0.75],
+    [1, 1, 0.50, 0.00, 0.00, 0.50, 0.50],  # below the confidence threshold
+    [0, 1, 0.99, 0.00, 0.00, 0.05, 0.05],  # smaller than MIN_FACE_SIZE
+    [1, 1, 0.85, 0.625, 0.625, 1.375, 1.25],  # runs off the frame: clamped
+    [-1, 0, 0.00, 0.00, 0.00, 0.00, 0.00],  # padding row
+]
+
+
+def test_one_forward_pass_maps_boxes_to_each_frames_own_size():
+    net = StubNet(ROWS)
+    faces = detect_all_faces_batch([_frame(640, 480), _frame(320, 240)], net)
+    assert net.blobs == [(2, 3, 300, 300)]
+    # Most confident first, in each frame's own pixel coordinates
+    assert faces[0] == [(400, 60, 160, 180), (80, 120, 240, 240)]
+    assert faces[1] == [(200, 150, 120, 90), (80, 60, 160, 120)]
+
+
+def test_max_faces_and_single_frame_wrapper():
+    net = StubNet(ROWS)
+    assert detect_all_faces_batch([_frame(640, 480), _frame(320, 240)], net, max_faces=1) == [
+        [(400, 60, 160, 180)],
+        [(200, 150, 120, 90)],
+    ]
+    assert detect_faces_batch([_frame(640, 480)], StubNet(ROWS[:2])) == [(400, 60, 160, 180)]
+    assert facial_expression._detect_faces_opencv_dnn(_frame(640, 480), StubNet(ROWS[:2]), 8) == [
+        (400, 60, 160, 180),
+        (80, 120, 240, 240),
+    ]
+
+
+def test_unusable_frames_are_skipped_without_shifting_results():
+    net = StubNet([[0, 1, 0.9, 0.25, 0.25, 0.75, 0.75]])
+    faces = detect_all_faces_batch([_frame(20, 20), None, _frame(320, 240)], net)
+    assert net.blobs == [(1, 3, 300, 300)]
+    assert faces == [[], [], [(80, 60, 160, 120)]]
+
+
+@pytest.mark.parametrize("frames", [[], [_frame(20, 20)]], ids=["no-frames", "only-small-frames"])
+def test_nothing_to_detect_skips_the_forward_pass(frames):
+    net = StubNet(ROWS)
+    assert detect_all_faces_batch(frames, net) == [[] for _ in frames]
+    assert net.blobs == []
+
+
+def test_no_confident_detection():
+    faces = detect_all_faces_batch([_frame(640, 480)], StubNet([[0, 1, 0.3, 0.1, 0.1, 0.5, 0.5]]))
+    assert faces == [[]]
+
+
+class FakeFer:
+    """Records detect_emotions calls; scores each face rectangle with the next emotion in `emotions`."""
+
+    def __init__(self, emotions=("happy", "sad", "angry")):
+        self.emotions = emotions
+        self.calls = []
+
+    def detect_emotions(self, image, face_rectangles=None):
+        self.calls.append((image.shape, face_rectangles))
+        if face_rectangles is None:
+            return []  # FER's own detector finds nothing
+        return [
+            {"box": list(rect), "emotions": {emotion: 0.9, "neutral": 0.1}}
+            for rect, emotion in zip(face_rectangles, self.emotions)
+        ]
+
+
+@pytest.fixture
+def fer(monkeypatch):
+    detector = FakeFer()
+    monkeypatch.setattr(facial_expression, "_fer_detector", lambda: detector)
+    return detector
+
+
+def _locate(monkeypatch, boxes):
+    monkeypatch.setattr(facial_expression, "_locate_faces", lambda frame, gray, session_id: (boxes, "detected"))
+
+
+def _textured_frame():
+    return np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+
+def test_detected_faces_are_classified_in_one_fer_call(monkeypatch, fer):
+    _locate(monkeypatch, [(100, 80, 120, 140), (400, 100, 90, 100)])
+    result = facial_expression._analyze_frame(_textured_frame(), None)
+    assert len(fer.calls) == 1
+    (shape, rects), = fer.calls
+    side = facial_expression.FACE_WORK_SIZE + 2 * facial_expression.FACE_WORK_MARGIN
+    # Both crops stacked in one image, each rect inside its own tile; FER's detector never runs
+    assert shape == (2 * side, side, 3)
+    assert len(rects) == 2
+    for index, (x, y, w, h) in enumerate(rects):
+        assert index * side <= y and y + h <= (index + 1) * side and x + w <= side
+    assert result["box_source"] == "detected"
+
+
+def test_fer_detection_only_runs_without_a_dnn_face(monkeypatch, fer):
+    _locate(monkeypatch, [])
+    result = facial_expression._analyze_frame(_textured_frame(), None)
+    # Enhanced frame, then the original: both through FER's own detector
+    assert [rects for _, rects in fer.calls] == [None, None]
+    assert result["note"] == "no_face_detected" and result["faces"] == []
+
+
+def test_multi_face_results_keep_order_and_report_the_largest_face(monkeypatch, fer):
+    small, large, medium = (40, 40, 60, 60), (300, 120, 200, 220), (520, 60, 100, 110)
+    _locate(monkeypatch, [small, large, medium])  # detector order: most confident first
+    result = facial_expression._analyze_frame(_textured_frame(), None)
+    assert [(face["face_box"], face["emotion"]) for face in result["faces"]] == [
+        (list(small), "happy"),
+        (list(large), "sad"),
+        (list(medium), "angry"),
+    ]
+    assert result["face_box"] == list(large)
+    assert result["emotion"] == result["dominant_emotion"] == "sad"
+
+
+def test_equal_sized_faces_keep_the_most_confident_as_primary(monkeypatch, fer):
+    _locate(monkeypatch, [(40, 40, 100, 100), (300, 120, 100, 100)])
+    result = facial_expression._analyze_frame(_textured_frame(), None)
+    assert result["face_box"] == [40, 40, 100, 100] and result["emotion"] == "happy"
+
+
+def test_enhancement_only_touches_the_face_crop():
+    frame = _textured_frame()
+    gray = facial_expression._grayscale(frame)
+    before = gray.copy()
+    box = (200, 150, 120, 140)
+    strip, rects = facial_expression._face_strip(gray, [box])
+    # The frame itself is never equalized or filtered; only the crop is
+    assert np.array_equal(gray, before)
+    crop, rect = facial_expression._face_crop(gray, box)
+    assert rects == [rect]
+    expected = facial_expression._equalize(crop.copy(), np.empty_like(crop))
+    assert np.array_equal(strip[:, :, 0], expected)
+    assert not np.array_equal(strip[:, :, 0], crop)
+
+
+def test_face_crop_at_the_frame_edge_has_the_working_size():
+    gray = facial_expression._grayscale(_textured_frame())
+    crop, (x, y, w, h) = facial_expression._face_crop(gray, (0, 0, 100, 100))
+    side = facial_expression.FACE_WORK_SIZE + 2 * facial_expression.FACE_WORK_MARGIN
+    assert crop.shape == (side, side)
+    assert 0 < x and 0 < y and x + w < side and y + h < side
+
+
+def test_stage_timings_reach_the_response(monkeypatch, fer):
+    import cv2
+
+    _locate(monkeypatch, [(200, 150, 120, 140)])
+    jpeg = cv2.imencode(".jpg", _textured_frame())[1].tobytes()
+    result = facial_expression.analyze_facial_expression(jpeg)
+    assert set(result["timings_ms"]) == {"decode", "locate", "enhance", "classify", "total"}
+    assert all(value >= 0 for value in result["timings_ms"].values())
+    assert result["timings_ms"]["total"] >= result["timings_ms"]["classify"]
+
+
+def test_preprocessing_benchmark_reports_every_stage():
+    report = facial_expression.benchmark_face_preprocessing(repeats=1)
+    assert set(report["stages_ms"]) == {"grayscale", "crop", "enhance"}
+    assert report["legacy_ms"] > 0 and report["crop_enhance_ms"] > 0
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+
+from app.utils import frame_cache
+from app.utils.frame_cache import FrameResultCache, hamming_distance, perceptual_hash
+
+
+def _frame(shift: int = 0, noise: float = 0.0) -> np.ndarray:
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+    cv2.circle(image, (160 + shift, 120), 60, (200, 180, 160), -1)
+    cv2.rectangle(image, (20, 20), (90, 200), (60, 120, 240), -1)
+    if noise:
+        jitter = np.random.default_rng(0).normal(0, noise, image.shape)
+        image = np.clip(image + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_near_identical_frames_hash_close_and_different_frames_far():
+    base = perceptual_hash(_frame())
+    assert perceptual_hash(cv2.cvtColor(_frame(), cv2.COLOR_BGR2GRAY)) == base
+    assert hamming_distance(base, perceptual_hash(_frame(noise=3.0))) <= 10
+    assert hamming_distance(base, perceptual_hash(_frame(shift=80))) > 10
+    assert 0 <= base < 1 << 256
+
+
+def test_lookup_returns_closest_fresh_match_as_a_copy():
+    cache = FrameResultCache(max_distance=4, max_age_seconds=10)
+    cache.put("s", 0b0000, {"emotion": "happy"})
+    cache.put("s", 0b1111, {"emotion": "sad"})
+
+    value, age, distance = cache.get("s", 0b0001)
+    assert value == {"emotion": "happy"} and distance == 1 and age >= 0
+    value["emotion"] = "changed"
+    assert cache.get("s", 0b0000)[0] == {"emotion": "happy"}
+    assert cache.get("other-session", 0b0000) is None
+    assert cache.get("s", ((1 << 20) - 1) << 8) is None
+
+
+def test_stale_entries_and_session_eviction(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(frame_cache.time, "monotonic", lambda: now[0])
+    cache = FrameResultCache(max_age_seconds=5, max_sessions=2)
+    cache.put("a", 1, "result-a")
+    now[0] += 6
+    assert cache.get("a", 1) is None
+
+    cache.put("b", 1, "result-b")
+    cache.put("c", 1, "result-c")
+    cache.put("d", 1, "result-d")
+    stats = cache.stats()
+    assert stats["sessions"] == 2 and stats["stale"] == 1 and stats["evictions"] >= 1
+    assert cache.get("b", 1) is None and cache.get("d", 1)[0] == "result-d"
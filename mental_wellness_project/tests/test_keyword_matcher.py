@@ -0,0 +1,31 @@
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+def test_hits_need_a_word_boundary_before_the_keyword():
+    matcher = KeywordMatcher(["panic", "abuse"])
+    assert matcher.matches("I had a panic attack") == ["panic"]
+    assert matcher.matches("the mechanic fixed it") == []
+    assert matcher.matches("a disabused notion") == []
+
+
+def test_inflected_forms_still_match():
+    matcher = KeywordMatcher(["abuse", "panic", "worthless"])
+    assert matcher.matches("She was abused and keeps panicking") == ["abuse", "panic"]
+    assert matcher.matches("a feeling of worthlessness") == ["worthless"]
+
+
+def test_find_all_reports_positions_and_overlapping_keywords():
+    matcher = KeywordMatcher(["child abuse", "abuse", "kill myself"])
+    text = "Report CHILD ABUSE. I want to kill myself"
+    assert matcher.find_all(text) == [
+        ("child abuse", 7, 18),
+        ("abuse", 13, 18),
+        ("kill myself", 30, 41),
+    ]
+
+
+def test_matches_are_distinct_and_in_keyword_order():
+    matcher = KeywordMatcher(["suicide", "panic", "panic", " "])
+    assert matcher.keywords == ("suicide", "panic")
+    assert matcher.matches("panic, panic, suicide") == ["suicide", "panic"]
+    assert matcher.matches("") == []
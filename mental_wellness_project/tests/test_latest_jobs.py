@@ -0,0 +1,172 @@
+import threading
+import time
+
+from app.utils.latest_jobs import LatestJobQueue
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class GatedWorker:
+    """`process` blocks until released, recording the items it ran and how many ran at once per key."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.running = {}
+        self.max_running = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        key, value = item
+        with self._lock:
+            self.started.append(value)
+            self.running[key] = self.running.get(key, 0) + 1
+            self.max_running[key] = max(self.max_running.get(key, 0), self.running[key])
+        self.release.wait(5)
+        with self._lock:
+            self.running[key] -= 1
+        if value == "boom":
+            raise ValueError("bad frame")
+        return value
+
+
+def test_newer_job_replaces_the_queued_one():
+    worker = GatedWorker()
+    jobs = LatestJobQueue(worker, workers=1)
+    assert jobs.submit("a", ("a", 1))
+    _wait_for(lambda: worker.started == [1])
+    # 1 is running; 2 is queued and then replaced by 3
+    assert jobs.submit("a", ("a", 2))
+    assert jobs.submit("a", ("a", 3))
+    assert jobs.is_pending("a")
+    worker.release.set()
+    _wait_for(lambda: not jobs.is_pending("a"))
+    assert worker.started == [1, 3]
+    assert jobs.latest("a").result == 3
+    stats = jobs.stats()
+    assert (stats["submitted"], stats["replaced"], stats["completed"]) == (3, 1, 2)
+
+
+def test_full_queue_rejects_new_keys_but_replaces_queued_ones():
+    worker = GatedWorker()
+    jobs = LatestJobQueue(worker, workers=1, max_pending=1)
+    jobs.submit("a", ("a", 1))
+    _wait_for(lambda: worker.started == [1])
+    assert jobs.submit("b", ("b", 1))
+    assert not jobs.submit("c", ("c", 1))
+    assert jobs.submit("b", ("b", 2))
+    assert jobs.stats()["rejected"] == 1
+    worker.release.set()
+    _wait_for(lambda: jobs.latest("b") is not None)
+    assert jobs.latest("b").result == 2
+    assert jobs.latest("c") is None
+
+
+def test_one_key_never_runs_twice_at_once():
+    worker = GatedWorker()
+    jobs = LatestJobQueue(worker, workers=3)
+    jobs.submit("a", ("a", 1))
+    _wait_for(lambda: worker.started == [1])
+    jobs.submit("a", ("a", 2))
+    jobs.submit("b", ("b", 1))
+    _wait_for(lambda: len(worker.started) == 2)
+    # b started on a free worker while a's second job waits for its first
+    assert jobs.stats()["running"] == 2 and jobs.stats()["pending"] == 1
+    worker.release.set()
+    _wait_for(lambda: not jobs.is_pending("a") and not jobs.is_pending("b"))
+    assert worker.max_running["a"] == 1
+    assert jobs.latest("a").result == 2
+
+
+def test_failed_job_keeps_the_previous_result():
+    worker = GatedWorker()
+    worker.release.set()
+    jobs = LatestJobQueue(worker, workers=1)
+    jobs.submit("a", ("a", "ok"))
+    _wait_for(lambda: jobs.latest("a") is not None)
+    jobs.submit("a", ("a", "boom"))
+    _wait_for(lambda: jobs.stats()["failed"] == 1)
+    assert jobs.latest("a").result == "ok"
+    assert not jobs.is_pending("a")
+    assert jobs.last_error("a") == "bad frame"
+    jobs.submit("a", ("a", "ok again"))
+    _wait_for(lambda: jobs.stats()["completed"] == 2)
+    assert jobs.last_error("a") is None
+
+
+def test_results_expire_and_are_capped():
+    worker = GatedWorker()
+    worker.release.set()
+    jobs = LatestJobQueue(worker, workers=1, max_results=2, idle_seconds=0.05)
+    for key in "abc":
+        jobs.submit(key, (key, key))
+        _wait_for(lambda: not jobs.is_pending(key))
+    assert jobs.latest("a") is None
+    assert jobs.latest("c").result == "c"
+    time.sleep(0.1)
+    assert jobs.latest("c") is None
+
+
+def test_submit_screen_ocr_is_pending_until_the_first_result(monkeypatch):
+    from app.models import screen_ocr
+
+    release = threading.Event()
+
+    def analyze(image_b64, session_id):
+        release.wait(5)
+        return {"text": image_b64.decode(), "harmful_hits": [], "status": "ok"}
+
+    monkeypatch.setattr(screen_ocr, "analyze_screen_content", analyze)
+    screen_ocr._screen_jobs.cache_clear()
+    try:
+        first = screen_ocr.submit_screen_ocr(memoryview(b"frame-1"), "s1")
+        assert first["status"] == "pending" and first["job"]["pending"]
+        release.set()
+        _wait_for(lambda: not screen_ocr._screen_jobs().is_pending("s1"))
+        second = screen_ocr.submit_screen_ocr(b"frame-2", "s1")
+        assert second["status"] == "ok" and second["text"] == "frame-1"
+        assert second["job"]["queued"] and second["job"]["age_seconds"] >= 0
+        _wait_for(lambda: not screen_ocr._screen_jobs().is_pending("s1"))
+    finally:
+        screen_ocr._screen_jobs.cache_clear()
+
+
+def test_screen_ocr_error_keeps_the_previous_result(monkeypatch):
+    from app.models import screen_ocr
+
+    release = threading.Event()
+
+    def analyze(image_b64, session_id):
+        release.wait(5)
+        if image_b64 == b"broken":
+            return {"text": "", "harmful_hits": [], "status": "error", "error": "decoder crashed"}
+        return {"text": "I feel worthless", "harmful_hits": ["worthless"], "status": "ok"}
+
+    monkeypatch.setattr(screen_ocr, "analyze_screen_content", analyze)
+    screen_ocr._screen_jobs.cache_clear()
+    jobs = screen_ocr._screen_jobs()
+
+    def submit(frame):
+        # Returns what /monitor sees while this frame is read, then lets it finish
+        release.clear()
+        result = screen_ocr.submit_screen_ocr(frame, "s2")
+        release.set()
+        _wait_for(lambda: not jobs.is_pending("s2"))
+        return result
+
+    try:
+        assert submit(b"broken")["status"] == "pending"
+        before_any_result = submit(b"good")
+        assert before_any_result["status"] == "error" and before_any_result["job"]["error"] == "decoder crashed"
+        assert "error" not in submit(b"broken")["job"]
+        kept = submit(b"good")
+        assert kept["status"] == "ok" and kept["harmful_hits"] == ["worthless"]
+        assert kept["job"]["error"] == "decoder crashed"
+        assert jobs.stats()["failed"] == 2
+    finally:
+        screen_ocr._screen_jobs.cache_clear()
@@ -0,0 +1,84 @@
+import base64
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app.utils.microphone import (
+    _decode_pcm16_wav,
+    _decode_with_wave,
+    _resample_polyphase,
+    decode_audio_bytes,
+    decode_base64_audio,
+    decode_pcm_chunk,
+)
+
+
+def _wav_bytes(samples: np.ndarray, sr: int, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sr)
+        wav_file.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _pcm(n: int, channels: int = 1) -> np.ndarray:
+    return np.random.default_rng(0).integers(-20000, 20000, size=n * channels, dtype=np.int16)
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_pcm16_wav_fast_path_matches_wave_module(channels):
+    data = _wav_bytes(_pcm(4000, channels), 22050, channels)
+    fast, sr = _decode_pcm16_wav(memoryview(data))
+    reference, reference_sr = _decode_with_wave(data)
+    assert sr == reference_sr == 22050
+    assert fast.dtype == np.float32
+    np.testing.assert_allclose(fast, reference, atol=1e-6)
+
+
+def test_pcm16_wav_skips_extra_chunks_and_clamps_unset_data_size():
+    data = bytearray(_wav_bytes(_pcm(100), 16000))
+    # Insert an odd-sized LIST chunk (padded to an even length) before "data"
+    data_at = data.index(b"data")
+    data[data_at:data_at] = b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+    # Streaming encoders leave the data size at 0xFFFFFFFF
+    size_at = data.index(b"data") + 4
+    data[size_at:size_at + 4] = struct.pack("<I", 0xFFFFFFFF)
+    samples, sr = _decode_pcm16_wav(bytes(data))
+    assert (samples.size, sr) == (100, 16000)
+
+
+def test_pcm16_wav_rejects_other_formats():
+    with pytest.raises(ValueError):
+        _decode_pcm16_wav(b"OggS" + bytes(40))
+    data = bytearray(_wav_bytes(_pcm(10), 16000))
+    fmt_at = data.index(b"fmt ") + 8
+    data[fmt_at + 14:fmt_at + 16] = struct.pack("<H", 24)  # bits per sample
+    with pytest.raises(ValueError, match="16-bit"):
+        _decode_pcm16_wav(bytes(data))
+
+
+@pytest.mark.parametrize("sr, target_sr", [(48000, 16000), (44100, 16000), (22050, 16000), (8000, 16000)])
+def test_polyphase_resampling_matches_scipy(sr, target_sr):
+    signal = pytest.importorskip("scipy.signal")
+    clip = (0.3 * np.random.default_rng(1).standard_normal(sr // 2)).astype(np.float32)
+    divisor = np.gcd(sr, target_sr)
+    expected = signal.resample_poly(clip, target_sr // divisor, sr // divisor)
+    actual = _resample_polyphase(clip, sr, target_sr)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+
+def test_decode_paths_resample_to_target_rate():
+    data = _wav_bytes(_pcm(48000), 48000)
+    samples, sr = decode_audio_bytes(data, target_sr=16000)
+    assert (samples.size, sr) == (16000, 16000)
+    encoded = "data:audio/wav;base64," + base64.b64encode(data).decode()
+    assert decode_base64_audio(encoded)[0].size == 16000
+
+    chunk = decode_pcm_chunk(_pcm(480).tobytes(), "s16le", sr=48000, target_sr=16000)
+    assert chunk.dtype == np.float32 and chunk.size == 160
@@ -0,0 +1,155 @@
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+from app.models import ocr_engines
+from app.models.ocr_engines import OcrEngineUnavailable, PytesseractEngine, TesserocrEngine, load_ocr_engine
+
+
+def _fake_tesserocr(fail_init=False):
+    module = types.ModuleType("tesserocr")
+    module.PSM = types.SimpleNamespace(SINGLE_BLOCK=6, SINGLE_LINE=7)
+    module.OEM = types.SimpleNamespace(DEFAULT=3)
+    module.apis = []
+
+    class PyTessBaseAPI:
+        def __init__(self, lang, psm, oem):
+            if fail_init:
+                raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+            self.thread = threading.get_ident()
+            self.variables = {}
+            self.psm = psm
+            module.apis.append(self)
+
+        def SetVariable(self, name, value):
+            self.variables[name] = value
+
+        def SetPageSegMode(self, psm):
+            self.psm = psm
+
+        def SetImageBytes(self, data, width, height, bytes_per_pixel, bytes_per_line):
+            self.image = (len(data), width, height, bytes_per_pixel, bytes_per_line)
+
+        def GetUTF8Text(self):
+            return f"psm {self.psm}\n"
+
+    module.PyTessBaseAPI = PyTessBaseAPI
+    return module
+
+
+def _fake_pytesseract(missing_binary=False):
+    module = types.ModuleType("pytesseract")
+    module.calls = []
+
+    class TesseractNotFoundError(EnvironmentError):
+        pass
+
+    def image_to_string(image, config):
+        if missing_binary:
+            raise TesseractNotFoundError("tesseract is not installed or it's not in your PATH")
+        module.calls.append((image.shape, image.dtype, config))
+        return f"psm {config.split()[1]}\n"
+
+    module.TesseractNotFoundError = TesseractNotFoundError
+    module.image_to_string = image_to_string
+    return module
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    """Install fake OCR modules; None makes the import fail."""
+
+    def install(tesserocr=None, pytesseract=None):
+        monkeypatch.setitem(sys.modules, "tesserocr", tesserocr)
+        monkeypatch.setitem(sys.modules, "pytesseract", pytesseract)
+
+    return install
+
+
+def test_auto_prefers_tesserocr(modules):
+    modules(_fake_tesserocr(), _fake_pytesseract())
+    engine = load_ocr_engine("auto")
+    assert isinstance(engine, TesserocrEngine) and engine.persistent
+
+
+def test_auto_falls_back_to_pytesseract_without_tesserocr(modules):
+    modules(None, _fake_pytesseract())
+    engine = load_ocr_engine("auto")
+    assert isinstance(engine, PytesseractEngine) and not engine.persistent
+
+
+def test_auto_falls_back_when_tessdata_is_missing(modules):
+    modules(_fake_tesserocr(fail_init=True), _fake_pytesseract())
+    assert isinstance(load_ocr_engine("auto"), PytesseractEngine)
+    with pytest.raises(OcrEngineUnavailable):
+        load_ocr_engine("tesserocr", fallback=False)
+
+
+def test_missing_backends(modules):
+    modules(None, None)
+    assert load_ocr_engine("auto") is None
+    with pytest.raises(ImportError):
+        load_ocr_engine("tesserocr", fallback=False)
+    with pytest.raises(ImportError):
+        load_ocr_engine("pytesseract", fallback=False)
+
+
+def test_unknown_engine_name_uses_auto(modules):
+    modules(None, _fake_pytesseract())
+    assert isinstance(load_ocr_engine("paddle"), PytesseractEngine)
+
+
+def test_tesserocr_keeps_one_api_per_thread(modules):
+    tesserocr = _fake_tesserocr()
+    modules(tesserocr, None)
+    engine = TesserocrEngine()
+    image = np.full((20, 60), 255, dtype=np.uint8)
+    engine.recognize(image)
+    engine.recognize(image)
+    assert len(tesserocr.apis) == 1  # created in __init__ and reused by this thread
+
+    worker = threading.Thread(target=lambda: [engine.recognize(image) for _ in range(3)])
+    worker.start()
+    worker.join()
+    assert len(tesserocr.apis) == 2
+    assert tesserocr.apis[0].thread != tesserocr.apis[1].thread
+    assert tesserocr.apis[1].variables["tessedit_char_whitelist"] == ocr_engines.CHAR_WHITELIST
+
+
+@pytest.mark.parametrize("name", ["tesserocr", "pytesseract"])
+def test_engines_share_the_recognize_contract(modules, name):
+    modules(_fake_tesserocr(), _fake_pytesseract())
+    engine = load_ocr_engine(name, fallback=False)
+    assert engine.name == name
+    rgb = np.full((20, 60, 3), 255, dtype=np.uint8)
+    gray = np.full((20, 60), 255, dtype=np.uint8)
+    # RGB or grayscale in, text out; psm 6 by default, psm 7 for a single line
+    assert engine.recognize(rgb).strip() == "psm 6"
+    assert engine.recognize(gray, single_line=True).strip() == "psm 7"
+    assert engine.recognize(gray).strip() == "psm 6"
+
+
+def test_pytesseract_sends_grayscale_and_maps_a_missing_binary(modules):
+    pytesseract = _fake_pytesseract()
+    modules(None, pytesseract)
+    PytesseractEngine().recognize(np.zeros((20, 60, 3), dtype=np.uint8))
+    assert pytesseract.calls[0][:2] == ((20, 60), np.uint8)
+    # Quotes and spaces can't survive pytesseract's shlex split of the config
+    whitelist = pytesseract.calls[0][2].split("tessedit_char_whitelist=")[1]
+    assert not set(whitelist) & {" ", "'", '"'}
+
+    modules(None, _fake_pytesseract(missing_binary=True))
+    with pytest.raises(OcrEngineUnavailable):
+        PytesseractEngine().recognize(np.zeros((20, 60), dtype=np.uint8))
+
+
+def test_benchmark_reports_each_engine(modules):
+    modules(None, _fake_pytesseract())
+    report = ocr_engines.benchmark_ocr_engines(repeats=1)
+    by_engine = {entry["engine"]: entry for entry in report}
+    assert "error" in by_engine["tesserocr"]
+    assert by_engine["pytesseract"]["sample"] == "psm 7"
+    assert by_engine["pytesseract"]["median_ms"] >= 0
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.utils.ocr_preprocess import ImageStats, image_stats, ink_mask, preprocess, select_tier
+
+NO_LIMIT_MS = 1e9
+
+
+def _text_line(thickness=3, scale=1.0, ink=30, background=200, noise=0.0):
+    image = np.full((60, 420), background, dtype=np.uint8)
+    cv2.putText(image, "Hello wellness 42", (10, 42), cv2.FONT_HERSHEY_SIMPLEX, scale, ink, thickness, cv2.LINE_AA)
+    if noise:
+        jitter = np.random.default_rng(0).normal(0, noise, image.shape)
+        image = np.clip(image + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_stats_of_clean_and_noisy_text():
+    clean = image_stats(_text_line())
+    assert clean.noise < 1.0 and clean.contrast > 150 and clean.stroke_width > 2.5
+    noisy = image_stats(_text_line(noise=15))
+    assert 12 < noisy.noise < 18
+    thin = image_stats(_text_line(thickness=1, scale=0.5))
+    assert thin.stroke_width <= 2.5
+
+
+def test_ink_is_the_minority_class_for_either_polarity():
+    dark_on_light = ink_mask(_text_line(ink=0, background=255))
+    light_on_dark = ink_mask(_text_line(ink=255, background=0))
+    assert np.array_equal(dark_on_light, light_on_dark)
+    assert 0 < dark_on_light.mean() < 0.5
+
+
+@pytest.mark.parametrize(
+    "image, tier",
+    [
+        (_text_line(), "none"),
+        (_text_line(noise=3), "none"),
+        (_text_line(ink=150, background=175), "light"),
+        (_text_line(noise=6), "light"),
+        (_text_line(noise=15), "full"),
+        (_text_line(thickness=1, scale=0.5, noise=15), "light"),  # thin strokes never get denoised
+    ],
+    ids=["clean", "faint-noise", "low-contrast", "noisy", "very-noisy", "very-noisy-thin"],
+)
+def test_selector_picks_the_cheapest_tier_that_fits_the_image(image, tier):
+    assert select_tier(image_stats(image), image.size, NO_LIMIT_MS) == tier
+
+
+def test_time_budget_downgrades_the_tier():
+    noisy = ImageStats(noise=12.0, contrast=200.0, stroke_width=4.0)
+    pixels = 1_000_000  # full ~1200 ms, light ~12 ms
+    assert select_tier(noisy, pixels, 2000.0) == "full"
+    assert select_tier(noisy, pixels, 100.0) == "light"
+    assert select_tier(noisy, pixels, 5.0) == "none"
+    assert select_tier(noisy, pixels, 0.0) == "none"
+
+
+def test_preprocess_tiers():
+    image = _text_line(noise=15)
+    assert preprocess(image, "none") is image
+    for tier in ("light", "full"):
+        out = preprocess(image, tier)
+        assert out.shape == image.shape and out.dtype == np.uint8
+    # Denoising lowers the measured noise
+    assert image_stats(preprocess(image, "full")).noise < image_stats(preprocess(image, "light")).noise
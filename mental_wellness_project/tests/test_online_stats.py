@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.utils import online_stats
+from app.utils.online_stats import GLOBAL_KEY, OnlineNormalizer, RunningStats
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(size=(50, 3)) * [1.0, 100.0, 20.0]
+    stats = RunningStats(3)
+    for row in values:
+        stats.update(row)
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+    np.testing.assert_allclose(stats.std(), values.std(axis=0, ddof=1))
+
+
+def test_session_baseline_takes_over_from_global_after_min_samples():
+    normalizer = OnlineNormalizer(dims=1, min_samples=3)
+    for value in (1.0, 2.0, 3.0):
+        normalizer.score_and_update("other", [value])
+
+    first = normalizer.score_and_update("speaker", [10.0])
+    assert first["baseline"] == "global" and first["baseline_samples"] == 3
+    assert first["zscores"][0] == pytest.approx(8.0)  # (10 - 2) / 1
+
+    for value in (11.0, 12.0):
+        normalizer.score_and_update("speaker", [value])
+    assert normalizer.score_and_update("speaker", [11.0], update=False)["baseline"] == "session"
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "baselines.json"
+    normalizer = OnlineNormalizer(dims=2, min_samples=2, snapshot_path=path)
+    for values in ([1.0, 5.0], [3.0, 7.0], [2.0, 9.0]):
+        normalizer.score_and_update("alice", values)
+    normalizer.snapshot()
+
+    restored = OnlineNormalizer(dims=2, min_samples=2, snapshot_path=path)
+    expected = normalizer.score_and_update("alice", [4.0, 4.0], update=False)
+    assert restored.score_and_update("alice", [4.0, 4.0], update=False) == expected
+    assert restored._global.to_dict() == normalizer._global.to_dict()
+
+
+def test_snapshot_with_other_dims_is_ignored(tmp_path):
+    path = tmp_path / "baselines.json"
+    path.write_text(json.dumps({"dims": 5, GLOBAL_KEY: {"count": 9, "mean": [0] * 5, "m2": [0] * 5}}))
+    assert OnlineNormalizer(dims=2, snapshot_path=path)._global.count == 0
+
+
+def test_ephemeral_sessions_are_not_written(tmp_path):
+    path = tmp_path / "baselines.json"
+    normalizer = OnlineNormalizer(dims=1, snapshot_path=path, ephemeral_prefix="anonymous:")
+    normalizer.score_and_update("anonymous:10.0.0.7", [1.0])
+    normalizer.score_and_update("session-42", [2.0])
+    normalizer.snapshot()
+
+    data = json.loads(path.read_text())
+    assert list(data["sessions"]) == ["session-42"]
+    assert data[GLOBAL_KEY]["count"] == 2
+
+
+def test_idle_sessions_expire(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(online_stats.time, "time", lambda: now[0])
+    path = tmp_path / "baselines.json"
+    normalizer = OnlineNormalizer(dims=1, min_samples=2, snapshot_path=path, idle_seconds=100)
+    for value in (1.0, 2.0, 3.0):
+        normalizer.score_and_update("old", [value])
+    now[0] += 50
+    normalizer.score_and_update("recent", [1.0])
+    now[0] += 60
+    normalizer.snapshot()
+
+    assert list(json.loads(path.read_text())["sessions"]) == ["recent"]
+    assert normalizer.score_and_update("old", [2.0], update=False)["baseline"] == "global"
+    assert OnlineNormalizer(dims=1, min_samples=2, snapshot_path=path, idle_seconds=100)._sessions.keys() == {"recent"}
+
+
+def test_snapshots_without_timestamps_are_dropped_when_expiry_is_on(tmp_path):
+    path = tmp_path / "baselines.json"
+    stats = {"count": 3, "mean": [1.0], "m2": [2.0]}
+    path.write_text(json.dumps({"dims": 1, GLOBAL_KEY: stats, "sessions": {"127.0.0.1": stats}}))
+    normalizer = OnlineNormalizer(dims=1, snapshot_path=path, idle_seconds=3600)
+    assert not normalizer._sessions
+    assert normalizer._global.count == 3
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from app.models.speech_emotion import _synthetic_clips, check_feature_parity
+from app.utils.microphone import DEFAULT_SR
+from app.utils.prosody import extract_prosody, stft_magnitude
+
+
+def test_numpy_prosody_matches_librosa():
+    pytest.importorskip("librosa")
+    report = check_feature_parity()
+    assert report["passed"], report["mismatches"]
+
+
+def test_stft_magnitude_matches_librosa():
+    librosa = pytest.importorskip("librosa")
+    clip = _synthetic_clips(seconds=1.0, count=1)[0]
+    expected = np.abs(librosa.stft(clip, n_fft=2048, hop_length=512))
+    np.testing.assert_allclose(stft_magnitude(clip), expected, rtol=1e-3, atol=1e-3)
+
+
+def test_silence_and_empty_input():
+    assert extract_prosody(np.zeros(0, dtype=np.float32), DEFAULT_SR) == (0.0, 0.0, 0.0)
+    energy, pitch, tempo = extract_prosody(np.zeros(DEFAULT_SR, dtype=np.float32), DEFAULT_SR)
+    assert energy == 0.0 and tempo == 0.0
@@ -0,0 +1,65 @@
+from app.utils import result_cache
+from app.utils.result_cache import TTLCache, content_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    cache = TTLCache(max_entries=4, ttl_seconds=10)
+    cache.put("key", {"label": "POSITIVE"})
+
+    clock.now += 9.9
+    assert cache.get("key") == {"label": "POSITIVE"}
+    clock.now += 10.1
+    assert cache.get("key") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_values_are_copied_in_and_out():
+    cache = TTLCache()
+    value = {"insights": ["one"]}
+    cache.put("key", value)
+    value["insights"].append("changed by caller")
+    cache.get("key")["insights"].append("changed again")
+    assert cache.get("key") == {"insights": ["one"]}
+
+
+def test_content_key_normalizes_whitespace_and_case():
+    assert content_key("I feel  fine\n") == content_key("i FEEL fine")
+    assert content_key("text", True) != content_key("text", False)
+
+
+def test_text_cache_does_not_import_opencv():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = "import sys; import app.utils.result_cache; print('cv2' in sys.modules)"
+    # A fresh interpreter: the package __init__ is bypassed so only this module's imports count
+    bootstrap = (
+        "import sys, types; pkg = types.ModuleType('app'); "
+        f"pkg.__path__ = [{str(Path(result_cache.__file__).parents[1])!r}]; sys.modules['app'] = pkg; "
+    )
+    output = subprocess.run([sys.executable, "-c", bootstrap + code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
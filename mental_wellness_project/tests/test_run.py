@@ -0,0 +1,37 @@
+import sys
+
+import run
+
+
+class FakeApp:
+    def __init__(self, warm_up):
+        self.warm_up = warm_up
+        self.served = False
+
+    def run(self, debug=False):
+        self.served = True
+
+
+def _main(monkeypatch, *argv):
+    built = []
+    monkeypatch.setattr(run, "create_app", lambda warm_up=None: built.append(FakeApp(warm_up)) or built[-1])
+    monkeypatch.setattr(sys, "argv", ["run.py", *argv])
+    run.main()
+    return built
+
+
+def test_maintenance_flags_do_not_build_the_app(monkeypatch):
+    from app.models import ocr_engines
+
+    monkeypatch.setattr(ocr_engines, "benchmark_ocr_engines", lambda: [])
+    assert _main(monkeypatch, "--benchmark-ocr") == []
+
+
+def test_only_the_reloader_child_warms_up(monkeypatch):
+    monkeypatch.delenv("WERKZEUG_RUN_MAIN", raising=False)
+    (parent,) = _main(monkeypatch)
+    assert parent.served and parent.warm_up is False
+
+    monkeypatch.setenv("WERKZEUG_RUN_MAIN", "true")
+    (child,) = _main(monkeypatch)
+    assert child.served and child.warm_up is None  # settings.warmup_on_start decides
@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models import screen_ocr
+from app.models.ocr_engines import PytesseractEngine
+from app.utils.screen_tiles import TileState
+from app.utils.text_regions import group_lines, union_box
+
+
+class FakeEngine:
+    name = "fake"
+
+    def __init__(self, persistent):
+        self.persistent = persistent
+        self.calls = []
+
+    def recognize(self, image, single_line=False):
+        self.calls.append((image.shape, single_line))
+        return "hello there"
+
+
+def _read_tiles(monkeypatch, engine, lines, width=400, height=300):
+    monkeypatch.setattr(screen_ocr, "_ocr_engine", lambda: engine)
+    monkeypatch.setattr(screen_ocr, "detect_text_lines", lambda gray, max_regions: lines)
+    monkeypatch.setattr(settings, "screen_ocr_preprocess", "none")
+    monkeypatch.setattr(settings, "screen_text_regions_enabled", True)
+    state = TileState()
+    state.reset([(0, 0, width, height)])
+    screenshot = np.random.default_rng(0).integers(0, 255, (height, width), dtype=np.uint8)
+    failure, _, counts = screen_ocr._ocr_tiles(screenshot, state, time.perf_counter() + 10, {})
+    assert failure is None
+    return state.lines[0], counts
+
+
+PARAGRAPH = [(10, 10, 300, 14), (10, 30, 280, 14), (10, 50, 200, 14)]
+
+
+def test_group_lines_merges_a_paragraph():
+    assert group_lines(PARAGRAPH) == [PARAGRAPH]
+    assert union_box(PARAGRAPH) == (10, 10, 300, 54)
+
+
+def test_group_lines_splits_distant_lines_and_columns():
+    lines = [(10, 10, 100, 14), (220, 10, 100, 14), (10, 30, 90, 14), (220, 30, 90, 14), (10, 120, 100, 14)]
+    assert group_lines(lines) == [
+        [(10, 10, 100, 14), (10, 30, 90, 14)],
+        [(220, 10, 100, 14), (220, 30, 90, 14)],
+        [(10, 120, 100, 14)],
+    ]
+
+
+def test_in_process_engine_reads_every_line_as_a_single_line(monkeypatch):
+    engine = FakeEngine(persistent=True)
+    entries, counts = _read_tiles(monkeypatch, engine, PARAGRAPH)
+    assert len(engine.calls) == counts["regions_read"] == 3
+    assert all(single_line for _, single_line in engine.calls)
+    assert [rect for rect, _ in entries] == PARAGRAPH
+
+
+def test_process_engine_reads_adjacent_lines_as_one_block(monkeypatch):
+    engine = FakeEngine(persistent=False)
+    lone = (10, 200, 120, 14)
+    entries, counts = _read_tiles(monkeypatch, engine, PARAGRAPH + [lone])
+    assert counts["regions_read"] == 2
+    assert [single_line for _, single_line in engine.calls] == [False, True]
+    assert [rect for rect, _ in entries] == [union_box(PARAGRAPH), lone]
+
+
+def test_process_engine_reads_many_blocks_as_one_region(monkeypatch):
+    engine = FakeEngine(persistent=False)
+    monkeypatch.setattr(settings, "screen_ocr_max_process_calls", 4)
+    lines = [(10, 10 + 50 * row, 100, 14) for row in range(5)]
+    entries, counts = _read_tiles(monkeypatch, engine, lines)
+    assert counts["regions_read"] == len(engine.calls) == 1
+    assert engine.calls[0][1] is False
+    assert [rect for rect, _ in entries] == [union_box(lines)]
+
+
+def test_pytesseract_uses_psm_7_for_single_lines(monkeypatch):
+    pytesseract = pytest.importorskip("pytesseract")
+    configs = []
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda image, config: configs.append(config) or "")
+    engine = PytesseractEngine()
+    image = np.full((20, 80), 255, dtype=np.uint8)
+    engine.recognize(image)
+    engine.recognize(image, single_line=True)
+    assert configs[0].startswith("--psm 6 ")
+    assert configs[1].startswith("--psm 7 ")
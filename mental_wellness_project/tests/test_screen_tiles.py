@@ -0,0 +1,77 @@
+import numpy as np
+
+from app.utils.screen_tiles import TileState, TileTextStore, locate_hits, stitch_lines, tile_grid
+
+
+def test_tile_grid_covers_the_image_with_overlapping_bands():
+    rects = tile_grid(100, 350, tile_height=160, overlap=24)
+    assert rects == [(0, 0, 100, 184), (0, 160, 100, 184), (0, 320, 100, 30)]
+
+
+def test_tile_grid_columns_in_reading_order():
+    rects = tile_grid(101, 200, tile_height=100, columns=2)
+    assert rects == [(0, 0, 50, 100), (50, 0, 51, 100), (0, 100, 50, 100), (50, 100, 51, 100)]
+
+
+def test_repeated_lines_inside_a_tile_are_kept():
+    bands = tile_grid(100, 300, tile_height=160, overlap=24)
+    tiles = [[((0, 10, 80, 12), "ok"), ((0, 30, 80, 12), "ok"), ((0, 50, 80, 12), "ok")], [], []]
+    text, spans = stitch_lines(tiles, bands)
+    assert text == "ok\nok\nok"
+    assert [box[1] for _, _, box in spans] == [10, 30, 50]
+
+
+def test_line_boxes_in_adjacent_tiles_are_not_deduplicated():
+    bands = tile_grid(100, 300, tile_height=160, overlap=24)
+    tiles = [[((0, 140, 80, 12), "100")], [((0, 165, 80, 12), "100")]]
+    assert stitch_lines(tiles, bands[:2])[0] == "100\n100"
+
+
+def test_whole_tile_text_drops_only_the_rows_repeated_by_the_overlap():
+    bands = tile_grid(100, 300, tile_height=160, overlap=24)
+    tiles = [
+        [(bands[0], "hello\nhello\nsee you")],
+        [(bands[1], "see you\nsee you\nbye")],
+    ]
+    # The first "see you" of band 2 is band 1's last row read again; the second is real
+    assert stitch_lines(tiles, bands[:2])[0] == "hello\nhello\nsee you\nsee you\nbye"
+
+
+def test_whole_tile_seam_dedupe_needs_overlapping_bands():
+    bands = tile_grid(100, 320, tile_height=160, overlap=0)
+    tiles = [[(bands[0], "a\nsame")], [(bands[1], "same\nb")]]
+    assert stitch_lines(tiles, bands)[0] == "a\nsame\nsame\nb"
+
+
+def test_whole_tile_seam_in_columns_compares_the_tile_above():
+    bands = tile_grid(100, 300, tile_height=160, columns=2, overlap=24)
+    tiles = [[(bands[0], "left")], [(bands[1], "right")], [(bands[2], "left\nnext")], [(bands[3], "left")]]
+    assert stitch_lines(tiles, bands)[0] == "left\nright\nnext\nleft"
+
+
+def test_hits_map_back_to_line_boxes():
+    bands = tile_grid(100, 300, tile_height=160)
+    text, spans = stitch_lines([[((0, 10, 80, 12), "fine"), ((0, 40, 80, 12), "I feel worthless")]], bands[:1])
+    start = text.index("worthless")
+    assert locate_hits([("worthless", start, start + 9)], spans) == [{"keyword": "worthless", "box": [0, 40, 80, 12]}]
+
+
+def test_only_changed_tiles_are_dirty():
+    image = np.zeros((300, 100), dtype=np.uint8)
+    state = TileState()
+    state.reset(tile_grid(100, 300, tile_height=100))
+    assert [index for index, _ in state.dirty_tiles(image)] == [0, 1, 2]
+    for index, digest in state.dirty_tiles(image):
+        state.digests[index] = digest
+    image[150, 50] = 255
+    assert [index for index, _ in state.dirty_tiles(image)] == [1]
+
+
+def test_tile_store_is_a_bounded_lru():
+    store = TileTextStore(max_sessions=2)
+    first, _ = store.acquire("a")
+    store.acquire("b")
+    assert store.acquire("a")[0] is first
+    store.acquire("c")  # evicts "b", the least recently used
+    assert store.acquire("a")[0] is first
+    assert set(store._states) == {"a", "c"}
@@ -0,0 +1,37 @@
+import pytest
+
+from app.models import sentiment_backends
+
+
+def _fake_pipeline(scores):
+    def run(texts, batch_size=None, truncation=True):
+        return [{"label": label, "score": score} for label, score in scores[: len(texts)]]
+
+    return run
+
+
+def test_parity_report_flags_label_and_score_mismatches(monkeypatch):
+    pipelines = {
+        "torch": _fake_pipeline([("POSITIVE", 0.99), ("NEGATIVE", 0.90), ("POSITIVE", 0.60)]),
+        "onnx-int8": _fake_pipeline([("POSITIVE", 0.98), ("NEGATIVE", 0.80), ("NEGATIVE", 0.55)]),
+    }
+    monkeypatch.setattr(sentiment_backends, "load_sentiment_pipeline", lambda backend, fallback=True: pipelines[backend])
+
+    report = sentiment_backends.check_backend_parity("onnx-int8", texts=["a", "b", "c"], score_tolerance=0.05)
+
+    assert not report["passed"]
+    assert report["label_agreement"] == pytest.approx(2 / 3, abs=1e-4)
+    assert report["max_score_diff"] == pytest.approx(0.10)
+    assert [mismatch["text"] for mismatch in report["mismatches"]] == ["b", "c"]
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backends_match_pytorch(backend):
+    # Downloads/exports DistilBERT on first run (cached under storage/onnx/)
+    pytest.importorskip("torch")
+    pytest.importorskip("optimum.onnxruntime")
+
+    report = sentiment_backends.check_backend_parity(backend)
+
+    assert report["label_agreement"] == 1.0, report["mismatches"]
+    assert report["passed"], report["mismatches"]
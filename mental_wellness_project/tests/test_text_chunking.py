@@ -0,0 +1,74 @@
+import re
+
+import pytest
+
+from app.config import settings
+from app.models import text_sentiment
+
+
+class _WhitespaceTokenizer:
+    """One token per word, with character offsets like a fast HF tokenizer."""
+
+    model_max_length = 12
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True, verbose=False):
+        return {"offset_mapping": [match.span() for match in re.finditer(r"\S+", text)]}
+
+
+class _FakeModel:
+    tokenizer = _WhitespaceTokenizer()
+
+
+@pytest.fixture
+def fake_tokenizer(monkeypatch):
+    monkeypatch.setattr(text_sentiment, "_sentiment_model", lambda: _FakeModel())
+    monkeypatch.setattr(settings, "sentiment_chunk_overlap_tokens", 3)
+    monkeypatch.setattr(settings, "sentiment_max_chunks", 32)
+
+
+def test_short_text_is_one_window(fake_tokenizer):
+    text = "a short text"
+    assert text_sentiment._chunk_spans(text) == [(0, len(text), 3)]
+
+
+def test_long_text_windows_overlap_and_cover_everything(fake_tokenizer):
+    words = [f"w{index}" for index in range(25)]
+    text = " ".join(words)
+    spans = text_sentiment._chunk_spans(text)
+
+    # 12 - 2 special tokens = 10 tokens per window, stepping 10 - 3 overlap = 7
+    assert [tokens for _, _, tokens in spans] == [10, 10, 10, 4]
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+        assert start < end
+    assert text[spans[1][0]:spans[1][1]].split() == words[7:17]
+
+
+def test_max_chunks_caps_windows(fake_tokenizer, monkeypatch):
+    monkeypatch.setattr(settings, "sentiment_max_chunks", 2)
+    assert len(text_sentiment._chunk_spans(" ".join(["word"] * 100))) == 2
+
+
+def test_aggregate_is_token_weighted_positive_probability():
+    predictions = [{"label": "POSITIVE", "score": 0.9}, {"label": "NEGATIVE", "score": 0.8}]
+    spans = [(0, 10, 30), (8, 20, 10)]
+    # (30 * 0.9 + 10 * 0.2) / 40 = 0.725
+    assert text_sentiment._aggregate_chunks(predictions, spans) == {
+        "label": "POSITIVE",
+        "score": pytest.approx(0.725),
+    }
+
+    spans = [(0, 10, 10), (8, 20, 30)]
+    # positive = (10 * 0.9 + 30 * 0.2) / 40 = 0.375
+    assert text_sentiment._aggregate_chunks(predictions, spans) == {
+        "label": "NEGATIVE",
+        "score": pytest.approx(0.625),
+    }
+
+
+def test_single_window_prediction_passes_through():
+    prediction = {"label": "NEGATIVE", "score": 0.7}
+    assert text_sentiment._aggregate_chunks([prediction], [(0, 5, 2)]) is prediction
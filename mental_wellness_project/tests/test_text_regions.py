@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+from app.utils.text_regions import detect_text_lines
+
+# Hershey fonts space words ~17px apart at this scale; screen fonts sit well inside the default gap
+JOIN_GAP = 25
+
+
+def _write(image, text, origin):
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2, cv2.LINE_AA)
+
+
+def _contains(box, inner):
+    x, y, w, h = box
+    ix, iy, iw, ih = inner
+    return x <= ix and y <= iy and ix + iw <= x + w and iy + ih <= y + h
+
+
+def _ink_box(image):
+    ys, xs = np.nonzero(image < 128)
+    return int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1)
+
+
+def test_finds_each_line_in_reading_order():
+    page = np.full((200, 500), 255, dtype=np.uint8)
+    lines = []
+    for index, text in enumerate(["First line of text", "Second line here", "Third"]):
+        line = np.full_like(page, 255)
+        _write(line, text, (10, 40 + 50 * index))
+        lines.append(_ink_box(line))
+        page = np.minimum(page, line)
+    boxes = detect_text_lines(page, join_gap=JOIN_GAP)
+    assert len(boxes) == 3
+    for box, ink in zip(boxes, lines):
+        assert _contains(box, ink)
+        assert box[3] < 40
+
+
+def test_side_by_side_columns_are_separate_lines():
+    image = np.full((100, 600), 255, dtype=np.uint8)
+    _write(image, "Left column", (10, 50))
+    _write(image, "Right column", (350, 52))
+    boxes = detect_text_lines(image, join_gap=JOIN_GAP)
+    assert len(boxes) == 2
+    assert boxes[0][0] + boxes[0][2] < boxes[1][0]
+
+
+def test_photos_and_empty_space_yield_no_lines():
+    assert detect_text_lines(np.full((120, 200), 255, dtype=np.uint8)) == []
+    photo = np.full((300, 400), 255, dtype=np.uint8)
+    texture = np.random.default_rng(0).integers(0, 256, (260, 360), dtype=np.uint8)
+    photo[20:280, 20:380] = cv2.GaussianBlur(texture, (0, 0), 3)
+    assert detect_text_lines(photo) == []
+    assert detect_text_lines(np.zeros((0, 0), dtype=np.uint8)) == []
+
+
+def test_max_regions_keeps_the_largest_lines():
+    page = np.full((200, 500), 255, dtype=np.uint8)
+    _write(page, "A much longer line of text", (10, 40))
+    _write(page, "Short", (10, 90))
+    (box,) = detect_text_lines(page, join_gap=JOIN_GAP, max_regions=1)
+    assert box[1] < 40 and box[2] > 300
@@ -0,0 +1,25 @@
+import pytest
+
+from app.utils.timing import timed
+
+
+def test_timed_accumulates_per_stage():
+    timings = {}
+    with timed(timings, "ocr"):
+        pass
+    with timed(timings, "ocr"):
+        pass
+    with timed(timings, "decode"):
+        pass
+    assert set(timings) == {"ocr", "decode"}
+    assert all(value >= 0 for value in timings.values())
+
+
+def test_timed_records_failed_blocks_and_accepts_no_dict():
+    timings = {}
+    with pytest.raises(ValueError):
+        with timed(timings, "decode"):
+            raise ValueError("bad frame")
+    assert "decode" in timings
+    with timed(None, "decode"):
+        pass
@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from app import routes
+from app.config import settings
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app import create_app
+
+    received = {}
+
+    def fake_analysis(frame, session_id=None):
+        received["bytes"] = len(frame)
+        return {"text": "", "harmful_hits": [], "status": "ok"}
+
+    monkeypatch.setattr(routes, "analyze_screen_content", fake_analysis)
+    monkeypatch.setattr(routes, "analyze_facial_expression", fake_analysis)
+    monkeypatch.setattr(routes, "log_interaction", lambda *args, **kwargs: None)
+    test_client = create_app(warm_up=False).test_client()
+    test_client.received = received
+    return test_client
+
+
+def _between_frame_and_screen_caps() -> bytes:
+    assert settings.upload_max_frame_bytes < settings.upload_max_screen_bytes
+    return b"\x89PNG" + bytes(settings.upload_max_frame_bytes + 1024)
+
+
+def test_screen_raw_body_uses_the_screenshot_cap(client):
+    body = _between_frame_and_screen_caps()
+    response = client.post("/api/v1/screen", data=body, content_type="image/png")
+    assert response.status_code == 200
+    assert client.received["bytes"] == len(body)
+
+
+def test_screen_multipart_frame_uses_the_screenshot_cap(client):
+    body = _between_frame_and_screen_caps()
+    response = client.post(
+        "/api/v1/screen",
+        data={"frame": (io.BytesIO(body), "screen.png"), "session_id": "s1"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert client.received["bytes"] == len(body)
+
+
+def test_camera_frames_keep_the_frame_cap(client):
+    response = client.post("/api/v1/vision", data=_between_frame_and_screen_caps(), content_type="image/jpeg")
+    assert response.status_code == 413
+    assert str(settings.upload_max_frame_bytes) in response.get_json()["error"]
+
+
+def test_screen_rejects_bodies_over_the_screenshot_cap(client):
+    body = bytes(settings.upload_max_screen_bytes + 1)
+    assert client.post("/api/v1/screen", data=body, content_type="image/png").status_code == 413
+
+
+def _multipart(field: str, size: int) -> bytes:
+    return (
+        b"--x\r\n"
+        + f'Content-Disposition: form-data; name="{field}"; filename="f.png"\r\n'.encode()
+        + b"Content-Type: image/png\r\n\r\n"
+        + bytes(size)
+        + b"\r\n--x--\r\n"
+    )
+
+
+def test_streamed_multipart_is_cut_off_at_the_combined_caps(client):
+    # No Content-Length: the cap must apply while Werkzeug reads the body
+    total = sum((settings.upload_max_frame_bytes, settings.upload_max_screen_bytes, settings.upload_max_audio_bytes))
+    environ = EnvironBuilder(
+        path="/api/v1/vision",
+        method="POST",
+        input_stream=io.BytesIO(_multipart("frame", total + 1024 * 1024)),
+        content_type="multipart/form-data; boundary=x",
+    ).get_environ()
+    del environ["CONTENT_LENGTH"]
+    environ["wsgi.input_terminated"] = True
+    # Straight to the WSGI app: the test client would add the Content-Length back
+    app_iter, status, _ = run_wsgi_app(client.application, environ)
+    assert status.startswith("413")
+    assert b"combined media limits" in b"".join(app_iter)
+    assert "bytes" not in client.received
+
+
+def test_multipart_part_over_its_cap(client):
+    body = _multipart("frame", settings.upload_max_frame_bytes + 1)
+    response = client.post("/api/v1/vision", data=body, content_type="multipart/form-data; boundary=x")
+    assert response.status_code == 413
+    assert "frame exceeds" in response.get_json()["error"]
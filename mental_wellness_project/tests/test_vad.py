@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.models import speech_emotion
+from app.utils.microphone import DEFAULT_SR
+from app.utils.online_stats import OnlineNormalizer
+from app.utils.vad import detect_voice
+
+
+def _speech_then_silence(sr=DEFAULT_SR):
+    rng = np.random.default_rng(0)
+    t = np.arange(sr, dtype=np.float32) / sr
+    voiced = 0.3 * np.sin(2 * np.pi * 200 * t) + 0.02 * rng.standard_normal(sr)
+    silence = 0.0005 * rng.standard_normal(2 * sr)
+    return np.concatenate([silence[:sr], voiced, silence[sr:]]).astype(np.float32)
+
+
+def test_voiced_region_is_kept_and_silence_trimmed():
+    activity = detect_voice(_speech_then_silence(), DEFAULT_SR)
+    assert activity.has_speech
+    assert activity.voiced_seconds == pytest.approx(1.0, abs=0.15)
+    assert activity.to_dict()["discarded_fraction"] == pytest.approx(2 / 3, abs=0.05)
+
+
+@pytest.mark.parametrize(
+    "clip",
+    [
+        np.zeros(DEFAULT_SR, dtype=np.float32),
+        0.001 * np.random.default_rng(0).standard_normal(DEFAULT_SR).astype(np.float32),
+        # Broadband hiss: loud but zero-crossing rate far above voiced speech
+        0.3 * np.random.default_rng(1).standard_normal(DEFAULT_SR).astype(np.float32),
+    ],
+    ids=["digital-silence", "room-noise", "hiss"],
+)
+def test_clips_without_speech_are_rejected(clip):
+    assert not detect_voice(clip, DEFAULT_SR).has_speech
+
+
+def test_no_speech_result_skips_feature_extraction(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("prosody should not run on a silent clip")
+
+    monkeypatch.setattr(speech_emotion, "_extract_features", fail)
+    monkeypatch.setattr(speech_emotion, "_normalizer", lambda: OnlineNormalizer(dims=3))
+    result = speech_emotion.analyze_speech_emotion(np.zeros(2 * DEFAULT_SR, dtype=np.float32), DEFAULT_SR)
+
+    assert result["emotion"] == "no_speech"
+    assert (result["energy"], result["pitch"], result["tempo"]) == (0.0, 0.0, 0.0)
+    assert result["vad"]["discarded_seconds"] == pytest.approx(2.0)
+
+
+def _tone(seconds, amplitude, sr=DEFAULT_SR, seed=0):
+    t = np.arange(int(seconds * sr), dtype=np.float32) / sr
+    noise = 0.0005 * np.random.default_rng(seed).standard_normal(t.size)
+    return (amplitude * np.sin(2 * np.pi * 200 * t) + noise).astype(np.float32)
+
+
+def test_pauses_between_voiced_regions_keep_their_timing():
+    silence = _tone(0.5, 0.0)
+    clip = np.concatenate([silence, _tone(0.5, 0.3), _tone(1.0, 0.0, seed=1), _tone(0.5, 0.3), silence])
+    activity = detect_voice(clip, DEFAULT_SR)
+    # One contiguous slice of the clip: the pause stays in, nothing is spliced
+    assert activity.kept_seconds == pytest.approx(2.0, abs=0.15)
+    assert activity.voiced_seconds == pytest.approx(1.0, abs=0.3)  # plus the hangover either side
+    assert np.shares_memory(activity.voiced, clip)
+    assert activity.to_dict()["analyzed_seconds"] == pytest.approx(2.0, abs=0.15)
+
+
+def test_soft_speech_under_the_gate_is_still_analyzed():
+    # The middle stretch is below the absolute floor, so the gate rejects it on its own
+    silence = _tone(0.5, 0.0)
+    clip = np.concatenate([silence, _tone(1.0, 0.3), _tone(1.0, 0.0015, seed=1), _tone(1.0, 0.3, seed=2), silence])
+    activity = detect_voice(clip, DEFAULT_SR)
+    assert activity.voiced_seconds < 2.5
+    assert activity.kept_seconds == pytest.approx(3.0, abs=0.15)
+
+
+def test_features_run_on_the_contiguous_span(monkeypatch):
+    seen = []
+    monkeypatch.setattr(speech_emotion, "_extract_features", lambda signal, sr: seen.append(signal) or (0.01, 200.0, 120.0))
+    monkeypatch.setattr(speech_emotion, "_normalizer", lambda: OnlineNormalizer(dims=3))
+    clip = _speech_then_silence()
+    result = speech_emotion.analyze_speech_emotion(clip, DEFAULT_SR)
+    (signal,) = seen
+    assert signal.size == pytest.approx(DEFAULT_SR, rel=0.15)
+    assert result["vad"]["analyzed_seconds"] == pytest.approx(signal.size / DEFAULT_SR, abs=1e-3)
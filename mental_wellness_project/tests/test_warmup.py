@@ -0,0 +1,64 @@
+import pytest
+
+from app import warmup
+
+
+@pytest.fixture
+def warmed(monkeypatch):
+    """Run a synchronous warm-up over fake tasks and return readiness()."""
+
+    def run(outcomes):
+        tasks = {}
+        for name, ok in outcomes.items():
+            def task(ok=ok, name=name):
+                if not ok:
+                    raise RuntimeError(f"{name} weights missing")
+            tasks[name] = task
+        monkeypatch.setattr(warmup, "WARMUP_TASKS", tasks)
+        monkeypatch.setattr(warmup, "_states", {})
+        monkeypatch.setattr(warmup, "_warmup_thread", None)
+        warmup.start_warmup(list(outcomes)).join(5.0)
+        return warmup.readiness()
+
+    return run
+
+
+def test_ready_when_every_model_loaded(warmed):
+    status = warmed({"text_sentiment": True, "fer": True})
+    assert status["ready"] and status["warmup"] == "complete"
+    assert not status["degraded"] and status["failed"] == []
+
+
+def test_failed_required_model_is_not_ready(warmed):
+    status = warmed({"text_sentiment": False, "fer": True})
+    assert not status["ready"]
+    assert status["warmup"] == "failed"
+    assert status["failed_required"] == ["text_sentiment"]
+    assert status["models"]["text_sentiment"]["error"] == "text_sentiment weights missing"
+
+
+def test_failed_optional_model_only_degrades(warmed):
+    status = warmed({"text_sentiment": True, "easyocr": False})
+    assert status["ready"] and status["degraded"]
+    assert status["failed"] == ["easyocr"] and status["failed_required"] == []
+
+
+def test_missing_tesseract_falls_back_to_easyocr(warmed):
+    status = warmed({"text_sentiment": True, "tesseract": False, "easyocr": True})
+    assert status["ready"] and status["degraded"]
+    assert status["failed"] == ["tesseract"] and status["failed_required"] == []
+
+
+def test_every_ocr_engine_failing_is_not_ready(warmed):
+    status = warmed({"text_sentiment": True, "tesseract": False, "easyocr": False})
+    assert not status["ready"] and status["warmup"] == "failed"
+    assert status["failed_required"] == ["tesseract", "easyocr"]
+
+
+def test_ready_route_returns_503_for_failed_required_model(warmed):
+    from app import create_app
+
+    warmed({"fer": False})
+    response = create_app(warm_up=False).test_client().get("/api/v1/ready")
+    assert response.status_code == 503
+    assert response.get_json()["failed_required"] == ["fer"]